@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,6 +7,7 @@ load_dotenv()
 class Settings(BaseSettings):
     # Groq API
     GROQ_API_KEY: str
+    GROQ_BASE_URL: Optional[str] = None  # e.g. a local stub for load tests
     
     # Pinecone
     PINECONE_API_KEY: str
@@ -16,6 +18,128 @@ class Settings(BaseSettings):
     BACKEND_PORT: int = 8000
     ENVIRONMENT: str = "development"
     
+    # Uploads
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_MEMORY_BUDGET: int = 1024 * 1024
+    
+    # Admission control: per-client rates (req/s, burst), lane-aware pools, queue budgets (s)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CPU_CONCURRENCY: int = 4
+    ADMISSION_LLM_CONCURRENCY: int = 16
+    ADMISSION_BULK_SHARE: float = 0.5
+    ADMISSION_INTERACTIVE_RATE: float = 10
+    ADMISSION_INTERACTIVE_BURST: float = 20
+    ADMISSION_BULK_RATE: float = 20
+    ADMISSION_BULK_BURST: float = 40
+    ADMISSION_INTERACTIVE_QUEUE_SECONDS: float = 2
+    ADMISSION_BULK_QUEUE_SECONDS: float = 30
+    
+    # Chat WebSocket
+    CHAT_WS_HEARTBEAT_SECONDS: float = 20
+    CHAT_WS_IDLE_TIMEOUT_SECONDS: float = 300
+    
+    # Persistence
+    STORE_BACKEND: str = "sqlite"
+    STORE_PATH: str = "resumetrix.db"
+    
+    # Full-text search
+    SEARCH_INDEX_PATH: str = "search_index"
+    SEARCH_FLUSH_DOCS: int = 256
+    SEARCH_FLUSH_SECONDS: float = 1.0  # longest an upload stays invisible to other workers
+    SEARCH_MAX_SEGMENTS: int = 8
+    
+    # Near-duplicate detection (MinHash LSH)
+    DEDUP_NUM_PERM: int = 128
+    DEDUP_BANDS: int = 16
+    DEDUP_SHINGLE_SIZE: int = 5
+    DEDUP_THRESHOLD: float = 0.8
+    
+    # Chat retrieval over resume sections (local fastembed model)
+    EMBEDDING_MODEL: str = "BAAI/bge-small-en-v1.5"
+    CHUNK_MAX_CHARS: int = 800
+    CHAT_CONTEXT_CHUNKS: int = 4
+    CHAT_CONTEXT_TOKENS: int = 600
+    
+    # LLM model routing: each tier is a failover-ordered model list; tasks map to tiers
+    # (see services/model_router.TASK_TIERS); a model whose median latency exceeds
+    # its tier's SLO (s) or whose error rate is too high is demoted for a while
+    LLM_MODEL_TIERS: Dict[str, List[str]] = {
+        "small": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+        "large": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"],
+    }
+    LLM_TASK_TIERS: Dict[str, str] = {}
+    LLM_TIER_SLO_SECONDS: Dict[str, float] = {"small": 2.0, "large": 20.0}
+    LLM_MAX_ERROR_RATE: float = 0.2
+    LLM_DEMOTION_SECONDS: float = 30
+    LLM_ATTEMPT_TIMEOUT_SECONDS: Dict[str, float] = {"small": 3.0, "large": 10.0}  # per model tried (first chunk when streaming)
+    LLM_TIMEOUT_SECONDS: float = 15  # cap for a whole call, failover included
+    
+    # Prompt token budgets (input tokens per task, see services/model_router.TASK_TIERS), counted
+    # with the served models' tokenizer: LLM_TOKENIZER_PATH (a local tokenizer.json, e.g. for
+    # offline deployments), else the LLM_TOKENIZER hub repo (an ungated copy of the Llama 3
+    # tokenizer all LLM_MODEL_TIERS models share); without either, ~4 characters per token
+    LLM_TOKENIZER: str = "unsloth/Llama-3.3-70B-Instruct"
+    LLM_TOKENIZER_PATH: str = ""
+    LLM_PROMPT_BUDGETS: Dict[str, int] = {
+        "relevance": 256,
+        "chat": 1800,
+        "feedback": 900,
+        "section_improvement": 700,
+        "keywords": 600,
+        "combined": 2000,
+    }
+    LLM_DEFAULT_PROMPT_BUDGET: int = 1000
+    # USD per million (input, output) tokens, for usage reports
+    LLM_TOKEN_PRICES: Dict[str, List[float]] = {
+        "llama-3.1-8b-instant": [0.05, 0.08],
+        "llama-3.3-70b-versatile": [0.59, 0.79],
+    }
+    
+    # LLM circuit breaker: opens when LLM_BREAKER_FAILURE_RATE of the last LLM_BREAKER_WINDOW
+    # calls failed or took longer than LLM_BREAKER_SLOW_SECONDS, then probes after LLM_BREAKER_OPEN_SECONDS
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_FAILURE_RATE: float = 0.5
+    LLM_BREAKER_SLOW_SECONDS: float = 10
+    LLM_BREAKER_OPEN_SECONDS: float = 30
+    LLM_BREAKER_PROBES: int = 1
+    
+    # AI analysis: "sections" (one call per part) or "combined" (one structured call, opt-in)
+    ANALYSIS_MODE: str = "sections"
+    
+    # Speculative scoring + AI analysis right after upload (opt-in)
+    PRECOMPUTE_ENABLED: bool = False
+    PRECOMPUTE_CONCURRENCY: int = 4
+    PRECOMPUTE_CACHE_SIZE: int = 256
+    
+    # Per-JD candidate leaderboards (combined = (1 - w) * ATS + w * JD match)
+    LEADERBOARD_SIZE: int = 100
+    LEADERBOARD_JD_WEIGHT: float = 0.5
+    LEADERBOARD_MAX_JDS: int = 256
+    
+    # TF-IDF resume x JD matching: resumes per matrix batch, missing terms reported per pair
+    MATCH_BATCH_SIZE: int = 512
+    MATCH_MISSING_TERMS: int = 10
+    
+    # Skill taxonomy (YAML, defaults to app/taxonomy/skills.yaml); fuzzy matching is a scoring
+    # hint only (parsed skills are never replaced by it): 1 edit up to 8 characters,
+    # SKILL_FUZZY_MAX_EDITS beyond, nothing under the min length or in the common words list
+    SKILL_TAXONOMY_PATH: str = ""
+    SKILL_COMMON_WORDS_PATH: str = ""  # defaults to app/taxonomy/common_words.txt
+    SKILL_FUZZY_MAX_EDITS: int = 2
+    SKILL_FUZZY_MIN_LENGTH: int = 8
+    
+    # Versioned GET resources (ETag / If-None-Match): results cached per content version
+    VERSION_CACHE_SIZE: int = 1024
+    
+    # Bulk export (/export): rows per page read, encoded and sent as one chunk; zstd level when compressed
+    EXPORT_BATCH_SIZE: int = 500
+    EXPORT_ZSTD_LEVEL: int = 3
+    
+    # Scoring rule profiles (YAML, defaults to app/scoring_profiles)
+    SCORING_PROFILES_DIR: str = ""
+    DEFAULT_SCORING_PROFILE: str = "default"
+    
     class Config:
         env_file = ".env"
 
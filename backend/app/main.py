@@ -1,14 +1,68 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import document, chatbot, analysis, scoring
+from starlette.concurrency import run_in_threadpool
+from .routes import document, chatbot, analysis, scoring, search, matching, export
+from .services.search_index import get_search_index
+from .services.store import get_store
+from .services.admission import AdmissionRejected, get_admission
+from .services.model_router import get_model_router
+from .services.prompt_budget import get_token_counter
+from .services.token_usage import get_token_ledger
+from .services.skill_taxonomy import get_skill_taxonomy
+from .services.jd_matcher import get_jd_matcher
+from .services.circuit_breaker import CircuitOpen
+from .utils.admission import AdmissionMiddleware, admission_rejected_handler, circuit_open_handler
+from .utils.uploads import UploadLimitMiddleware
+from .config import settings
+
+async def flush_search_index():
+    """Flush uploads buffered for SEARCH_FLUSH_SECONDS even when no further upload comes"""
+    index = get_search_index()
+    while True:
+        await asyncio.sleep(settings.SEARCH_FLUSH_SECONDS)
+        await run_in_threadpool(index.flush_due)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Index anything stored since the last flush (e.g. after a crash)
+    get_search_index().catch_up(get_store())
+    # Compile the skill taxonomy before the first upload needs it
+    get_skill_taxonomy()
+    # Vectorize stored resumes and open JDs for TF-IDF matching
+    get_jd_matcher()
+    # Load the tokenizer prompt budgets count with
+    get_token_counter()
+    flusher = asyncio.create_task(flush_search_index())
+    yield
+    flusher.cancel()
+    get_search_index().close()
 
 app = FastAPI(
     title="ResuMetrix API",
     version="1.0.0",
-    description="AI-powered resume analyzer with ATS scoring and intelligent chatbot"
+    description="AI-powered resume analyzer with ATS scoring and intelligent chatbot",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware for frontend
+# Upload limits: reject oversized or mislabeled bodies early (upload-resume bounds its own memory)
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_bytes=settings.MAX_UPLOAD_BYTES,
+    paths=["/documents/upload-resume"]
+)
+
+# Admission control: per-client rate limits, interactive/bulk lanes, load shedding
+app.add_middleware(AdmissionMiddleware, bulk_paths=["/documents/dedup", "/matching/run", "/export"])
+app.add_exception_handler(AdmissionRejected, admission_rejected_handler)
+# An open LLM circuit: 503 + Retry-After, like shed work
+app.add_exception_handler(CircuitOpen, circuit_open_handler)
+
+# CORS middleware for frontend (added last so it wraps the other middleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,6 +76,9 @@ app.include_router(router=document.doc_router, prefix="/documents", tags=["docum
 app.include_router(router=scoring.scoring_router, prefix="/scoring", tags=["scoring"])
 app.include_router(router=analysis.analysis_router, prefix="/analysis", tags=["analysis"])
 app.include_router(router=chatbot.chatbot_router, prefix="/chatbot", tags=["chatbot"])
+app.include_router(router=search.search_router, prefix="/search", tags=["search"])
+app.include_router(router=matching.matching_router, prefix="/matching", tags=["matching"])
+app.include_router(router=export.export_router, prefix="/export", tags=["export"])
 
 @app.get("/")
 async def read_root():
@@ -33,6 +90,9 @@ async def read_root():
             "scoring": "/scoring",
             "analysis": "/analysis",
             "chatbot": "/chatbot",
+            "search": "/search",
+            "matching": "/matching",
+            "export": "/export",
             "docs": "/docs"
         }
     }
@@ -40,3 +100,31 @@ async def read_root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics/admission")
+async def admission_metrics():
+    """
+    Queue times, shed and rate-limited counts per pool and lane
+    """
+    return get_admission().snapshot()
+
+@app.get("/metrics/models")
+async def model_metrics():
+    """
+    LLM routing: tiers, task mapping and per-model latency / error rates
+    """
+    return get_model_router().snapshot()
+
+@app.get("/metrics/tokens")
+async def token_metrics(session: Optional[str] = None):
+    """
+    LLM token usage and cost in total, per task and per model
+    ?session=chat:<id> or resume:<id> for one session's usage
+    """
+    ledger = get_token_ledger()
+    if session is None:
+        return {"exact_counts": get_token_counter().exact, **ledger.snapshot()}
+    usage = ledger.session(session)
+    if usage is None:
+        raise HTTPException(status_code=404, detail=f"No token usage recorded for session {session}")
+    return {"session": session, **usage}
@@ -1,3 +1,4 @@
 from .resume import ResumeData, Experience, Education
+from .document import ResumeDocument
 
-__all__ = ["ResumeData", "Experience", "Education"]
\ No newline at end of file
+__all__ = ["ResumeData", "Experience", "Education", "ResumeDocument"]
\ No newline at end of file
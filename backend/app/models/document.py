@@ -0,0 +1,84 @@
+import hashlib
+from collections import Counter
+from functools import cached_property
+from typing import FrozenSet, List, Optional, Tuple
+
+import orjson
+
+from ..utils.text import section_spans, SEARCH_TOKEN_PATTERN
+
+
+class ResumeDocument:
+    """
+    Resume text with lazily computed, cached views
+
+    Built once per upload and handed to the parser, scorer, analyser and
+    indexers, so each view (lowercasing, splitting, tokenizing, ...) is one
+    pass over the text however many stages use it. Instances are read-only.
+    """
+
+    def __init__(self, text: str, data: Optional[dict] = None):
+        self.text = text or ""
+        self.data = data  # parsed ResumeData fields, once known
+
+    @classmethod
+    def from_resume(cls, resume_data: dict) -> "ResumeDocument":
+        """Document for an already parsed (e.g. stored) resume"""
+        return cls(resume_data.get("raw_text", ""), resume_data)
+
+    @cached_property
+    def version(self) -> str:
+        """Content hash of the parsed fields (of the text if not parsed), for ETags and caches"""
+        content = orjson.dumps(self.data, option=orjson.OPT_SORT_KEYS) if self.data is not None else self.text.encode("utf-8")
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    @cached_property
+    def lower(self) -> str:
+        return self.text.lower()
+
+    @cached_property
+    def lines(self) -> List[str]:
+        return self.text.split("\n")
+
+    @cached_property
+    def words(self) -> List[str]:
+        """Whitespace-separated words, as str.split()"""
+        return self.text.split()
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Search tokens in order (lowercase, digits kept)"""
+        return SEARCH_TOKEN_PATTERN.findall(self.lower)
+
+    @cached_property
+    def token_set(self) -> FrozenSet[str]:
+        return frozenset(self.tokens)
+
+    @cached_property
+    def char_histogram(self) -> Counter:
+        """Occurrences of each character"""
+        return Counter(self.text)
+
+    def count_chars_except(self, allowed: str) -> int:
+        """Characters that are neither alphanumeric nor in `allowed`"""
+        return sum(
+            count for char, count in self.char_histogram.items()
+            if not char.isalnum() and char not in allowed
+        )
+
+    @cached_property
+    def sections(self) -> List[Tuple[str, int, int]]:
+        """(section, start, end) spans, see utils.text.section_spans"""
+        return section_spans(self.text)
+
+    def section(self, name: str) -> str:
+        """Text of the sections whose heading contains `name` (e.g. "experience")"""
+        return "\n".join(
+            self.text[start:end].strip()
+            for section, start, end in self.sections
+            if name in section
+        )
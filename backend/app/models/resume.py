@@ -18,6 +18,7 @@ class ResumeData(BaseModel):
     phone: Optional[str] = None
     summary: Optional[str] = None
     skills: List[str] = []
+    skill_ids: List[str] = []  # canonical taxonomy ids of the recognised skills
     experience: List[Experience] = []
     education: List[Education] = []
     raw_text: str  # Full text for LLM context
\ No newline at end of file
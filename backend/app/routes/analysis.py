@@ -1,30 +1,70 @@
-from fastapi import APIRouter, HTTPException
-from ..services.ai_analyser import AIAnalyser
-from ..routes.document import resume_storage
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+from ..services.ai_analyser import AIAnalyser, public_analysis
+from ..services.store import get_store, content_hash, scores_hash
+from ..services.version_cache import get_version_cache
+from ..services.token_usage import begin_session
+from ..services.resume_versions import previous_analysis
+from ..services.precompute import get_precompute_scheduler
+from ..config import settings
+from ..routes.document import resume_storage, load_resume, resume_document
+from ..utils.responses import make_etag, not_modified, versioned
 
 router = APIRouter()
 analyser = AIAnalyser()
 
 @router.get("/analyze-resume")
-async def analyze_resume():
+async def analyze_resume(request: Request, resume_id: Optional[int] = None):
     """
     Get AI analysis of resume
     Requires: Uploaded resume + calculated scores
+    Supports If-None-Match: an unchanged analysis is answered with 304
     """
-    if "current_resume" not in resume_storage:
-        raise HTTPException(status_code=404, detail="No resume uploaded yet")
+    resume_data = load_resume(resume_id)
     
-    if "current_scores" not in resume_storage:
+    if resume_id is None:
+        ats_scores = resume_storage.get("current_scores")
+    else:
+        ats_scores = get_store().get_latest_scores(resume_id)
+    
+    if ats_scores is None:
         raise HTTPException(status_code=400, detail="Please calculate ATS score first")
     
-    resume_data = resume_storage["current_resume"]
-    ats_scores = resume_storage["current_scores"]
+    document = resume_document(resume_id, resume_data)
+    if resume_id is None:
+        resume_id = resume_storage.get("current_resume_id")
     
-    analysis = await analyser.analyze_resume(resume_data, ats_scores)
+    # One analysis per resume version and score snapshot, re-served until either changes
+    cache = get_version_cache()
+    key = ("analysis", resume_id, document.version, scores_hash(ats_scores))
+    entry = cache.get(key)
+    if entry is None:
+        begin_session(f"resume:{resume_id}" if resume_id is not None else None)
+        if settings.PRECOMPUTE_ENABLED:
+            # Reuses a precomputed or in-flight analysis of the same scores
+            analysis = await get_precompute_scheduler().analysis(resume_id, resume_data, ats_scores, document)
+        else:
+            # Stored by another worker (or before a restart), else an edited version
+            # only re-asks for the parts that changed since the previous one
+            store = get_store()
+            analysis = store.get_analysis(resume_id, scores_hash(ats_scores)) if resume_id is not None else None
+            if analysis is None:
+                analysis = await analyser.analyze_resume(
+                    resume_data, ats_scores, document, previous_analysis(store, resume_id)
+                )
+                if resume_id is not None and not analysis.get("degraded"):
+                    store.save_analysis(resume_id, scores_hash(ats_scores), analysis)
+        analysis = public_analysis(analysis)
+        entry = (content_hash(analysis), analysis)
+        # Degraded (template) analyses are served but not cached, so recovery shows up on the next poll
+        if not analysis.get("degraded"):
+            cache.put(key, entry)
     
-    return {
+    digest, analysis = entry
+    etag = make_etag(request, "analysis", digest)
+    return not_modified(request, etag) or versioned(request, etag, {
         "status": "success",
         "analysis": analysis
-    }
+    })
 
-analysis_router = router
\ No newline at end of file
+analysis_router = router
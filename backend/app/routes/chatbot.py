@@ -1,8 +1,17 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
+import json
+import time
+from ..config import settings
 from ..services.chatbot import ResumeContextChatbot
-from .document import resume_storage
+from ..services.store import get_store
+from ..services.admission import AdmissionRejected, INTERACTIVE, begin
+from ..services.circuit_breaker import CircuitOpen
+from ..utils.admission import queue_budget
+from .document import resume_storage, load_resume
+from ..utils.responses import make_etag, not_modified, versioned
 
 router = APIRouter()
 
@@ -15,6 +24,7 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    resume_id: Optional[int] = None  # defaults to the current session resume
 
 class ChatResponse(BaseModel):
     status: str
@@ -28,17 +38,27 @@ async def ask_question(chat_request: ChatRequest) -> ChatResponse:
     Ask a question about the resume
     Requires: Uploaded resume
     """
-    if "current_resume" not in resume_storage:
+    if chat_request.resume_id is None and "current_resume" not in resume_storage:
         raise HTTPException(status_code=404, detail="No resume uploaded yet. Please upload a resume first.")
     
     # Set resume context if not already set
-    resume_data = resume_storage["current_resume"]
-    ats_scores = resume_storage.get("current_scores")
+    resume_data = load_resume(chat_request.resume_id)
+    resume_id = chat_request.resume_id
+    if resume_id is None:
+        resume_id = resume_storage.get("current_resume_id")
+        ats_scores = resume_storage.get("current_scores")
+    else:
+        ats_scores = get_store().get_latest_scores(resume_id)
     
-    chatbot_instance.set_resume_context(resume_data, ats_scores)
+    chatbot_instance.set_resume_context(resume_data, ats_scores, resume_id)
     
-    # Get response from chatbot
-    response = await chatbot_instance.chat(chat_request.message)
+    # Get response from chatbot (an open LLM circuit is answered as 503 + Retry-After)
+    try:
+        response = await chatbot_instance.chat(chat_request.message)
+    except (AdmissionRejected, CircuitOpen):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Chat model request failed: {type(e).__name__}")
     
     return ChatResponse(
         status=response.get("status"),
@@ -48,17 +68,19 @@ async def ask_question(chat_request: ChatRequest) -> ChatResponse:
     )
 
 @router.get("/history")
-async def get_conversation_history() -> dict:
+async def get_conversation_history(request: Request):
     """
     Get full conversation history
+    Supports If-None-Match: 304 until a message is added or the history cleared
     """
     history = chatbot_instance.get_history()
+    etag = make_etag(request, "history", chatbot_instance.history_version)
     
-    return {
+    return not_modified(request, etag) or versioned(request, etag, {
         "status": "success",
         "conversation_length": len(history),
         "history": history
-    }
+    })
 
 @router.delete("/clear-history")
 async def clear_conversation_history() -> dict:
@@ -85,4 +107,119 @@ async def reset_chatbot() -> dict:
         "message": "Chatbot reset successfully"
     }
 
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket, resume_id: Optional[int] = None):
+    """
+    Streaming chat over a WebSocket, one chatbot session per connection
+
+    Client -> server:
+        {"type": "message", "content": "...", "id": "optional client id"}
+        {"type": "cancel"}
+        {"type": "ping"} / {"type": "pong"}
+    Server -> client:
+        {"type": "token", "id": ..., "content": "..."}
+        {"type": "done", "id": ..., "message": "...", "conversation_length": n}
+        {"type": "not_relevant" | "cancelled" | "error", "id": ..., ...}
+        {"type": "ping"} heartbeats (answering them is optional)
+
+    Sending a new message cancels the generation still in flight. Any frame
+    from the client counts as liveness; a connection is only closed as idle
+    when nothing was received for the idle timeout and no answer is streaming.
+    """
+    await websocket.accept()
+    
+    try:
+        resume_data = load_resume(resume_id)
+    except HTTPException as e:
+        await websocket.close(code=4404, reason=e.detail)
+        return
+    
+    if resume_id is None:
+        resume_id = resume_storage.get("current_resume_id")
+        ats_scores = resume_storage.get("current_scores")
+    else:
+        ats_scores = get_store().get_latest_scores(resume_id)
+    
+    # Per-connection session: own history, context built once, shared LLM clients
+    session = ResumeContextChatbot(router=chatbot_instance.router)
+    session.set_resume_context(resume_data, ats_scores, resume_id)
+    
+    generation: Optional[asyncio.Task] = None
+    generation_id = None
+    message_count = 0
+    last_seen = time.monotonic()
+    
+    async def generate(message_id, content: str):
+        # Each message gets its own queue budget, not the connection's
+        begin(INTERACTIVE, queue_budget(INTERACTIVE))
+        try:
+            async for event in session.stream_chat(content):
+                await websocket.send_json({**event, "id": message_id})
+        except asyncio.CancelledError:
+            raise
+        except (AdmissionRejected, CircuitOpen) as e:
+            await websocket.send_json({
+                "type": "error",
+                "id": message_id,
+                "message": e.detail,
+                "status": e.status_code,
+                "retry_after": e.retry_after
+            })
+        except Exception as e:
+            await websocket.send_json({"type": "error", "id": message_id, "message": str(e)})
+    
+    async def cancel_generation():
+        nonlocal generation
+        if generation is not None and not generation.done():
+            generation.cancel()
+            try:
+                await generation
+            except asyncio.CancelledError:
+                pass
+            await websocket.send_json({"type": "cancelled", "id": generation_id})
+        generation = None
+    
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(websocket.receive(), timeout=settings.CHAT_WS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if generation is not None and not generation.done():
+                    # Streaming an answer counts as activity; the idle clock restarts after it
+                    last_seen = time.monotonic()
+                elif time.monotonic() - last_seen > settings.CHAT_WS_IDLE_TIMEOUT_SECONDS:
+                    await websocket.close(code=1000, reason="idle timeout")
+                    break
+                # Keeps proxies from dropping the connection; a dead peer fails the send
+                await websocket.send_json({"type": "ping"})
+                continue
+            
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            last_seen = time.monotonic()
+            try:
+                data = json.loads(frame.get("text") or frame.get("bytes") or b"")
+                message_type = data.get("type")
+            except (ValueError, AttributeError):
+                await websocket.send_json({"type": "error", "message": "Messages must be JSON objects"})
+                continue
+            
+            if message_type == "message":
+                await cancel_generation()
+                message_count += 1
+                generation_id = data.get("id", message_count)
+                generation = asyncio.create_task(generate(generation_id, str(data.get("content", ""))))
+            elif message_type == "cancel":
+                await cancel_generation()
+            elif message_type == "ping":
+                await websocket.send_json({"type": "pong"})
+            elif message_type != "pong":
+                await websocket.send_json({"type": "error", "message": f"Unknown message type: {message_type}"})
+    
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if generation is not None and not generation.done():
+            generation.cancel()
+
 chatbot_router = router
\ No newline at end of file
@@ -1,5 +1,20 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from starlette.datastructures import UploadFile
 from ..services.parser import ResumeParser
+from ..models.document import ResumeDocument
+from ..services.store import get_store
+from ..services.search_index import get_search_index
+from ..services.dedup import get_duplicate_detector
+from ..services.retrieval import get_retriever
+from ..services.jd_matcher import get_jd_matcher
+from ..services.precompute import get_precompute_scheduler
+from ..services.resume_versions import lineage, diff_versions
+from ..services.admission import AdmissionRejected, get_admission
+from ..config import settings
+from ..utils.responses import negotiate, select_fields, needs_field, make_etag, not_modified, versioned
+from ..utils.validators import ALLOWED_CONTENT_TYPES, sniff_stream
+from ..utils.uploads import read_upload_form
+from typing import List, Optional
 import json
 
 router = APIRouter()
@@ -7,44 +22,257 @@ router = APIRouter()
 # In-memory storage for current session
 resume_storage = {}
 
-@router.post("/upload-resume")
-async def upload_resume(file: UploadFile = File(...)):
+FIELDS_DESCRIPTION = "Comma-separated fields to return, prefix with - to drop one (e.g. -raw_text)"
+
+# upload-resume parses its own form (see read_upload_form), so its body is documented here
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"]
+            }
+        }
+    }
+}
+
+def load_resume(resume_id: Optional[int] = None, include_raw_text: bool = True) -> dict:
+    """
+    Resolve a resume by id from the persistent store,
+    falling back to the current session resume
+    """
+    if resume_id is None:
+        if "current_resume" not in resume_storage:
+            raise HTTPException(status_code=404, detail="No resume uploaded yet")
+        return resume_storage["current_resume"]
+
+    resume = get_store().get_resume(resume_id, include_raw_text=include_raw_text)
+    if resume is None:
+        raise HTTPException(status_code=404, detail=f"Resume {resume_id} not found")
+    return resume
+
+def resume_document(resume_id: Optional[int], resume_data: dict) -> ResumeDocument:
+    """
+    Text views of a resume: the session's upload-time document when it
+    applies, otherwise one built for this request
+    """
+    document = resume_storage.get("current_document")
+    if resume_id is None and document is not None:
+        return document
+    return ResumeDocument.from_resume(resume_data)
+
+def _ingest(file, filename: str, previous_id: Optional[int] = None, previous_lineage: Optional[str] = None):
+    """
+    Parse, persist and index an upload (CPU-bound, runs in the threadpool)
+    previous_id is the version this upload may be an edit of; with
+    previous_lineage it only counts as one for the same email/filename
+    Returns the document, its resume id, near-duplicates, the previous
+    version's id and the section diff against it
+    """
+    # Parse straight from the spooled upload (in memory up to the budget, on disk beyond it)
+    document = ResumeParser().parse_document(file, filename)
+
+    store = get_store()
+    previous = store.get_resume(previous_id) if previous_id is not None else None
+    if previous_lineage is not None and previous_lineage != lineage(document.data, filename):
+        previous = None
+    if previous is None:
+        previous_id = None
+
+    # Persist and index; every stage shares the document's tokens and sections
+    resume_id = store.save_resume(document.data, filename, parent_id=previous_id)
+    get_search_index().add_document(resume_id, document.text, document.tokens)
+    duplicates = get_duplicate_detector().add(resume_id, document.text, document.tokens)
+    get_retriever().index(resume_id, document.text, document.sections, previous_id=previous_id)
+    get_jd_matcher().add_resume(resume_id, document.tokens)
+
+    diff = diff_versions(previous, document.data, document) if previous is not None else None
+    return document, resume_id, duplicates, previous_id, diff
+
+@router.post("/upload-resume", openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
+async def upload_resume(
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    previous_resume_id: Optional[int] = Query(None, description="Stored resume this upload is an edited version of")
+):
     """
     Upload and parse resume (PDF/DOCX)
+    An upload with the session resume's email (or filename, without one) is
+    a new version of it, as is one naming previous_resume_id: the response
+    then has the section diff, and scoring / analysis reuse its results
     Returns: Structured resume JSON
     """
+    # Parsed here, not by a File() parameter, so the spool size applies to this route only
+    form = await read_upload_form(request, settings.UPLOAD_MEMORY_BUDGET)
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=422, detail="Missing file")
+        return await _upload_resume(request, file, fields, previous_resume_id)
+    finally:
+        await form.close()
+
+async def _upload_resume(request: Request, file: UploadFile, fields: Optional[str], previous_resume_id: Optional[int]):
     try:
         # Validate file type
-        if file.content_type not in ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
+        if file.content_type not in ALLOWED_CONTENT_TYPES:
             raise HTTPException(status_code=400, detail="Only PDF and DOCX files allowed")
-        
-        # Read file into memory
-        content = await file.read()
-        
-        # Parse resume
-        parser = ResumeParser()
-        parsed_resume = parser.parse(content, file.filename)
-        
-        # Store in memory for this session
+
+        # UploadLimitMiddleware already rejected oversized bodies and, from the
+        # first chunk, mislabeled files; re-check the spooled file's magic bytes
+        # in case the middleware couldn't (no file part early in the body)
+        if sniff_stream(file.file) != ALLOWED_CONTENT_TYPES[file.content_type]:
+            raise HTTPException(status_code=400, detail="File content does not match a PDF or DOCX file")
+
+        if previous_resume_id is not None:
+            if get_store().get_resume(previous_resume_id, include_raw_text=False) is None:
+                raise HTTPException(status_code=404, detail=f"Resume {previous_resume_id} not found")
+            previous_id, previous_lineage = previous_resume_id, None
+        else:
+            previous_lineage = resume_storage.get("current_lineage")
+            previous_id = resume_storage.get("current_resume_id") if previous_lineage else None
+
+        document, resume_id, duplicates, previous_id, diff = await get_admission().run_cpu(
+            _ingest, file.file, file.filename, previous_id, previous_lineage
+        )
+        parsed_resume = document.data
+
+        # Keep as the current resume for this session
         resume_storage["current_resume"] = parsed_resume
-        
-        return {
+        resume_storage["current_resume_id"] = resume_id
+        resume_storage["current_document"] = document
+        resume_storage["current_lineage"] = lineage(parsed_resume, file.filename)
+        resume_storage.pop("current_scores", None)
+
+        # Score and analyse in the background before the user asks for it
+        if settings.PRECOMPUTE_ENABLED:
+            get_precompute_scheduler().schedule(resume_id, parsed_resume, file.filename, document)
+
+        return negotiate(request, {
             "status": "success",
             "message": "Resume parsed successfully",
-            "resume": parsed_resume
-        }
-    
+            "resume_id": resume_id,
+            "duplicates": duplicates,
+            "previous_resume_id": previous_id,
+            "diff": diff,
+            "resume": select_fields(parsed_resume, fields)
+        })
+
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/current-resume")
-async def get_current_resume():
+async def get_current_resume(request: Request, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
     """
     Retrieve current resume from session memory
+    Supports If-None-Match: 304 while the session resume is unchanged
     """
     if "current_resume" not in resume_storage:
         raise HTTPException(status_code=404, detail="No resume uploaded yet")
-    
-    return resume_storage["current_resume"]
 
-doc_router = router
\ No newline at end of file
+    document = resume_document(None, resume_storage["current_resume"])
+    etag = make_etag(request, "resume", resume_storage.get("current_resume_id"), document.version, fields or "")
+    return not_modified(request, etag) or versioned(request, etag, select_fields(resume_storage["current_resume"], fields))
+
+@router.get("/")
+async def list_resumes(
+    request: Request,
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    max_score: Optional[int] = Query(None, ge=0, le=100),
+    skill: Optional[List[str]] = Query(None),
+    email: Optional[str] = None,
+    cursor: Optional[int] = Query(None, description="Id of the last resume on the previous page"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    List stored resumes, newest first
+    e.g. /documents/?min_score=70&skill=kubernetes
+    """
+    resumes = get_store().list_resumes(
+        min_ats_score=min_score,
+        max_ats_score=max_score,
+        skills=skill,
+        email=email,
+        before_id=cursor,
+        limit=limit
+    )
+
+    return negotiate(request, {
+        "status": "success",
+        "count": len(resumes),
+        "resumes": resumes,
+        "next_cursor": resumes[-1]["id"] if len(resumes) == limit else None
+    })
+
+@router.get("/{resume_id}")
+async def get_resume(request: Request, resume_id: int, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)):
+    """
+    Retrieve a stored resume with its latest scores
+    """
+    # Skip decompressing raw_text when the client doesn't want it
+    resume = load_resume(resume_id, include_raw_text=needs_field(fields, "raw_text"))
+
+    return negotiate(request, {
+        "status": "success",
+        "resume_id": resume_id,
+        "resume": select_fields(resume, fields),
+        "scores": get_store().get_latest_scores(resume_id)
+    })
+
+@router.get("/{resume_id}/diff")
+async def get_diff(request: Request, resume_id: int, against: Optional[int] = Query(None, description="Resume to compare with (defaults to the previous version)")):
+    """
+    Section-level diff of a stored resume against its previous version
+    """
+    store = get_store()
+    if against is None:
+        against = store.get_parent_id(resume_id)
+        if against is None:
+            raise HTTPException(status_code=404, detail=f"Resume {resume_id} has no previous version")
+
+    resume = load_resume(resume_id)
+    previous = load_resume(against)
+
+    return negotiate(request, {
+        "status": "success",
+        "resume_id": resume_id,
+        "previous_resume_id": against,
+        "diff": diff_versions(previous, resume)
+    })
+
+@router.get("/{resume_id}/duplicates")
+async def get_duplicates(request: Request, resume_id: int):
+    """
+    Near-duplicate resumes of a stored resume (MinHash LSH)
+    """
+    duplicates = get_duplicate_detector().find_duplicates(resume_id)
+    if duplicates is None:
+        raise HTTPException(status_code=404, detail=f"Resume {resume_id} not found or not indexed for duplicates")
+
+    return negotiate(request, {
+        "status": "success",
+        "resume_id": resume_id,
+        "duplicates": duplicates
+    })
+
+@router.post("/dedup")
+async def dedup_all(request: Request):
+    """
+    Batch dedup: cluster every stored resume with its near-duplicates
+    """
+    detector = get_duplicate_detector()
+    backfilled = await get_admission().run_cpu(detector.backfill)
+    clusters = await get_admission().run_cpu(detector.cluster_all)
+
+    return negotiate(request, {
+        "status": "success",
+        "backfilled": backfilled,
+        "cluster_count": len(clusters),
+        "clusters": clusters
+    })
+
+doc_router = router
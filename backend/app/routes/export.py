@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from ..services.export import ResultExporter
+from ..services.store import get_store
+from ..config import settings
+
+router = APIRouter()
+
+@router.get("")
+async def export_results(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    compression: Optional[str] = Query(None, pattern="^zstd$", description="zstd: compress the stream on the fly"),
+    include_analysis: bool = False,
+    min_score: Optional[int] = Query(None, ge=0, le=100),
+    max_score: Optional[int] = Query(None, ge=0, le=100),
+    skill: Optional[List[str]] = Query(None),
+    email: Optional[str] = None,
+    cursor: int = Query(0, ge=0, description="Resume id of the last row received, to resume an interrupted export"),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Stream stored resumes with their latest scores (and analyses) as NDJSON or CSV
+    Rows come in resume id order, read and sent a page at a time (bulk lane)
+    e.g. /export?format=csv&min_score=70&compression=zstd
+    """
+    exporter = ResultExporter(
+        get_store(),
+        format,
+        include_analysis=include_analysis,
+        compression=compression,
+        batch_size=settings.EXPORT_BATCH_SIZE,
+        zstd_level=settings.EXPORT_ZSTD_LEVEL
+    )
+
+    return StreamingResponse(
+        exporter.stream(cursor, limit, min_ats_score=min_score, max_ats_score=max_score, skills=skill, email=email),
+        media_type=exporter.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{exporter.filename}"'}
+    )
+
+export_router = router
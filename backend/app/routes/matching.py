@@ -0,0 +1,119 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel
+from typing import Dict, List
+from ..services.jd_matcher import TfidfMatcher, get_jd_matcher
+from ..services.store import get_store
+from ..services.admission import get_admission
+from ..utils.responses import negotiate
+
+router = APIRouter()
+
+class JDInput(BaseModel):
+    jd_text: str
+
+async def _current_matcher() -> TfidfMatcher:
+    """The matcher caught up with resumes and JDs saved by any worker"""
+    matcher = get_jd_matcher()
+    await get_admission().run_cpu(matcher.refresh, get_store())
+    return matcher
+
+def _with_candidates(matches: List[dict]) -> List[dict]:
+    """Add name and email to resume matches"""
+    store = get_store()
+    results = []
+    for match in matches:
+        resume = store.get_resume(match["resume_id"], include_raw_text=False) or {}
+        results.append({**match, "name": resume.get("name"), "email": resume.get("email")})
+    return results
+
+@router.post("/jds")
+async def open_jd(request: Request, jd_input: JDInput):
+    """
+    Open a job description for matching against the whole resume pool
+    """
+    if not jd_input.jd_text.strip():
+        raise HTTPException(status_code=400, detail="Job description is empty")
+
+    jd_id = get_store().save_open_jd(jd_input.jd_text)
+    get_jd_matcher().add_jd(jd_input.jd_text)
+
+    return negotiate(request, {
+        "status": "success",
+        "jd_id": jd_id
+    })
+
+@router.get("/jds")
+async def list_open_jds(request: Request):
+    """
+    List open job descriptions
+    """
+    return negotiate(request, {
+        "status": "success",
+        "jds": [{"jd_id": jd_id, "jd_text": jd_text} for jd_id, jd_text in get_store().list_open_jds()]
+    })
+
+@router.delete("/jds/{jd_id}")
+async def close_jd(jd_id: str) -> dict:
+    """
+    Close a job description (no longer matched)
+    """
+    get_jd_matcher().remove_jd(jd_id)
+    if not get_store().close_jd(jd_id):
+        raise HTTPException(status_code=404, detail=f"Job description {jd_id} is not open")
+
+    return {
+        "status": "success",
+        "message": "Job description closed"
+    }
+
+@router.get("/jds/{jd_id}/candidates")
+async def get_jd_candidates(request: Request, jd_id: str, limit: int = Query(20, ge=1, le=500)):
+    """
+    Best resumes for an open job description by TF-IDF weighted match score
+    Each match lists the JD's highest-weighted terms the resume is missing
+    """
+    try:
+        matcher = await _current_matcher()
+        matches = await get_admission().run_cpu(matcher.top_matches, [jd_id], limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job description {jd_id} is not open")
+
+    return negotiate(request, {
+        "status": "success",
+        "jd_id": jd_id,
+        "candidates": _with_candidates(matches[jd_id])
+    })
+
+@router.get("/resumes/{resume_id}")
+async def get_resume_matches(request: Request, resume_id: int):
+    """
+    One resume against every open job description, best match first
+    """
+    matcher = await _current_matcher()
+    if resume_id not in matcher.resumes.vectors:
+        raise HTTPException(status_code=404, detail=f"Resume {resume_id} not found")
+
+    pairs = await get_admission().run_cpu(matcher.pairs, [resume_id])
+
+    return negotiate(request, {
+        "status": "success",
+        "resume_id": resume_id,
+        "matches": sorted(pairs, key=lambda pair: (-pair["match_score"], -pair["similarity"]))
+    })
+
+@router.post("/run")
+async def run_matching(request: Request, limit: int = Query(20, ge=1, le=500)):
+    """
+    Match every open job description against the whole resume pool
+    Returns the top `limit` candidates per JD (bulk lane, e.g. a nightly job)
+    """
+    matcher = await _current_matcher()
+    matches: Dict[str, List[dict]] = await get_admission().run_cpu(matcher.top_matches, None, limit)
+
+    return negotiate(request, {
+        "status": "success",
+        **matcher.snapshot(),
+        "matches": {jd_id: _with_candidates(candidates) for jd_id, candidates in matches.items()}
+    })
+
+matching_router = router
@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from ..services.ats_scorer import ATSScorer
-from ..routes.document import resume_storage
+from ..services.scoring_profiles import CompiledProfile, get_profile_registry
+from ..services.store import get_store, jd_hash, content_hash
+from ..services.leaderboard import get_leaderboards
+from ..services.precompute import get_precompute_scheduler
+from ..services.admission import get_admission
+from ..services.version_cache import get_version_cache
+from ..services.resume_versions import previous_scores, score_delta
+from ..config import settings
+from ..routes.document import resume_storage, load_resume, resume_document
+from ..utils.responses import negotiate, make_etag, not_modified, versioned
 from pydantic import BaseModel
 from typing import Optional
 
@@ -10,41 +19,139 @@ scorer = ATSScorer()
 class JDInput(BaseModel):
     jd_text: str
 
+def _get_profile(profile: Optional[str]) -> CompiledProfile:
+    """
+    Resolve a scoring profile by name (default profile if None)
+    """
+    try:
+        return get_profile_registry().get(profile)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown scoring profile: {profile}")
+
+def _save_scores(resume_id: Optional[int], scores: dict, jd_text: Optional[str] = None):
+    """
+    Persist a score snapshot; session scores are only kept for the current resume
+    """
+    if resume_id is None:
+        resume_id = resume_storage.get("current_resume_id")
+        resume_storage["current_scores"] = scores
+    
+    if resume_id is not None:
+        get_store().save_scores(resume_id, scores, jd_text)
+
 @router.get("/score-resume")
-async def get_ats_score():
+async def get_ats_score(request: Request, resume_id: Optional[int] = None, profile: Optional[str] = None):
     """
     Get ATS score for uploaded resume
+    Versioned by resume and profile content: polls are answered from the
+    version cache, with 304 Not Modified if the client's ETag still matches
+    delta is the change since the resume's previous version, if any
     """
-    if "current_resume" not in resume_storage:
-        raise HTTPException(status_code=404, detail="No resume uploaded yet")
+    resume_data = load_resume(resume_id)
+    compiled = _get_profile(profile)
+    document = resume_document(resume_id, resume_data)
+    owner = resume_id if resume_id is not None else resume_storage.get("current_resume_id")
     
-    resume_data = resume_storage["current_resume"]
-    scores = scorer.score_resume(resume_data)
+    cache = get_version_cache()
+    key = ("scores", owner, document.version, compiled.version)
+    entry = cache.get(key)
+    if entry is None:
+        # Precomputed scores were already persisted by the background job
+        scores = None
+        if settings.PRECOMPUTE_ENABLED:
+            scores = get_precompute_scheduler().cached_scores(owner, compiled)
+        
+        if scores is None:
+            scores = await get_admission().run_cpu(
+                scorer.score_resume,
+                resume_data,
+                profile=compiled,
+                document=document
+            )
+            # Store scores for AI analysis
+            _save_scores(resume_id, scores)
+        
+        delta = score_delta(previous_scores(get_store(), owner), scores)
+        entry = (content_hash([scores, delta]), scores, delta)
+        cache.put(key, entry)
     
-    # Store scores for AI analysis
-    resume_storage["current_scores"] = scores
+    digest, scores, delta = entry
+    if resume_id is None:
+        resume_storage["current_scores"] = scores
     
-    return {
+    etag = make_etag(request, "scores", digest)
+    return not_modified(request, etag) or versioned(request, etag, {
         "status": "success",
-        "scores": scores
-    }
+        "scores": scores,
+        "delta": delta
+    })
 
 @router.post("/score-with-jd")
-async def score_with_jd(jd_input: JDInput):
+async def score_with_jd(request: Request, jd_input: JDInput, resume_id: Optional[int] = None, profile: Optional[str] = None):
     """
     Score resume with job description matching
     """
-    if "current_resume" not in resume_storage:
-        raise HTTPException(status_code=404, detail="No resume uploaded yet")
+    resume_data = load_resume(resume_id)
+    scores = await get_admission().run_cpu(
+        scorer.score_resume,
+        resume_data,
+        jd_input.jd_text,
+        profile=_get_profile(profile),
+        document=resume_document(resume_id, resume_data)
+    )
+    
+    _save_scores(resume_id, scores, jd_input.jd_text)
+    owner = resume_id if resume_id is not None else resume_storage.get("current_resume_id")
+    
+    return negotiate(request, {
+        "status": "success",
+        "jd_id": jd_hash(jd_input.jd_text),
+        "scores": scores,
+        "delta": score_delta(previous_scores(get_store(), owner), scores)
+    })
+
+@router.get("/leaderboard/{jd_id}")
+async def get_leaderboard(request: Request, jd_id: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """
+    Top candidates for a job description by combined ATS + JD match score
+    jd_id is returned by /score-with-jd
+    """
+    board = get_leaderboards().get(jd_id)
+    store = get_store()
     
-    resume_data = resume_storage["current_resume"]
-    scores = scorer.score_resume(resume_data, jd_input.jd_text)
+    candidates = []
+    for entry in board.page(offset, limit):
+        resume = store.get_resume(entry["resume_id"], include_raw_text=False) or {}
+        candidates.append({**entry, "name": resume.get("name"), "email": resume.get("email")})
     
-    resume_storage["current_scores"] = scores
+    return negotiate(request, {
+        "status": "success",
+        "jd_id": jd_id,
+        "total": len(board),
+        "candidates": candidates
+    })
+
+@router.post("/leaderboard")
+async def get_leaderboard_for_jd(request: Request, jd_input: JDInput, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """
+    Same as GET /leaderboard/{jd_id}, looked up by the job description text
+    """
+    return await get_leaderboard(request, jd_hash(jd_input.jd_text), offset, limit)
+
+@router.get("/profiles")
+async def list_profiles():
+    """
+    List available scoring profiles
+    """
+    registry = get_profile_registry()
     
     return {
         "status": "success",
-        "scores": scores
+        "default": registry.get().name,
+        "profiles": [
+            {"name": name, "description": registry.get(name).description}
+            for name in registry.names()
+        ]
     }
 
-scoring_router = router
\ No newline at end of file
+scoring_router = router
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Query, Request
+from ..services.search_index import get_search_index
+from ..services.store import get_store
+from ..utils.responses import negotiate
+
+router = APIRouter()
+
+@router.get("/resumes")
+async def search_resumes(
+    request: Request,
+    q: str = Query(..., min_length=1, description='Terms are ANDed, e.g. terraform "5 years"'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Full-text search over raw resume text, ranked by BM25
+    """
+    total, hits = get_search_index().search(q, limit=limit, offset=offset)
+    store = get_store()
+    
+    results = []
+    for resume_id, score in hits:
+        resume = store.get_resume(resume_id, include_raw_text=False)
+        if resume is None:
+            continue
+        results.append({
+            "resume_id": resume_id,
+            "score": round(score, 4),
+            "name": resume.get("name"),
+            "email": resume.get("email"),
+            "skills": resume.get("skills", [])
+        })
+    
+    return negotiate(request, {
+        "status": "success",
+        "total": total,
+        "results": results
+    })
+
+search_router = router
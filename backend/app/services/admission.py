@@ -0,0 +1,269 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Set per request (by AdmissionMiddleware) or per unit of work (WebSocket messages, background jobs)
+_lane: ContextVar[str] = ContextVar("admission_lane", default=INTERACTIVE)
+_deadline: ContextVar[Optional[float]] = ContextVar("admission_deadline", default=None)
+
+
+class AdmissionRejected(Exception):
+    """Work refused by admission control (answered as status_code + Retry-After)"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def current_lane() -> str:
+    return _lane.get()
+
+
+def begin(lane: str, queue_budget: Optional[float]):
+    """
+    Enter a lane for the current request or task
+    Slots must then be granted within queue_budget seconds (None waits forever)
+    """
+    _lane.set(lane)
+    _deadline.set(time.monotonic() + queue_budget if queue_budget is not None else None)
+
+
+class LatencyWindow:
+    """Recent samples (seconds) for percentile reporting"""
+
+    def __init__(self, size: int = 1024):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, value: float):
+        self.samples.append(value)
+
+    def percentiles(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+
+        def pick(pct: float) -> float:
+            return round(ordered[min(int(pct / 100 * len(ordered)), len(ordered) - 1)] * 1000, 1)
+
+        return {"p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99)}
+
+
+class LanePool:
+    """
+    Concurrency pool with an interactive and a bulk lane
+
+    Waiting interactive work is always granted first, and bulk work may hold
+    at most bulk_limit slots, so interactive requests keep headroom while
+    bulk jobs run. Work that would wait past its deadline (estimated from
+    the queue length and recent service times) is shed immediately.
+    """
+
+    def __init__(self, name: str, capacity: int, bulk_share: float = 0.5):
+        self.name = name
+        self.capacity = capacity
+        self.bulk_limit = max(1, min(capacity, math.floor(capacity * bulk_share)))
+        self.active = {lane: 0 for lane in LANES}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._service_time = 0.0  # EWMA of slot hold times
+        self.queue_time = {lane: LatencyWindow() for lane in LANES}
+        self.admitted = {lane: 0 for lane in LANES}
+        self.shed = {lane: 0 for lane in LANES}
+
+    def _has_room(self, lane: str) -> bool:
+        if sum(self.active.values()) >= self.capacity:
+            return False
+        return lane == INTERACTIVE or self.active[BULK] < self.bulk_limit
+
+    def _estimated_wait(self, lane: str) -> float:
+        ahead = len(self._waiters[INTERACTIVE])
+        slots = self.capacity
+        if lane == BULK:
+            ahead += len(self._waiters[BULK])
+            slots = self.bulk_limit
+        return (ahead + 1) * max(self._service_time, 0.001) / slots
+
+    def _wake(self):
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self._has_room(lane):
+                future = waiters.popleft()
+                if not future.done():
+                    self.active[lane] += 1
+                    future.set_result(None)
+
+    def _shed(self, lane: str, retry_after: float) -> AdmissionRejected:
+        self.shed[lane] += 1
+        return AdmissionRejected(503, f"{self.name} capacity exhausted for {lane} work", retry_after)
+
+    async def acquire(self, lane: str, deadline: Optional[float]):
+        started = time.monotonic()
+        if not self._waiters[lane] and not (lane == BULK and self._waiters[INTERACTIVE]) and self._has_room(lane):
+            self.active[lane] += 1
+        else:
+            estimate = self._estimated_wait(lane)
+            if deadline is not None and started + estimate > deadline:
+                raise self._shed(lane, estimate)
+
+            future = asyncio.get_running_loop().create_future()
+            self._waiters[lane].append(future)
+            try:
+                timeout = None if deadline is None else max(deadline - started, 0)
+                await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                raise self._shed(lane, self._estimated_wait(lane))
+            except asyncio.CancelledError:
+                # Granted just as the caller went away: hand the slot back
+                if future.done() and not future.cancelled():
+                    self.release(lane, 0.0)
+                raise
+
+        self.admitted[lane] += 1
+        self.queue_time[lane].add(time.monotonic() - started)
+
+    def release(self, lane: str, held: float):
+        self.active[lane] -= 1
+        if held:
+            self._service_time = held if not self._service_time else 0.8 * self._service_time + 0.2 * held
+        self._wake()
+
+    def snapshot(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "bulk_limit": self.bulk_limit,
+            "service_time_ms": round(self._service_time * 1000, 1),
+            "lanes": {
+                lane: {
+                    "active": self.active[lane],
+                    "waiting": sum(1 for f in self._waiters[lane] if not f.done()),
+                    "admitted": self.admitted[lane],
+                    "shed": self.shed[lane],
+                    "queue_time": self.queue_time[lane].percentiles()
+                }
+                for lane in LANES
+            }
+        }
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0 if a token was taken, else seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Per-client rate limits plus lane-aware pools for CPU-bound work
+    (parsing, scoring) and LLM calls
+
+    Limits and pools are per worker process; the lane and deadline of the
+    current request are read from context variables.
+    """
+
+    def __init__(
+        self,
+        cpu_concurrency: int = 4,
+        llm_concurrency: int = 16,
+        bulk_share: float = 0.5,
+        rates: Optional[Dict[str, tuple]] = None,
+        max_clients: int = 10000,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.pools = {
+            "cpu": LanePool("cpu", cpu_concurrency, bulk_share),
+            "llm": LanePool("llm", llm_concurrency, bulk_share),
+        }
+        self.rates = rates or {INTERACTIVE: (10.0, 20.0), BULK: (20.0, 40.0)}
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[tuple, TokenBucket]" = OrderedDict()
+        self.rate_limited = {lane: 0 for lane in LANES}
+
+    def check_rate(self, client: str, lane: str):
+        """Raise AdmissionRejected (429) if the client is over its lane's rate"""
+        key = (client, lane)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(*self.rates[lane])
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        wait = bucket.take()
+        if wait:
+            self.rate_limited[lane] += 1
+            raise AdmissionRejected(429, f"Rate limit exceeded for {lane} requests", wait)
+
+    @asynccontextmanager
+    async def slot(self, pool: str):
+        """Hold a slot of a pool in the current lane"""
+        if not self.enabled:
+            yield
+            return
+
+        lane = _lane.get()
+        target = self.pools[pool]
+        await target.acquire(lane, _deadline.get())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            target.release(lane, time.monotonic() - started)
+
+    async def run_cpu(self, func: Callable, *args, **kwargs):
+        """Run CPU-bound work in the threadpool under a cpu slot"""
+        async with self.slot("cpu"):
+            return await run_in_threadpool(func, *args, **kwargs)
+
+    def snapshot(self) -> dict:
+        return {
+            "pools": {name: pool.snapshot() for name, pool in self.pools.items()},
+            "rate_limited": dict(self.rate_limited),
+            "tracked_clients": len(self._buckets)
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """Return the process-wide admission controller"""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            cpu_concurrency=settings.ADMISSION_CPU_CONCURRENCY,
+            llm_concurrency=settings.ADMISSION_LLM_CONCURRENCY,
+            bulk_share=settings.ADMISSION_BULK_SHARE,
+            rates={
+                INTERACTIVE: (settings.ADMISSION_INTERACTIVE_RATE, settings.ADMISSION_INTERACTIVE_BURST),
+                BULK: (settings.ADMISSION_BULK_RATE, settings.ADMISSION_BULK_BURST),
+            },
+            enabled=settings.ADMISSION_ENABLED
+        )
+    return _controller
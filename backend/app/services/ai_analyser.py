@@ -1,10 +1,19 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel, Field
-from typing import List
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Type
+import asyncio
 import json
+import logging
 from app.config import settings
+from ..models.document import ResumeDocument
+from .admission import get_admission
+from .model_router import ModelRouter, get_model_router
+from .circuit_breaker import CircuitOpen
+from .fallback_analysis import template_analysis
+from .prompt_budget import PromptBuilder, PromptPart
+from .store import content_hash
 
 class ResumeFeedback(BaseModel):
     """AI Feedback structure"""
@@ -25,27 +34,144 @@ class KeywordSuggestions(BaseModel):
     suggested_additions: List[str] = Field(description="Keywords to add to resume")
     reasoning: str = Field(description="Why these keywords matter")
 
+class CombinedAnalysis(BaseModel):
+    """All analysis parts from a single structured-output call"""
+    feedback: ResumeFeedback
+    section_improvements: List[SectionImprovement]
+    keyword_suggestions: KeywordSuggestions
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_MODES = ("combined", "sections")
+
+# Token caps of resume excerpts within a prompt's budget
+SUMMARY_TOKENS = 150
+SKILLS_TOKENS = 80
+SECTION_EXCERPT_TOKENS = 150
+
+def public_analysis(analysis: dict) -> dict:
+    """An analysis as served: without the input fingerprints stored alongside it for reuse"""
+    return {key: value for key, value in analysis.items() if key != "inputs"}
+
 class AIAnalyser:
     """
     AI-powered resume analysis using LangChain + Groq
     LLM only explains scores, never decides them (deterministic backend decides)
+    
+    Modes:
+    - combined: one JSON-mode call for every part, validated against
+      CombinedAnalysis; only parts that fail validation are re-asked separately
+    - sections: one call per part (feedback, each weak section, keywords)
+    
+    Each analysis records a fingerprint of every part's inputs ("inputs"),
+    stored with it but not served (public_analysis).
+    Given the analysis of a previous version of the resume, parts whose
+    inputs are unchanged are reused and only the others are asked for.
     """
     
-    def __init__(self):
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            api_key=settings.GROQ_API_KEY,
-            temperature=0.3  # Low temp for consistent output
-        )
+    def __init__(self, mode: Optional[str] = None, router: Optional[ModelRouter] = None):
+        self.mode = mode or settings.ANALYSIS_MODE
+        if self.mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {self.mode}")
+        self.router = router or get_model_router()
+        # Low temp for consistent output; critique goes to the large tier, suggestions to the small one
+        self.feedback_llm = self.router.model("feedback", temperature=0.3)
+        self.section_llm = self.router.model("section_improvement", temperature=0.3)
+        self.keywords_llm = self.router.model("keywords", temperature=0.3)
+        self.combined_llm = self.router.model("combined", temperature=0.3)
     
-    async def analyze_resume(self, resume_data: dict, ats_scores: dict) -> dict:
+    async def analyze_resume(self, resume_data: dict, ats_scores: dict, document: ResumeDocument = None, previous: Optional[dict] = None) -> dict:
         """
         Comprehensive resume analysis
         Combines ATS scores with AI insights
+        Pass the upload's ResumeDocument to reuse its section spans, and the
+        previous version's analysis to only re-ask for the parts that changed
+        If the LLM is unavailable or fails, returns a template analysis of
+        the scores marked "degraded" instead of raising
         """
+        if document is None:
+            document = ResumeDocument.from_resume(resume_data)
+        
+        inputs = self._part_inputs(resume_data, ats_scores, document)
+        reused = self._reusable_parts(previous, inputs) if previous else {}
+        expected_sections = list(inputs["section_improvements"])
+        if "feedback" in reused and "keyword_suggestions" in reused and len(reused["section_improvements"]) == len(expected_sections):
+            # Nothing the LLM sees has changed
+            return {
+                "feedback": reused["feedback"],
+                "section_improvements": [reused["section_improvements"][section] for section in expected_sections],
+                "keyword_suggestions": reused["keyword_suggestions"],
+                "inputs": inputs
+            }
+        
+        # Don't queue for an llm slot while the provider is known to be down
+        if self.router.breaker.is_open():
+            return template_analysis(ats_scores, "llm_unavailable")
+        
+        # One llm slot per analysis, in the caller's lane
+        async with get_admission().slot("llm"):
+            try:
+                analysis = await self._analyze(resume_data, ats_scores, document, reused)
+            except CircuitOpen:
+                return template_analysis(ats_scores, "llm_unavailable")
+            except Exception as e:
+                logger.warning("AI analysis failed, serving the template analysis: %s: %s", type(e).__name__, e)
+                return template_analysis(ats_scores, "llm_error")
+        
+        return {**analysis, "inputs": inputs}
+    
+    def _part_inputs(self, resume_data: dict, ats_scores: dict, document: ResumeDocument) -> dict:
+        """Fingerprints of what each part's prompt is built from"""
+        section_scores = ats_scores.get("section_scores", {})
+        resume = {field: resume_data.get(field) for field in ("name", "email", "summary", "skills")}
+        missing_keywords = ats_scores.get("jd_match", {}).get("missing_keywords", [])[:5]
+        return {
+            "feedback": content_hash([resume, ats_scores.get("ats_score", 0), section_scores]),
+            "section_improvements": {
+                str(w.get("section")).lower(): content_hash([
+                    w.get("score"),
+                    w.get("severity", "medium"),
+                    self._section_content(resume_data, w.get("section"), document)
+                ])
+                for w in ats_scores.get("weaknesses", [])[:3]
+            },
+            "keyword_suggestions": content_hash([resume["skills"], ats_scores.get("keyword_score", 0), missing_keywords])
+        }
+    
+    @staticmethod
+    def _reusable_parts(previous: dict, inputs: dict) -> dict:
+        """Parts of a previous analysis whose inputs match this one's"""
+        previous_inputs = previous.get("inputs") or {}
+        reused = {"section_improvements": {}}
+        for part in ("feedback", "keyword_suggestions"):
+            if previous.get(part) and previous_inputs.get(part) == inputs[part]:
+                reused[part] = previous[part]
+        
+        previous_sections = previous_inputs.get("section_improvements") or {}
+        for item in previous.get("section_improvements") or []:
+            section = str(item.get("section")).lower() if isinstance(item, dict) else None
+            if section in inputs["section_improvements"] and previous_sections.get(section) == inputs["section_improvements"][section]:
+                reused["section_improvements"].setdefault(section, item)
+        return reused
+    
+    async def _analyze(self, resume_data: dict, ats_scores: dict, document: ResumeDocument, reused: Optional[dict] = None) -> dict:
+        if reused and (len(reused) > 1 or reused["section_improvements"]):
+            # Ask only for the parts a previous version's analysis doesn't cover
+            weaknesses = ats_scores.get("weaknesses", [])[:3]
+            return await self._complete(
+                resume_data,
+                ats_scores,
+                document,
+                reused.get("feedback"),
+                [reused["section_improvements"].get(str(w.get("section")).lower()) for w in weaknesses],
+                reused.get("keyword_suggestions")
+            )
+        
+        if self.mode == "combined":
+            return await self._analyze_combined(resume_data, ats_scores, document)
         
         feedback = await self._get_feedback(resume_data, ats_scores)
-        section_improvements = await self._get_section_improvements(resume_data, ats_scores)
+        section_improvements = await self._get_section_improvements(resume_data, ats_scores, document)
         keyword_suggestions = await self._get_keyword_suggestions(resume_data, ats_scores)
         
         return {
@@ -95,27 +221,40 @@ Respond in JSON format:
         
         parser = JsonOutputParser(pydantic_object=ResumeFeedback)
         
-        chain = prompt | self.llm | parser
+        chain = prompt | self.feedback_llm | parser
         
-        result = await chain.ainvoke({
-            "name": resume_data.get("name", "N/A"),
-            "email": resume_data.get("email", "N/A"),
-            "summary": resume_data.get("summary", "N/A")[:500],
-            "skills": ", ".join(resume_data.get("skills", [])[:15]),
-            "ats_score": ats_scores.get("ats_score", 0),
-            "summary_score": ats_scores.get("section_scores", {}).get("summary", 0),
-            "skills_score": ats_scores.get("section_scores", {}).get("skills", 0),
-            "experience_score": ats_scores.get("section_scores", {}).get("experience", 0),
-            "education_score": ats_scores.get("section_scores", {}).get("education", 0),
-        })
+        section_scores = ats_scores.get("section_scores", {})
+        result = await chain.ainvoke(PromptBuilder(prompt, "feedback").fit(
+            fixed={
+                "ats_score": ats_scores.get("ats_score", 0),
+                "summary_score": section_scores.get("summary", 0),
+                "skills_score": section_scores.get("skills", 0),
+                "experience_score": section_scores.get("experience", 0),
+                "education_score": section_scores.get("education", 0),
+            },
+            parts=self._resume_parts(resume_data)
+        ))
         
         return result
     
-    async def _get_section_improvements(self, resume_data: dict, ats_scores: dict) -> List[dict]:
+    async def _get_section_improvements(self, resume_data: dict, ats_scores: dict, document: ResumeDocument) -> List[dict]:
         """
         Get section-wise improvement suggestions
         """
         
+        weaknesses = ats_scores.get("weaknesses", [])
+        improvements = []
+        
+        for weakness in weaknesses[:3]:  # Top 3 weaknesses
+            improvements.append(await self._get_section_improvement(resume_data, weakness, document))
+        
+        return improvements
+    
+    async def _get_section_improvement(self, resume_data: dict, weakness: dict, document: ResumeDocument) -> dict:
+        """
+        Improvement suggestions for one weak section
+        """
+        
         prompt = ChatPromptTemplate.from_template(
             """You are a resume optimization expert.
 
@@ -142,32 +281,46 @@ Respond in JSON format:
         )
         
         parser = JsonOutputParser(pydantic_object=SectionImprovement)
-        chain = prompt | self.llm | parser
-        
-        weaknesses = ats_scores.get("weaknesses", [])
-        improvements = []
+        chain = prompt | self.section_llm | parser
         
-        for weakness in weaknesses[:3]:  # Top 3 weaknesses
-            section = weakness.get("section")
-            score = weakness.get("score")
-            
-            content_map = {
-                "summary": resume_data.get("summary", "")[:300],
-                "skills": ", ".join(resume_data.get("skills", [])[:10]),
-                "experience": resume_data.get("raw_text", "")[:500],
-                "education": resume_data.get("raw_text", "")[:500]
-            }
-            
-            result = await chain.ainvoke({
-                "section": section,
-                "content": content_map.get(section, ""),
-                "score": score,
+        result = await chain.ainvoke(PromptBuilder(prompt, "section_improvement").fit(
+            fixed={
+                "section": weakness.get("section"),
+                "score": weakness.get("score"),
                 "weakness": weakness.get("severity", "medium")
-            })
-            
-            improvements.append(result)
+            },
+            parts=[PromptPart(
+                "content",
+                self._section_content(resume_data, weakness.get("section"), document),
+                max_tokens=SECTION_EXCERPT_TOKENS,
+                default=""
+            )]
+        ))
         
-        return improvements
+        return result
+    
+    def _section_content(self, resume_data: dict, section: str, document: ResumeDocument) -> str:
+        """
+        Text of a section as shown to the LLM (prompt budgets cut it to size)
+        Experience/education use their own section text when headings were found
+        """
+        if section == "summary":
+            return resume_data.get("summary", "")
+        if section == "skills":
+            return ", ".join(resume_data.get("skills", []))
+        if section in ("experience", "education"):
+            return document.section(section) or document.text
+        return ""
+    
+    @staticmethod
+    def _resume_parts(resume_data: dict) -> List[PromptPart]:
+        """Name, email, skills and summary, filled in that order of priority"""
+        return [
+            PromptPart("name", resume_data.get("name"), priority=0, max_tokens=24),
+            PromptPart("email", resume_data.get("email"), priority=0, max_tokens=24),
+            PromptPart("skills", resume_data.get("skills", []), priority=1, max_tokens=SKILLS_TOKENS),
+            PromptPart("summary", resume_data.get("summary"), priority=2, max_tokens=SUMMARY_TOKENS),
+        ]
     
     async def _get_keyword_suggestions(self, resume_data: dict, ats_scores: dict) -> dict:
         """
@@ -205,12 +358,182 @@ Respond in JSON format:
         )
         
         parser = JsonOutputParser(pydantic_object=KeywordSuggestions)
-        chain = prompt | self.llm | parser
+        chain = prompt | self.keywords_llm | parser
+        
+        result = await chain.ainvoke(PromptBuilder(prompt, "keywords").fit(
+            fixed={
+                "keyword_score": ats_scores.get("keyword_score", 0),
+                "missing_keywords": missing_keywords[:5] if missing_keywords else "None detected"
+            },
+            parts=[PromptPart("current_skills", current_skills, max_tokens=SKILLS_TOKENS, default="None listed")]
+        ))
+        
+        return result
+    
+    async def _analyze_combined(self, resume_data: dict, ats_scores: dict, document: ResumeDocument) -> dict:
+        """
+        All analysis parts in one structured call
+        The resume context is sent once instead of once per part; parts that
+        come back missing or invalid are re-asked with their own prompt
+        """
+        
+        prompt = ChatPromptTemplate.from_template(
+            """You are an expert ATS consultant and resume optimization expert.
+
+Resume Data:
+Name: {name}
+Email: {email}
+Summary: {summary}
+Skills: {skills}
+
+ATS Scores (Already Calculated by Deterministic System):
+- Overall ATS Score: {ats_score}/100
+- Summary Score: {summary_score}/100
+- Skills Score: {skills_score}/100
+- Experience Score: {experience_score}/100
+- Education Score: {education_score}/100
+- Keyword Score: {keyword_score}/100
+
+Weak Sections To Improve:
+{weak_sections}
+
+Missing JD Keywords: {missing_keywords}
+
+Your task:
+1. FEEDBACK: a 2-3 sentence critique, 3-4 strengths, 3-4 weaknesses preventing a higher ATS score, and the reasoning behind {ats_score}/100 (explain it, do NOT change it)
+2. SECTION IMPROVEMENTS: for each weak section listed above, a brief assessment and 3-4 specific, actionable improvements (do not rewrite the section)
+3. KEYWORD SUGGESTIONS: 5-7 additional keywords/skills that improve ATS matching, are relevant to the tech industry and natural to include, and why they matter
+
+Respond with a single JSON object:
+{{
+    "feedback": {{
+        "overall_critique": "...",
+        "strengths": ["...", "...", "..."],
+        "weaknesses": ["...", "...", "..."],
+        "score_reasoning": "..."
+    }},
+    "section_improvements": [
+        {{
+            "section": "<section name>",
+            "current_quality": "Brief assessment of current state",
+            "suggestions": ["...", "...", "..."]
+        }}
+    ],
+    "keyword_suggestions": {{
+        "missing_keywords": {missing_keywords},
+        "suggested_additions": ["...", "..."],
+        "reasoning": "..."
+    }}
+}}"""
+        )
+        
+        # JSON mode: the API guarantees a syntactically valid object
+        chain = prompt | self.combined_llm.bind(response_format={"type": "json_object"}) | JsonOutputParser(pydantic_object=CombinedAnalysis)
         
-        result = await chain.ainvoke({
-            "current_skills": ", ".join(current_skills[:15]),
-            "keyword_score": ats_scores.get("keyword_score", 0),
-            "missing_keywords": missing_keywords[:5] if missing_keywords else "None detected"
-        })
+        weaknesses = ats_scores.get("weaknesses", [])[:3]
+        missing_keywords = ats_scores.get("jd_match", {}).get("missing_keywords", [])
+        section_scores = ats_scores.get("section_scores", {})
+        
+        try:
+            data = await chain.ainvoke(PromptBuilder(prompt, "combined").fit(
+                fixed={
+                    "ats_score": ats_scores.get("ats_score", 0),
+                    "summary_score": section_scores.get("summary", 0),
+                    "skills_score": section_scores.get("skills", 0),
+                    "experience_score": section_scores.get("experience", 0),
+                    "education_score": section_scores.get("education", 0),
+                    "keyword_score": ats_scores.get("keyword_score", 0),
+                    "missing_keywords": missing_keywords[:5] if missing_keywords else "None detected"
+                },
+                parts=self._resume_parts(resume_data) + [PromptPart(
+                    "weak_sections",
+                    [
+                        f"- {w.get('section')} (score {w.get('score')}/100, severity {w.get('severity', 'medium')}): "
+                        f"{self._section_content(resume_data, w.get('section'), document)}"
+                        for w in weaknesses
+                    ],
+                    priority=3,
+                    default="None",
+                    separator="\n",
+                    item_max_tokens=SECTION_EXCERPT_TOKENS
+                )]
+            ))
+        except OutputParserException as e:
+            logger.warning("Combined analysis was not valid JSON, falling back to per-section calls: %s", e)
+            data = {}
+        
+        if not isinstance(data, dict):
+            data = {}
         
-        return result
\ No newline at end of file
+        expected_sections = [str(w.get("section")).lower() for w in weaknesses]
+        try:
+            combined = CombinedAnalysis.model_validate(data)
+            if [item.section.lower() for item in combined.section_improvements] == expected_sections:
+                return combined.model_dump()
+        except ValidationError:
+            pass
+        
+        # Keep the valid parts, re-ask only for the rest
+        returned = data.get("section_improvements")
+        returned = returned if isinstance(returned, list) else []
+        by_section = {}
+        for item in returned:
+            improvement = self._validated(SectionImprovement, item)
+            if improvement is not None:
+                by_section.setdefault(improvement["section"].lower(), improvement)
+        
+        return await self._complete(
+            resume_data,
+            ats_scores,
+            document,
+            self._validated(ResumeFeedback, data.get("feedback")),
+            [by_section.get(section) for section in expected_sections],
+            self._validated(KeywordSuggestions, data.get("keyword_suggestions"))
+        )
+    
+    async def _complete(
+        self,
+        resume_data: dict,
+        ats_scores: dict,
+        document: ResumeDocument,
+        feedback: Optional[dict],
+        section_improvements: List[Optional[dict]],
+        keyword_suggestions: Optional[dict]
+    ) -> dict:
+        """
+        Fill in the missing (None) parts of an analysis with their own prompts
+        section_improvements holds one entry per top weakness, in order
+        """
+        weaknesses = ats_scores.get("weaknesses", [])[:3]
+        section_improvements = list(section_improvements)
+        pending = {}
+        
+        if feedback is None:
+            pending["feedback"] = self._get_feedback(resume_data, ats_scores)
+        if keyword_suggestions is None:
+            pending["keyword_suggestions"] = self._get_keyword_suggestions(resume_data, ats_scores)
+        for i, improvement in enumerate(section_improvements):
+            if improvement is None:
+                pending[i] = self._get_section_improvement(resume_data, weaknesses[i], document)
+        
+        if pending:
+            logger.info("Analysis incomplete, asking for %s", list(pending))
+        results = dict(zip(pending, await asyncio.gather(*pending.values())))
+        
+        for key, value in results.items():
+            if isinstance(key, int):
+                section_improvements[key] = value
+        
+        return {
+            "feedback": results.get("feedback", feedback),
+            "section_improvements": section_improvements,
+            "keyword_suggestions": results.get("keyword_suggestions", keyword_suggestions)
+        }
+    
+    @staticmethod
+    def _validated(model: Type[BaseModel], value) -> Optional[dict]:
+        """value as a plain dict if it matches the schema, else None"""
+        try:
+            return model.model_validate(value).model_dump()
+        except ValidationError:
+            return None
@@ -1,6 +1,14 @@
 from typing import Dict, List
 import re
 from collections import Counter
+from ..models.document import ResumeDocument
+from ..utils.text import tokenize
+from .scoring_profiles import CompiledProfile, get_profile_registry
+from .skill_taxonomy import get_skill_taxonomy
+
+METRICS_PATTERN = re.compile(r"(\d+%|increased|decreased|improved|grew|\$\d+)")
+DURATION_PATTERN = re.compile(r"(\d+\s+(?:years?|months?))")
+YEAR_PATTERN = re.compile(r"(20\d{2}|19\d{2})")
 
 class ATSScorer:
     """
@@ -12,23 +20,21 @@ class ATSScorer:
     - Keyword Matching: 35 pts
     - Experience Quality: 25 pts
     - Formatting & Safety: 10 pts
-    """
     
-    # Common ATS keywords by category
-    TECHNICAL_KEYWORDS = {
-        "programming": ["python", "java", "javascript", "c++", "c#", "golang", "rust", "typescript"],
-        "frontend": ["react", "vue", "angular", "html", "css", "webpack", "next.js"],
-        "backend": ["django", "fastapi", "nodejs", "express", "spring", "flask"],
-        "database": ["sql", "mysql", "postgresql", "mongodb", "redis", "elasticsearch"],
-        "cloud": ["aws", "azure", "gcp", "docker", "kubernetes", "terraform"],
-        "tools": ["git", "jenkins", "gitlab", "github", "docker", "terraform"]
-    }
+    Keyword lists, weights and thresholds come from a scoring profile
+    (see app/scoring_profiles), the weights above are the default profile's
+    """
     
-    def score_resume(self, resume_data: dict, jd_text: str = None) -> dict:
+    def score_resume(self, resume_data: dict, jd_text: str = None, profile: CompiledProfile = None, document: ResumeDocument = None) -> dict:
         """
         Main scoring method
+        Pass the upload's ResumeDocument to reuse its text views
         Returns: Complete ATS score breakdown
         """
+        if profile is None:
+            profile = get_profile_registry().get()
+        if document is None:
+            document = ResumeDocument.from_resume(resume_data)
         
         # Extract resume components
         name = resume_data.get("name", "")
@@ -36,41 +42,41 @@ class ATSScorer:
         phone = resume_data.get("phone", "")
         summary = resume_data.get("summary", "")
         skills = resume_data.get("skills", [])
-        raw_text = resume_data.get("raw_text", "")
         
         # Calculate section scores
         section_scores = {
-            "summary": self._score_summary(summary),
-            "skills": self._score_skills(skills),
-            "experience": self._score_experience(raw_text),
-            "education": self._score_education(raw_text),
+            "summary": self._score_summary(summary, profile),
+            "skills": self._score_skills(skills, profile),
+            "experience": self._score_experience(document, profile),
+            "education": self._score_education(document, profile),
             "contact": self._score_contact(name, email, phone)
         }
         
         # Calculate keyword match score
-        keyword_score = self._score_keywords(skills, raw_text)
+        keyword_score = self._score_keywords(skills, document, profile)
         
         # Calculate formatting score
-        formatting_score = self._score_formatting(raw_text)
+        formatting_score = self._score_formatting(document)
         
         # JD matching (if provided)
         jd_match = {}
         if jd_text:
-            jd_match = self._match_with_jd(skills, raw_text, jd_text)
+            jd_match = self._match_with_jd(skills, document, jd_text)
         
         # Calculate total score (weighted)
-        total_score = self._calculate_total_score(section_scores, keyword_score, formatting_score)
+        total_score = self._calculate_total_score(section_scores, keyword_score, formatting_score, profile)
         
         return {
             "ats_score": total_score,
+            "profile": profile.name,
             "section_scores": section_scores,
             "keyword_score": keyword_score,
             "formatting_score": formatting_score,
             "jd_match": jd_match,
-            "weaknesses": self._identify_weaknesses(section_scores, keyword_score)
+            "weaknesses": self._identify_weaknesses(section_scores, keyword_score, profile)
         }
     
-    def _score_summary(self, summary: str) -> int:
+    def _score_summary(self, summary: str, profile: CompiledProfile) -> int:
         """
         Score professional summary section
         Max: 30 pts (but normalized to 100 for section)
@@ -89,13 +95,12 @@ class ATSScorer:
             score += 5
         
         # Keywords (10 pts) - contains action verbs
-        action_verbs = ["led", "managed", "developed", "designed", "implemented", "achieved", "driven"]
-        if any(verb in summary.lower() for verb in action_verbs):
+        if profile.action_verbs.search(summary.lower()):
             score += 10
         
         return min(score, 100)
     
-    def _score_skills(self, skills: List[str]) -> int:
+    def _score_skills(self, skills: List[str], profile: CompiledProfile) -> int:
         """
         Score skills section
         Max: 100
@@ -115,14 +120,14 @@ class ATSScorer:
             score += 15
         
         # Diversity (30 pts) - mix of technical and soft skills
-        technical_count = sum(1 for skill in skills if self._is_technical_skill(skill))
+        technical_count = sum(1 for skill in skills if self._is_technical_skill(skill, profile))
         if 0.3 <= (technical_count / max(len(skills), 1)) <= 0.8:
             score += 30
         elif technical_count > 0:
             score += 15
         
         # Relevance (30 pts) - contains known tech keywords
-        relevant_skills = sum(1 for skill in skills if self._is_known_keyword(skill))
+        relevant_skills = sum(1 for skill in skills if self._is_known_keyword(skill, profile))
         relevance_pct = (relevant_skills / max(len(skills), 1)) * 100
         if relevance_pct >= 50:
             score += 30
@@ -131,59 +136,51 @@ class ATSScorer:
         
         return min(score, 100)
     
-    def _score_experience(self, text: str) -> int:
+    def _score_experience(self, document: ResumeDocument, profile: CompiledProfile) -> int:
         """
         Score experience section
         Max: 100
         """
         score = 0
+        text = document.text
+        text_lower = document.lower
         
         # Check for experience keywords
-        exp_keywords = ["experience", "worked", "employed", "project", "responsibility"]
-        has_experience = any(keyword in text.lower() for keyword in exp_keywords)
-        
-        if has_experience:
+        if profile.experience_keywords.search(text_lower):
             score += 30
         
         # Check for metrics/achievements
-        metrics_pattern = r"(\d+%|increased|decreased|improved|grew|\$\d+)"
-        if re.search(metrics_pattern, text):
+        if METRICS_PATTERN.search(text):
             score += 30
         
         # Check for duration indicators
-        duration_pattern = r"(\d+\s+(?:years?|months?))"
-        if re.search(duration_pattern, text):
+        if DURATION_PATTERN.search(text):
             score += 20
         
         # Check for job titles
-        job_titles = ["manager", "engineer", "developer", "analyst", "specialist", "lead", "architect"]
-        if any(title in text.lower() for title in job_titles):
+        if profile.job_titles.search(text_lower):
             score += 20
         
         return min(score, 100)
     
-    def _score_education(self, text: str) -> int:
+    def _score_education(self, document: ResumeDocument, profile: CompiledProfile) -> int:
         """
         Score education section
         Max: 100
         """
         score = 0
+        text_lower = document.lower
         
         # Check for education keywords
-        edu_keywords = ["degree", "bachelor", "master", "phd", "university", "college", "institute"]
-        has_education = any(keyword in text.lower() for keyword in edu_keywords)
-        
-        if has_education:
+        if profile.education_keywords.search(text_lower):
             score += 40
         
         # Check for major/field
-        field_keywords = ["computer science", "engineering", "information technology", "business", "mathematics"]
-        if any(field in text.lower() for field in field_keywords):
+        if profile.education_fields.search(text_lower):
             score += 30
         
         # Check for graduation year
-        year_pattern = r"(20\d{2}|19\d{2})"
-        if re.search(year_pattern, text):
+        if YEAR_PATTERN.search(document.text):
             score += 30
         
         return min(score, 100)
@@ -204,40 +201,34 @@ class ATSScorer:
         
         return min(score, 100)
     
-    def _score_keywords(self, skills: List[str], text: str) -> int:
+    def _score_keywords(self, skills: List[str], document: ResumeDocument, profile: CompiledProfile) -> int:
         """
         Score keyword presence (35 pts in total)
         Normalized to 100
         """
         score = 0
-        text_lower = text.lower()
+        text_lower = document.lower
         
         # Count known technical keywords
-        keyword_count = 0
-        for category, keywords in self.TECHNICAL_KEYWORDS.items():
-            keyword_count += sum(1 for keyword in keywords if keyword in text_lower)
+        keyword_count = profile.technical_keywords.count(text_lower)
         
         # Scoring based on keyword density
-        if keyword_count >= 15:
-            score += 40
-        elif keyword_count >= 10:
-            score += 30
-        elif keyword_count >= 5:
-            score += 20
-        elif keyword_count >= 2:
-            score += 10
+        for min_count, points in profile.keyword_density:
+            if keyword_count >= min_count:
+                score += points
+                break
         
         # Bonus for industry-specific keywords
-        if self._has_industry_keywords(text):
+        if self._has_industry_keywords(text_lower, profile):
             score += 20
         
         # Penalty for keyword stuffing
-        if keyword_count > 50:
+        if keyword_count > profile.keyword_stuffing:
             score -= 10
         
         return min(score, 100)
     
-    def _score_formatting(self, text: str) -> int:
+    def _score_formatting(self, document: ResumeDocument) -> int:
         """
         Score formatting & safety (10 pts in total)
         Normalized to 100
@@ -245,14 +236,14 @@ class ATSScorer:
         score = 50  # Base score
         
         # Check for reasonable length
-        word_count = len(text.split())
+        word_count = document.word_count
         if 300 <= word_count <= 1500:
             score += 25
         elif word_count > 100:
             score += 15
         
         # Check for special characters/corruption
-        special_char_ratio = sum(1 for c in text if not c.isalnum() and c not in " \n\t.,()-:") / max(len(text), 1)
+        special_char_ratio = document.count_chars_except(" \n\t.,()-:") / max(len(document.text), 1)
         if special_char_ratio < 0.05:
             score += 25
         elif special_char_ratio > 0.2:
@@ -260,77 +251,76 @@ class ATSScorer:
         
         return min(score, 100)
     
-    def _calculate_total_score(self, section_scores: dict, keyword_score: int, formatting_score: int) -> int:
+    def _calculate_total_score(self, section_scores: dict, keyword_score: int, formatting_score: int, profile: CompiledProfile) -> int:
         """
         Calculate weighted total ATS score (0-100)
         
-        Weights:
+        Weights (profile.weights, default profile):
         - Section Completeness: 30%
         - Keyword Matching: 35%
         - Experience Quality: 25%
         - Formatting: 10%
         """
-        # Average section scores (30 pts)
-        section_avg = sum(section_scores.values()) / len(section_scores) * 0.3
+        section_weight, keyword_weight, experience_weight, formatting_weight = profile.weights
+        
+        # Average section scores
+        section_avg = sum(section_scores.values()) / len(section_scores) * section_weight
         
-        # Keyword score (35 pts)
-        keyword_weighted = keyword_score * 0.35
+        # Keyword score
+        keyword_weighted = keyword_score * keyword_weight
         
-        # Experience score (25 pts)
-        experience_weighted = section_scores.get("experience", 0) * 0.25
+        # Experience score
+        experience_weighted = section_scores.get("experience", 0) * experience_weight
         
-        # Formatting score (10 pts)
-        formatting_weighted = formatting_score * 0.10
+        # Formatting score
+        formatting_weighted = formatting_score * formatting_weight
         
         total = section_avg + keyword_weighted + experience_weighted + formatting_weighted
         
         return int(min(total, 100))
     
-    def _identify_weaknesses(self, section_scores: dict, keyword_score: int) -> List[dict]:
+    def _identify_weaknesses(self, section_scores: dict, keyword_score: int, profile: CompiledProfile) -> List[dict]:
         """
         Identify weak sections for AI feedback
         """
         weaknesses = []
         
         for section, score in section_scores.items():
-            if score < 50:
+            if score < profile.weakness_high:
                 weaknesses.append({
                     "section": section,
                     "score": score,
-                    "severity": "critical" if score < 30 else "high"
+                    "severity": "critical" if score < profile.weakness_critical else "high"
                 })
-            elif score < 70:
+            elif score < profile.weakness_medium:
                 weaknesses.append({
                     "section": section,
                     "score": score,
                     "severity": "medium"
                 })
         
-        if keyword_score < 50:
+        if keyword_score < profile.weakness_high:
             weaknesses.append({
                 "section": "keywords",
                 "score": keyword_score,
-                "severity": "critical" if keyword_score < 30 else "high"
+                "severity": "critical" if keyword_score < profile.weakness_critical else "high"
             })
         
         return sorted(weaknesses, key=lambda x: x["score"])
     
-    def _match_with_jd(self, skills: List[str], text: str, jd_text: str) -> dict:
+    def _match_with_jd(self, skills: List[str], document: ResumeDocument, jd_text: str) -> dict:
         """
         Match resume with job description
         """
-        jd_lower = jd_text.lower()
-        resume_lower = text.lower()
+        resume_lower = document.lower
         
         # Extract JD keywords
         jd_keywords = self._extract_keywords(jd_text)
         
-        # Calculate match percentage
-        matching_keywords = sum(1 for keyword in jd_keywords if keyword in resume_lower)
-        match_percentage = (matching_keywords / max(len(jd_keywords), 1)) * 100
-        
-        # Identify missing keywords
+        # Calculate match percentage (one substring check per keyword)
         missing_keywords = [kw for kw in jd_keywords if kw not in resume_lower]
+        matching_keywords = len(jd_keywords) - len(missing_keywords)
+        match_percentage = (matching_keywords / max(len(jd_keywords), 1)) * 100
         
         return {
             "match_percentage": int(match_percentage),
@@ -339,25 +329,25 @@ class ATSScorer:
             "missing_keywords": missing_keywords[:10]  # Top 10 missing
         }
     
-    def _is_technical_skill(self, skill: str) -> bool:
-        """Check if skill is technical"""
-        technical_terms = ["python", "java", "sql", "aws", "docker", "react", "api", "git"]
-        return any(term in skill.lower() for term in technical_terms)
+    def _is_technical_skill(self, skill: str, profile: CompiledProfile) -> bool:
+        """Check if skill is technical (by taxonomy category, else by the profile's terms)"""
+        known = get_skill_taxonomy().resolve(skill)
+        if known is not None:
+            return known.technical
+        return profile.technical_terms.search(skill.lower())
     
-    def _is_known_keyword(self, skill: str) -> bool:
-        """Check if skill is a known industry keyword"""
-        for keywords in self.TECHNICAL_KEYWORDS.values():
-            if any(keyword in skill.lower() for keyword in keywords):
-                return True
-        return False
+    def _is_known_keyword(self, skill: str, profile: CompiledProfile) -> bool:
+        """Check if skill is one of the profile's technical keywords (same canonical skill)"""
+        known = get_skill_taxonomy().resolve(skill)
+        if known is not None:
+            return known.id in profile.technical_skill_ids
+        return profile.technical_keywords.search(skill.lower())
     
-    def _has_industry_keywords(self, text: str) -> bool:
+    def _has_industry_keywords(self, text_lower: str, profile: CompiledProfile) -> bool:
         """Check for industry-specific keywords"""
-        industry_keywords = ["agile", "scrum", "ci/cd", "devops", "microservices", "rest api", "sql", "nosql"]
-        return any(keyword in text.lower() for keyword in industry_keywords)
+        return profile.industry_keywords.search(text_lower)
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract important keywords from text"""
         # Simple keyword extraction (can be enhanced)
-        words = re.findall(r'\b[a-z+#]+\b', text.lower())
-        return list(set(words))
\ No newline at end of file
+        return list(set(tokenize(text)))
\ No newline at end of file
@@ -1,8 +1,15 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage, AIMessage
-from typing import List, Dict
-from app.config import settings
+from typing import AsyncIterator, List, Dict, Optional
+from .retrieval import get_retriever
+from .admission import get_admission
+from .model_router import ModelRouter, get_model_router
+from .prompt_budget import PromptBuilder, PromptPart
+from .token_usage import begin_session, get_token_ledger
+from uuid import uuid4
+import asyncio
+import hashlib
+import orjson
 
 class Message:
     """Message structure for conversation history"""
@@ -16,22 +23,69 @@ class ResumeContextChatbot:
     Only responds to resume-related queries.
     """
     
-    def __init__(self):
-        self.llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            api_key=settings.GROQ_API_KEY,
-            temperature=0.5  # Moderate temperature for natural conversation
-        )
+    NOT_RELEVANT_MESSAGE = "I can only answer questions about your resume. Please ask something related to your resume, skills, or ATS score."
+    
+    RESPONSE_PROMPT = ChatPromptTemplate.from_template(
+        """You are a helpful career advisor assistant that helps job seekers optimize their resumes.
+
+RESUME CONTEXT (User's Resume Information):
+{resume_context}
+
+RELEVANT RESUME SECTIONS:
+{resume_sections}
+
+CONVERSATION HISTORY:
+{history}
+
+IMPORTANT RULES:
+1. Only answer questions about the user's resume, skills, experience, or job search
+2. Be specific and reference actual content from their resume when possible
+3. Provide actionable advice
+4. Keep responses concise (2-3 sentences, max 150 words)
+5. If asked about something not in their resume, suggest adding it
+6. Never provide generic career advice unrelated to their resume
+7. Be encouraging but honest about areas for improvement
+
+User Question: {question}
+
+Provide a helpful, specific response:"""
+    )
+    
+    RELEVANCE_PROMPT = ChatPromptTemplate.from_template(
+        """Is the following question related to a resume, job search, ATS, skills, experience, or career?
+
+Question: "{question}"
+
+Answer with ONLY "yes" or "no" (lowercase, no explanation)."""
+    )
+    
+    # Rolling content hash of the history, see _add_message
+    EMPTY_HISTORY_VERSION = hashlib.blake2b(b"", digest_size=16).hexdigest()
+    
+    def __init__(self, router: Optional[ModelRouter] = None):
+        # Sessions share the router's clients (e.g. one chatbot per WebSocket connection)
+        self.router = router or get_model_router()
+        self.llm = self.router.model("chat", temperature=0.5)  # Moderate temperature for natural conversation
+        self.classifier = self.router.model("relevance", temperature=0.5)
+        # Token usage of this conversation is recorded under "chat:<session_id>"
+        self.session_id = uuid4().hex
         self.conversation_history: List[Dict] = []
+        self.history_version = self.EMPTY_HISTORY_VERSION
         self.resume_context = None
+        self.resume_id = None
         self.ats_scores = None
+        self._context_string = None
     
-    def set_resume_context(self, resume_data: dict, ats_scores: dict = None):
+    def set_resume_context(self, resume_data: dict, ats_scores: dict = None, resume_id: Optional[int] = None):
         """
         Set resume context for the chatbot
         This is called after resume upload and scoring
+        resume_id locates the stored section chunks used for retrieval
         """
+        if resume_data is not self.resume_context or ats_scores is not self.ats_scores:
+            self._context_string = None
         self.resume_context = resume_data
+        self.resume_id = resume_id
         self.ats_scores = ats_scores
     
     async def chat(self, user_message: str) -> Dict:
@@ -40,30 +94,29 @@ class ResumeContextChatbot:
         Returns: AI response with relevance check
         """
         
-        # Check if question is resume-related
-        is_relevant = await self._check_relevance(user_message)
+        # Fail fast instead of queueing for an llm slot while the provider is down
+        self.router.breaker.check()
+        begin_session(f"chat:{self.session_id}")
         
-        if not is_relevant:
-            return {
-                "status": "error",
-                "message": "I can only answer questions about your resume. Please ask something related to your resume, skills, or ATS score.",
-                "relevant": False
-            }
-        
-        # Add user message to history
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
-        
-        # Get AI response
-        ai_response = await self._generate_response(user_message)
+        async with get_admission().slot("llm"):
+            # Check if question is resume-related
+            is_relevant = await self._check_relevance(user_message)
+            
+            if not is_relevant:
+                return {
+                    "status": "error",
+                    "message": self.NOT_RELEVANT_MESSAGE,
+                    "relevant": False
+                }
+            
+            # Add user message to history
+            self._add_message("user", user_message)
+            
+            # Get AI response
+            ai_response = await self._generate_response(user_message)
         
         # Add AI response to history
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": ai_response
-        })
+        self._add_message("assistant", ai_response)
         
         return {
             "status": "success",
@@ -72,23 +125,53 @@ class ResumeContextChatbot:
             "conversation_length": len(self.conversation_history)
         }
     
+    async def stream_chat(self, user_message: str) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of chat()
+        Yields {"type": "token", "content": ...} events, then a final
+        {"type": "done", ...} (or {"type": "not_relevant", ...}) event.
+        History is only updated once the answer completes, so a cancelled
+        generation leaves no half-answer behind.
+        """
+        
+        self.router.breaker.check()
+        begin_session(f"chat:{self.session_id}")
+        
+        async with get_admission().slot("llm"):
+            if not await self._check_relevance(user_message):
+                yield {"type": "not_relevant", "message": self.NOT_RELEVANT_MESSAGE}
+                return
+            
+            chain = self.RESPONSE_PROMPT | self.llm
+            
+            parts = []
+            async for chunk in chain.astream(await self._response_inputs(user_message)):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+        
+        ai_response = "".join(parts).strip()
+        self._add_message("user", user_message)
+        self._add_message("assistant", ai_response)
+        
+        yield {
+            "type": "done",
+            "message": ai_response,
+            "conversation_length": len(self.conversation_history),
+            "usage": get_token_ledger().session(f"chat:{self.session_id}")
+        }
+    
     async def _check_relevance(self, user_message: str) -> bool:
         """
         Check if the question is resume-related
         Uses LLM for intelligent relevance detection
         """
         
-        relevance_prompt = ChatPromptTemplate.from_template(
-            """Is the following question related to a resume, job search, ATS, skills, experience, or career?
-
-Question: "{question}"
-
-Answer with ONLY "yes" or "no" (lowercase, no explanation)."""
-        )
+        chain = self.RELEVANCE_PROMPT | self.classifier
         
-        chain = relevance_prompt | self.llm
-        
-        result = await chain.ainvoke({"question": user_message})
+        result = await chain.ainvoke(PromptBuilder(self.RELEVANCE_PROMPT, "relevance").fit(
+            parts=[PromptPart("question", user_message, max_tokens=200)]
+        ))
         
         response_text = result.content.strip().lower()
         return "yes" in response_text
@@ -98,52 +181,59 @@ Answer with ONLY "yes" or "no" (lowercase, no explanation)."""
         Generate contextual response based on resume
         """
         
-        # Build context string from resume data
-        context = self._build_resume_context_string()
-        
-        # Build conversation history for context
-        history_str = self._build_conversation_history()
-        
-        response_prompt = ChatPromptTemplate.from_template(
-            """You are a helpful career advisor assistant that helps job seekers optimize their resumes.
-
-RESUME CONTEXT (User's Resume Information):
-{resume_context}
-
-CONVERSATION HISTORY:
-{history}
-
-IMPORTANT RULES:
-1. Only answer questions about the user's resume, skills, experience, or job search
-2. Be specific and reference actual content from their resume when possible
-3. Provide actionable advice
-4. Keep responses concise (2-3 sentences, max 150 words)
-5. If asked about something not in their resume, suggest adding it
-6. Never provide generic career advice unrelated to their resume
-7. Be encouraging but honest about areas for improvement
-
-User Question: {question}
-
-Provide a helpful, specific response:"""
-        )
-        
-        chain = response_prompt | self.llm
+        chain = self.RESPONSE_PROMPT | self.llm
         
-        result = await chain.ainvoke({
-            "resume_context": context,
-            "history": history_str,
-            "question": user_message
-        })
+        result = await chain.ainvoke(await self._response_inputs(user_message))
         
         return result.content.strip()
     
+    async def _response_inputs(self, user_message: str) -> Dict:
+        """
+        Prompt inputs for a response within the chat token budget, filled in
+        order: question, resume context, the resume sections relevant to the
+        question, then as much recent history as still fits
+        """
+        return PromptBuilder(self.RESPONSE_PROMPT, "chat").fit(parts=[
+            PromptPart("question", user_message, priority=0, max_tokens=300),
+            PromptPart("resume_context", self._build_resume_context_string(), priority=1, max_tokens=300),
+            PromptPart("resume_sections", await self._retrieve_sections(user_message), priority=2),
+            PromptPart(
+                "history",
+                self._build_conversation_history(),
+                priority=3,
+                default="No previous conversation",
+                separator="\n",
+                keep="last",
+                item_max_tokens=120
+            ),
+        ])
+    
+    async def _retrieve_sections(self, user_message: str) -> str:
+        """
+        Top-k resume chunks for the question, within the context token budget
+        """
+        if not self.resume_context:
+            return "No resume uploaded yet"
+        
+        # Embedding the question and reading chunks both block, keep them off the event loop
+        retriever = get_retriever()
+        chunks = await asyncio.to_thread(
+            retriever.retrieve, self.resume_id, user_message, self.resume_context.get("raw_text")
+        )
+        return retriever.format_chunks(chunks) if chunks else "No matching sections"
+    
     def _build_resume_context_string(self) -> str:
         """
         Build a formatted string of resume context
+        Section text (summary, experience, ...) comes from retrieval instead
         """
         if not self.resume_context:
             return "No resume uploaded yet"
         
+        # The context only changes with set_resume_context, so build it once
+        if self._context_string is not None:
+            return self._context_string
+        
         context = []
         
         # Basic info
@@ -151,16 +241,6 @@ Provide a helpful, specific response:"""
         context.append(f"Email: {self.resume_context.get('email', 'N/A')}")
         context.append(f"Phone: {self.resume_context.get('phone', 'N/A')}")
         
-        # Summary
-        summary = self.resume_context.get('summary', '')
-        if summary:
-            context.append(f"\nProfessional Summary:\n{summary[:300]}")
-        
-        # Skills
-        skills = self.resume_context.get('skills', [])
-        if skills:
-            context.append(f"\nSkills: {', '.join(skills[:20])}")
-        
         # ATS Scores (if available)
         if self.ats_scores:
             context.append(f"\nATS Score: {self.ats_scores.get('ats_score', 'N/A')}/100")
@@ -168,29 +248,41 @@ Provide a helpful, specific response:"""
             if section_scores:
                 context.append(f"Section Scores: Summary={section_scores.get('summary', 0)}, Skills={section_scores.get('skills', 0)}, Experience={section_scores.get('experience', 0)}, Education={section_scores.get('education', 0)}")
         
-        return "\n".join(context)
+        # Skills last: the prompt budget cuts the context from the end
+        skills = self.resume_context.get('skills', [])
+        if skills:
+            context.append(f"\nSkills: {', '.join(skills)}")
+        
+        self._context_string = "\n".join(context)
+        return self._context_string
     
-    def _build_conversation_history(self) -> str:
+    def _build_conversation_history(self) -> List[str]:
         """
-        Build conversation history for context
-        Keep last 3 exchanges to maintain context without token overflow
+        Recent messages for context, oldest first
+        At most the last 3 exchanges; the prompt budget may keep fewer
         """
-        if not self.conversation_history:
-            return "No previous conversation"
-        
         # Keep last 6 messages (3 exchanges)
         recent_history = self.conversation_history[-6:]
         
         history_str = []
         for msg in recent_history:
             role = "User" if msg["role"] == "user" else "Assistant"
-            history_str.append(f"{role}: {msg['content'][:200]}")
+            history_str.append(f"{role}: {msg['content']}")
         
-        return "\n".join(history_str)
+        return history_str
+    
+    def _add_message(self, role: str, content: str):
+        """Append to the history and roll its version (hash of the previous version + message)"""
+        message = {"role": role, "content": content}
+        self.conversation_history.append(message)
+        self.history_version = hashlib.blake2b(
+            self.history_version.encode("ascii") + orjson.dumps(message), digest_size=16
+        ).hexdigest()
     
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history = []
+        self.history_version = self.EMPTY_HISTORY_VERSION
     
     def get_history(self) -> List[Dict]:
         """Get full conversation history"""
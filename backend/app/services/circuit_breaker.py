@@ -0,0 +1,159 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """A call refused because its circuit is open (answered as 503 + Retry-After)"""
+
+    status_code = 503
+
+    def __init__(self, name: str, retry_after: float):
+        self.detail = f"{name} is unavailable, try again later"
+        super().__init__(self.detail)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker over a dependency's recent calls
+
+    closed:    calls go through; once the window holds min_calls outcomes and
+               the share of failed or slow (> slow_seconds) calls reaches
+               failure_rate, the circuit opens
+    open:      calls are refused at once for open_seconds
+    half_open: up to `probes` calls are let through; a good probe closes the
+               circuit, a failed or slow one opens it again
+
+    Timeouts can be counted as they happen (record_failure), before the call
+    that saw them has finished failing over. Thread-safe: sync callers
+    report from threadpool threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_seconds: float = 20.0,
+        open_seconds: float = 30.0,
+        probes: int = 1
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.state = CLOSED
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.opened = 0
+        self.rejected = 0
+        self._open_until = 0.0
+        self._probing = 0
+        self._lock = threading.RLock()
+
+    def _check_open(self, now: float):
+        if self.state == OPEN and now >= self._open_until:
+            self.state = HALF_OPEN
+            self._probing = 0
+
+    def is_open(self) -> bool:
+        """Whether a call now would be refused"""
+        with self._lock:
+            self._check_open(time.monotonic())
+            return self.state == OPEN or (self.state == HALF_OPEN and self._probing >= self.probes)
+
+    def retry_after(self) -> float:
+        return max(0.0, self._open_until - time.monotonic())
+
+    def check(self):
+        """Raise CircuitOpen if a call now would be refused (without admitting one)"""
+        with self._lock:
+            if self.is_open():
+                self.rejected += 1
+                # Half-open with all probes out: retry once they had time to answer
+                raise CircuitOpen(self.name, self.retry_after() if self.state == OPEN else 1)
+
+    def acquire(self) -> bool:
+        """
+        Admit a call or raise CircuitOpen
+        Returns whether the call is a half-open probe; pass that to release()
+        """
+        with self._lock:
+            self.check()
+            if self.state == HALF_OPEN:
+                self._probing += 1
+                return True
+            return False
+
+    def release(self, probe: bool, ok: Optional[bool], elapsed: float = 0.0):
+        """
+        Record an admitted call's outcome
+        ok=None for calls abandoned by the caller (e.g. cancelled), which say
+        nothing about the dependency
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                # Calls admitted before the circuit opened don't decide a probe
+                if not probe:
+                    return
+                self._probing = max(0, self._probing - 1)
+                if ok is None:
+                    return
+                if ok and elapsed <= self.slow_seconds:
+                    logger.info("Circuit %s closed after a successful probe", self.name)
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                else:
+                    self._open("probe failed")
+                return
+
+            if ok is None or self.state == OPEN:
+                return
+            self.outcomes.append(ok and elapsed <= self.slow_seconds)
+            self._trip_if_failing()
+
+    def record_failure(self):
+        """
+        Count a failure as soon as it happens (e.g. one timed-out attempt of a
+        call still failing over), apart from the call's release()
+        """
+        with self._lock:
+            if self.state != CLOSED:
+                return
+            self.outcomes.append(False)
+            self._trip_if_failing()
+
+    def _trip_if_failing(self):
+        if len(self.outcomes) >= self.min_calls and self.outcomes.count(False) / len(self.outcomes) >= self.failure_rate:
+            self._open(f"{self.outcomes.count(False)}/{len(self.outcomes)} recent calls failed or were slow")
+
+    def _open(self, reason: str):
+        logger.warning("Circuit %s opened for %ss: %s", self.name, self.open_seconds, reason)
+        self.state = OPEN
+        self.opened += 1
+        self._open_until = time.monotonic() + self.open_seconds
+        self.outcomes.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._check_open(time.monotonic())
+            return {
+                "state": self.state,
+                "retry_after": round(self.retry_after(), 1) if self.state == OPEN else 0,
+                "recent_failures": self.outcomes.count(False),
+                "recent_calls": len(self.outcomes),
+                "opened": self.opened,
+                "rejected": self.rejected
+            }
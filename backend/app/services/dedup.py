@@ -0,0 +1,169 @@
+from typing import Dict, List, Optional, Set
+
+import mmh3
+import numpy as np
+
+from app.config import settings
+from .store import ResumeStore, get_store
+from ..utils.text import tokenize, SEARCH_TOKEN_PATTERN
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles of resume text
+
+    Each shingle is hashed once with mmh3, then the num_perm permutations
+    are applied as a vectorised universal hash (a * h + b) mod p
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # a, b < 2^32 so a * h + b stays below 2^64 for 32-bit h
+        self._a = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str, tokens: Optional[List[str]] = None) -> Set[str]:
+        if tokens is None:
+            tokens = tokenize(text, SEARCH_TOKEN_PATTERN)
+        if len(tokens) < self.shingle_size:
+            return {" ".join(tokens)} if tokens else set()
+        return {
+            " ".join(tokens[i:i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str, tokens: Optional[List[str]] = None) -> np.ndarray:
+        """uint32[num_perm] signature (all max values for empty text)"""
+        shingles = self.shingles(text, tokens)
+        if not shingles:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+
+        hashes = np.fromiter((mmh3.hash(s, signed=False) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return float(np.count_nonzero(first == second)) / len(first)
+
+
+class DuplicateDetector:
+    """
+    Near-duplicate resume detection with MinHash LSH
+
+    Signatures are split into `bands` bands; each band is hashed to a 64-bit
+    key stored in the resume store. Resumes sharing any band key are candidates,
+    which are confirmed against the estimated Jaccard threshold. Inserts and
+    lookups cost one signature plus `bands` indexed probes, independent of the
+    corpus size.
+    """
+
+    def __init__(self, store: ResumeStore, num_perm: int = 128, bands: int = 16, shingle_size: int = 5, threshold: float = 0.8):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.store = store
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        return [
+            mmh3.hash64(signature[band * self.rows:(band + 1) * self.rows].tobytes(), seed=band)[0]
+            for band in range(self.bands)
+        ]
+
+    def _confirm(self, resume_id: int, signature: np.ndarray, candidates: List[int]) -> List[dict]:
+        others = self.store.get_signatures(c for c in candidates if c != resume_id)
+        duplicates = []
+        for other_id, blob in others.items():
+            similarity = MinHasher.similarity(signature, np.frombuffer(blob, dtype=np.uint32))
+            if similarity >= self.threshold:
+                duplicates.append({"resume_id": other_id, "similarity": round(similarity, 3)})
+        return sorted(duplicates, key=lambda d: (-d["similarity"], d["resume_id"]))
+
+    def add(self, resume_id: int, text: str, tokens: Optional[List[str]] = None) -> List[dict]:
+        """
+        Index a resume and return already-stored near-duplicates of it
+        """
+        signature = self.hasher.signature(text, tokens)
+        band_keys = self._band_keys(signature)
+        duplicates = self._confirm(resume_id, signature, self.store.find_band_matches(band_keys))
+        self.store.save_signature(resume_id, signature.tobytes(), band_keys)
+        return duplicates
+
+    def find_duplicates(self, resume_id: int) -> Optional[List[dict]]:
+        """Near-duplicates of an indexed resume (None if it has no signature)"""
+        blob = self.store.get_signatures([resume_id]).get(resume_id)
+        if blob is None:
+            return None
+        signature = np.frombuffer(blob, dtype=np.uint32)
+        return self._confirm(resume_id, signature, self.store.find_band_matches(self._band_keys(signature)))
+
+    def backfill(self) -> int:
+        """Sign stored resumes that predate duplicate detection"""
+        count = 0
+        for resume_id in self.store.unsigned_resume_ids():
+            resume = self.store.get_resume(resume_id)
+            if resume is not None:
+                signature = self.hasher.signature(resume.get("raw_text", ""))
+                self.store.save_signature(resume_id, signature.tobytes(), self._band_keys(signature))
+                count += 1
+        return count
+
+    def cluster_all(self) -> List[List[int]]:
+        """
+        Group the whole store into near-duplicate clusters
+        Only LSH bucket collisions are compared, never all pairs
+        """
+        parent: Dict[int, int] = {}
+
+        def find(x: int) -> int:
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        checked = set()
+        for group in self.store.iter_band_collisions():
+            signatures = {
+                resume_id: np.frombuffer(blob, dtype=np.uint32)
+                for resume_id, blob in self.store.get_signatures(group).items()
+            }
+            ids = sorted(signatures)
+            for i, first in enumerate(ids):
+                for second in ids[i + 1:]:
+                    if (first, second) in checked or find(first) == find(second):
+                        continue
+                    checked.add((first, second))
+                    if MinHasher.similarity(signatures[first], signatures[second]) >= self.threshold:
+                        parent[find(second)] = find(first)
+
+        clusters: Dict[int, List[int]] = {}
+        for resume_id in parent:
+            clusters.setdefault(find(resume_id), []).append(resume_id)
+        return sorted((sorted(c) for c in clusters.values() if len(c) > 1), key=lambda c: c[0])
+
+
+_detector: Optional[DuplicateDetector] = None
+
+
+def get_duplicate_detector() -> DuplicateDetector:
+    """Return the process-wide duplicate detector"""
+    global _detector
+    if _detector is None:
+        _detector = DuplicateDetector(
+            get_store(),
+            num_perm=settings.DEDUP_NUM_PERM,
+            bands=settings.DEDUP_BANDS,
+            shingle_size=settings.DEDUP_SHINGLE_SIZE,
+            threshold=settings.DEDUP_THRESHOLD
+        )
+    return _detector
@@ -0,0 +1,131 @@
+import csv
+import io
+from typing import AsyncIterator, List, Optional, Tuple
+
+import orjson
+import zstandard
+
+from .admission import BULK, begin, get_admission
+from .ai_analyser import public_analysis
+from .store import ResumeStore
+
+# Export format -> media type
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+SCORED_SECTIONS = ("summary", "skills", "experience", "education", "contact")
+
+CSV_COLUMNS = [
+    "resume_id", "name", "email", "phone", "filename", "created_at", "skills",
+    "ats_score", "profile", *(f"{section}_score" for section in SCORED_SECTIONS),
+    "keyword_score", "formatting_score", "jd_match_percentage", "weak_sections",
+]
+
+
+class ResultExporter:
+    """
+    Streams stored resumes with their latest scores (and analyses) as NDJSON or CSV
+
+    Rows are read in pages of batch_size by resume id (keyset), and each page
+    is fetched, encoded and (optionally) zstd-compressed in the threadpool
+    under a bulk cpu slot, then sent as one chunk. Memory stays at one page
+    however large the export, and interactive requests go first between pages.
+    Rows come in resume id order: an interrupted export resumes with
+    cursor = the last resume_id received.
+    """
+
+    def __init__(self, store: ResumeStore, fmt: str, include_analysis: bool = False, compression: Optional[str] = None, batch_size: int = 500, zstd_level: int = 3):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        self.store = store
+        self.fmt = fmt
+        self.include_analysis = include_analysis
+        self.batch_size = batch_size
+        # One stream per export, each page flushed as complete zstd blocks
+        self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj() if compression == "zstd" else None
+
+    @property
+    def media_type(self) -> str:
+        return "application/zstd" if self._compressor is not None else EXPORT_FORMATS[self.fmt]
+
+    @property
+    def filename(self) -> str:
+        return f"resumes.{self.fmt}" + (".zst" if self._compressor is not None else "")
+
+    @property
+    def columns(self) -> List[str]:
+        return CSV_COLUMNS + (["analysis"] if self.include_analysis else [])
+
+    def _record(self, row: dict) -> dict:
+        record = {
+            "resume_id": row["id"],
+            "filename": row["filename"],
+            "created_at": row["created_at"],
+            "resume": row["resume"],
+            "scores": row["scores"]
+        }
+        if self.include_analysis:
+            record["analysis"] = public_analysis(row["analysis"]) if row["analysis"] else None
+        return record
+
+    def _csv_row(self, row: dict) -> list:
+        resume = row["resume"]
+        scores = row["scores"] or {}
+        section_scores = scores.get("section_scores", {})
+        jd_match = scores.get("jd_match") or {}
+        values = [
+            row["id"], resume.get("name"), resume.get("email"), resume.get("phone"), row["filename"], row["created_at"],
+            "; ".join(resume.get("skills", [])),
+            scores.get("ats_score"), scores.get("profile"), *(section_scores.get(section) for section in SCORED_SECTIONS),
+            scores.get("keyword_score"), scores.get("formatting_score"), jd_match.get("match_percentage"),
+            "; ".join(w.get("section", "") for w in scores.get("weaknesses", [])),
+        ]
+        if self.include_analysis:
+            values.append(orjson.dumps(public_analysis(row["analysis"])).decode("utf-8") if row["analysis"] else None)
+        return values
+
+    def _encode(self, rows: List[dict]) -> bytes:
+        if self.fmt == "ndjson":
+            return b"".join(orjson.dumps(self._record(row)) + b"\n" for row in rows)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(self._csv_row(row) for row in rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def _compress(self, body: bytes) -> bytes:
+        if self._compressor is None:
+            return body
+        return self._compressor.compress(body) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def _page(self, after_id: int, limit: int, filters: dict) -> Tuple[bytes, int, int]:
+        """(encoded chunk, rows, last resume id) of the page after after_id"""
+        rows = self.store.export_resumes(after_id, limit, include_analysis=self.include_analysis, **filters)
+        return self._compress(self._encode(rows)), len(rows), rows[-1]["id"] if rows else after_id
+
+    async def stream(self, after_id: int = 0, limit: Optional[int] = None, **filters) -> AsyncIterator[bytes]:
+        """
+        Encoded export of up to `limit` rows after resume id after_id
+        filters: min_ats_score, max_ats_score, skills, email (see ResumeStore.list_resumes)
+        """
+        # Exports can outlast any queue budget: wait for slots rather than be shed mid-stream
+        begin(BULK, None)
+
+        if self.fmt == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(self.columns)
+            yield self._compress(buffer.getvalue().encode("utf-8"))
+
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = self.batch_size if remaining is None else min(self.batch_size, remaining)
+            chunk, count, after_id = await get_admission().run_cpu(self._page, after_id, size, filters)
+            if chunk:
+                yield chunk
+            if count < size:
+                break
+            if remaining is not None:
+                remaining -= count
+
+        if self._compressor is not None:
+            yield self._compressor.flush()
@@ -0,0 +1,103 @@
+from typing import List
+
+# Generic, score-independent advice per scored section
+SECTION_ADVICE = {
+    "summary": [
+        "Write a 50-200 word professional summary at the top of the resume",
+        "Open with your role, years of experience and main area of expertise",
+        "Use strong action verbs (led, built, improved) and one measurable result",
+    ],
+    "skills": [
+        "List technical skills in a dedicated Skills section",
+        "Name tools and technologies the way job postings do (e.g. Kubernetes, PostgreSQL)",
+        "Group skills by category and drop outdated or generic ones",
+    ],
+    "experience": [
+        "Give each role a title, company and dates",
+        "Start bullet points with action verbs and quantify results (%, $, time saved)",
+        "Mention the technologies used in each role",
+    ],
+    "education": [
+        "Include degree, field of study, institution and graduation year",
+        "Add relevant certifications or coursework",
+    ],
+    "keywords": [
+        "Mirror the exact keywords of the job description where they truthfully apply",
+        "Mention key skills in both the Skills section and your experience bullet points",
+        "Avoid keyword stuffing; each keyword should appear in context",
+    ],
+}
+
+SEVERITY_QUALITY = {
+    "critical": "Missing or far below what ATS systems expect",
+    "high": "Present but weak",
+    "medium": "Adequate, with room for improvement",
+}
+
+
+def _score_band(score: int) -> str:
+    if score >= 80:
+        return "strong"
+    if score >= 60:
+        return "fair"
+    return "weak"
+
+
+def template_analysis(ats_scores: dict, reason: str) -> dict:
+    """
+    Analysis built only from the deterministic ATS scores (no LLM)
+    Same shape as AIAnalyser's result, marked degraded: served while the
+    LLM provider is unavailable
+    """
+    section_scores = ats_scores.get("section_scores", {})
+    weaknesses = ats_scores.get("weaknesses", [])
+    jd_match = ats_scores.get("jd_match") or {}
+    missing_keywords: List[str] = jd_match.get("missing_keywords", [])
+    ats_score = ats_scores.get("ats_score", 0)
+
+    ranked = sorted(section_scores.items(), key=lambda item: -item[1])
+    strengths = [f"{section.capitalize()} section scores {score}/100" for section, score in ranked if score >= 70]
+    weak_points = [
+        f"{w.get('section', '').capitalize()} scores {w.get('score')}/100 ({w.get('severity', 'medium')} priority)"
+        for w in weaknesses
+    ]
+
+    reasoning = (
+        f"The overall ATS score of {ats_score}/100 is a weighted total of the section scores "
+        f"({', '.join(f'{section} {score}' for section, score in ranked) or 'none'}), "
+        f"keyword coverage ({ats_scores.get('keyword_score', 0)}) and formatting ({ats_scores.get('formatting_score', 0)})."
+    )
+    if jd_match:
+        reasoning += f" It matches {jd_match.get('match_percentage', 0)}% of the job description's keywords."
+
+    critique = f"This resume is {_score_band(ats_score)} overall with an ATS score of {ats_score}/100."
+    if weaknesses:
+        critique += f" The biggest gains are in: {', '.join(w.get('section', '') for w in weaknesses[:3])}."
+
+    return {
+        "feedback": {
+            "overall_critique": critique,
+            "strengths": strengths or ["Resume was parsed successfully by the ATS"],
+            "weaknesses": weak_points or ["No section scores below the improvement threshold"],
+            "score_reasoning": reasoning
+        },
+        "section_improvements": [
+            {
+                "section": w.get("section"),
+                "current_quality": f"{SEVERITY_QUALITY.get(w.get('severity'), SEVERITY_QUALITY['medium'])} (score {w.get('score')}/100)",
+                "suggestions": list(SECTION_ADVICE.get(w.get("section"), SECTION_ADVICE["keywords"]))
+            }
+            for w in weaknesses[:3]
+        ],
+        "keyword_suggestions": {
+            "missing_keywords": missing_keywords[:5],
+            "suggested_additions": missing_keywords[:7],
+            "reasoning": (
+                "These job description keywords were not found in the resume; ATS systems rank resumes by keyword overlap"
+                if missing_keywords else
+                "Score against a job description to get keyword suggestions for it"
+            )
+        },
+        "degraded": True,
+        "degraded_reason": reason
+    }
@@ -0,0 +1,322 @@
+import heapq
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from .store import ResumeStore, get_store, jd_hash
+from ..utils.text import tokenize, SEARCH_TOKEN_PATTERN
+
+
+class TermVector:
+    """Sparse term-frequency vector: sorted term ids and sublinear tf (1 + log tf)"""
+
+    __slots__ = ("ids", "tf")
+
+    def __init__(self, ids: np.ndarray, tf: np.ndarray):
+        self.ids = ids
+        self.tf = tf
+
+
+class Corpus:
+    """Term vectors of one side of the match (resumes or JDs), by external id"""
+
+    def __init__(self):
+        self.vectors: Dict[object, TermVector] = {}
+        self._csr: Optional[Tuple[list, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def csr(self) -> Tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+        """(keys, indptr, term ids, tf) over all vectors, rebuilt only after a change"""
+        if self._csr is None:
+            keys = list(self.vectors)
+            vectors = [self.vectors[key] for key in keys]
+            lengths = np.fromiter((len(v.ids) for v in vectors), dtype=np.int64, count=len(vectors))
+            indptr = np.zeros(len(vectors) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=indptr[1:])
+            ids = np.concatenate([v.ids for v in vectors]) if vectors else np.zeros(0, dtype=np.int32)
+            tf = np.concatenate([v.tf for v in vectors]) if vectors else np.zeros(0, dtype=np.float32)
+            self._csr = (keys, indptr, ids, tf)
+        return self._csr
+
+    def put(self, key, vector: TermVector) -> Optional[TermVector]:
+        previous = self.vectors.pop(key, None)
+        self.vectors[key] = vector
+        self._csr = None
+        return previous
+
+    def pop(self, key) -> Optional[TermVector]:
+        self._csr = None
+        return self.vectors.pop(key, None)
+
+
+class TfidfMatcher:
+    """
+    Resume <-> job description matching on TF-IDF weights
+
+    Resumes and open JDs share one vocabulary; document frequencies cover
+    both and are updated as documents arrive or leave, so IDF is always
+    current without a refit. Matching N resumes against M JDs projects the
+    resumes (CSR arrays) onto the JDs' terms only and multiplies batches of
+    them with the dense M x terms JD block, so a full N x M run is a few
+    matrix products rather than N * M Python loops.
+
+    Other workers share the store, not this index: refresh() catches up with
+    resumes they saved (past a resume id watermark) and the JDs they opened
+    or closed before each match is served.
+
+    Per pair it reports:
+    - match_score: share of the JD's TF-IDF weight covered by the resume (0-100)
+    - similarity: cosine similarity of the two TF-IDF vectors
+    - missing_terms: the JD's highest-weighted terms absent from the resume
+    """
+
+    def __init__(self, batch_size: int = 512, missing_terms: int = 10):
+        self.batch_size = batch_size
+        self.missing_terms = missing_terms
+        self.terms: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        self.resumes = Corpus()
+        self.jds = Corpus()
+        self.jd_texts: Dict[str, str] = {}
+        self.watermark = 0
+        self._df = np.zeros(1024, dtype=np.int32)
+        self._lock = threading.RLock()
+
+    def _vector(self, tokens: Iterable[str]) -> TermVector:
+        counts = Counter(tokens)
+        ids = np.empty(len(counts), dtype=np.int32)
+        for i, term in enumerate(counts):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                term_id = self.term_ids[term] = len(self.terms)
+                self.terms.append(term)
+            ids[i] = term_id
+        tf = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+        order = np.argsort(ids)
+        if len(self.terms) > len(self._df):
+            self._df = np.concatenate([self._df, np.zeros(max(len(self.terms), len(self._df)), dtype=np.int32)])
+        return TermVector(ids[order], tf[order].astype(np.float32))
+
+    def _put(self, corpus: Corpus, key, tokens: Iterable[str]):
+        with self._lock:
+            vector = self._vector(tokens)
+            previous = corpus.put(key, vector)
+            if previous is not None:
+                self._df[previous.ids] -= 1
+            self._df[vector.ids] += 1
+
+    def _pop(self, corpus: Corpus, key) -> bool:
+        with self._lock:
+            previous = corpus.pop(key)
+            if previous is None:
+                return False
+            self._df[previous.ids] -= 1
+            return True
+
+    def add_resume(self, resume_id: int, tokens: Iterable[str]):
+        """Index (or re-index) a resume from its search tokens"""
+        self._put(self.resumes, resume_id, tokens)
+
+    def remove_resume(self, resume_id: int) -> bool:
+        return self._pop(self.resumes, resume_id)
+
+    def add_jd(self, jd_text: str) -> str:
+        """Open a job description for matching, returns its jd_id"""
+        jd_id = jd_hash(jd_text)
+        with self._lock:
+            self._put(self.jds, jd_id, tokenize(jd_text, SEARCH_TOKEN_PATTERN))
+            self.jd_texts[jd_id] = jd_text
+        return jd_id
+
+    def remove_jd(self, jd_id: str) -> bool:
+        with self._lock:
+            self.jd_texts.pop(jd_id, None)
+            return self._pop(self.jds, jd_id)
+
+    def idf(self) -> np.ndarray:
+        """Smoothed IDF per term id, ln((1 + n) / (1 + df)) + 1"""
+        documents = len(self.resumes) + len(self.jds)
+        df = self._df[:len(self.terms)]
+        return (np.log((1.0 + documents) / (1.0 + df)) + 1.0).astype(np.float32)
+
+    def _jd_block(self, jd_ids: List[str], idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(columns, weights): the JDs' term ids and a dense M x columns TF-IDF block"""
+        vectors = [self.jds.vectors[jd_id] for jd_id in jd_ids]
+        columns = np.unique(np.concatenate([v.ids for v in vectors])) if vectors else np.zeros(0, dtype=np.int32)
+        block = np.zeros((len(vectors), len(columns)), dtype=np.float32)
+        for row, vector in enumerate(vectors):
+            block[row, np.searchsorted(columns, vector.ids)] = vector.tf * idf[vector.ids]
+        return columns, block
+
+    def _batches(self, resume_ids: Optional[List[int]], jd_ids: List[str]):
+        """
+        Yield (resume ids, match_score, similarity) for batches of resumes
+        against all of jd_ids; scores are batch x M float32 arrays
+        """
+        idf = self.idf()
+        columns, block = self._jd_block(jd_ids, idf)
+        jd_weight = block.sum(axis=1)
+        jd_norm = np.sqrt((block * block).sum(axis=1))
+        coverage_block = (block / np.maximum(jd_weight, 1e-12)[:, None]).T
+        cosine_block = (block / np.maximum(jd_norm, 1e-12)[:, None]).T
+
+        keys, indptr, ids, tf = self.resumes.csr()
+        if resume_ids is not None:
+            wanted = set(resume_ids)
+            rows = np.array([i for i, key in enumerate(keys) if key in wanted], dtype=np.int64)
+        else:
+            rows = np.arange(len(keys), dtype=np.int64)
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            starts, ends = indptr[batch], indptr[batch + 1]
+            lengths = ends - starts
+            # Flat positions of the batch's nonzeros and the batch row of each
+            flat = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            row_of = np.repeat(np.arange(len(batch)), lengths)
+            weights = tf[flat] * idf[ids[flat]]
+            norms = np.sqrt(np.bincount(row_of, weights=weights * weights, minlength=len(batch))).astype(np.float32)
+
+            # Project onto the JDs' terms; other terms only count towards the norm
+            position = np.searchsorted(columns, ids[flat])
+            hit = position < len(columns)
+            hit[hit] = columns[position[hit]] == ids[flat][hit]
+            dense = np.zeros((len(batch), len(columns)), dtype=np.float32)
+            dense[row_of[hit], position[hit]] = weights[hit]
+
+            match_score = (dense > 0).astype(np.float32) @ coverage_block * 100
+            similarity = (dense @ cosine_block) / np.maximum(norms, 1e-12)[:, None]
+            yield [keys[i] for i in batch], match_score, similarity
+
+    def _missing(self, resume_id: int, jd_id: str, idf: np.ndarray) -> List[str]:
+        jd = self.jds.vectors[jd_id]
+        resume = self.resumes.vectors[resume_id]
+        order = np.argsort(-(jd.tf * idf[jd.ids]), kind="stable")
+        absent = ~np.isin(jd.ids[order], resume.ids, assume_unique=True)
+        return [self.terms[i] for i in jd.ids[order][absent][:self.missing_terms]]
+
+    def _pair(self, resume_id: int, jd_id: str, match_score: float, similarity: float, idf: np.ndarray) -> dict:
+        return {
+            "resume_id": resume_id,
+            "jd_id": jd_id,
+            "match_score": round(float(match_score), 2),
+            "similarity": round(float(similarity), 4),
+            "missing_terms": self._missing(resume_id, jd_id, idf)
+        }
+
+    def _jd_ids(self, jd_ids: Optional[List[str]]) -> List[str]:
+        if jd_ids is None:
+            return list(self.jds.vectors)
+        unknown = [jd_id for jd_id in jd_ids if jd_id not in self.jds.vectors]
+        if unknown:
+            raise KeyError(unknown[0])
+        return list(dict.fromkeys(jd_ids))
+
+    def matrix(self, resume_ids: Optional[List[int]] = None, jd_ids: Optional[List[str]] = None) -> dict:
+        """
+        Full match matrices of resumes x JDs (all indexed / all open by default)
+        Returns {"resume_ids", "jd_ids", "match_score", "similarity"} with N x M arrays
+        """
+        with self._lock:
+            jd_ids = self._jd_ids(jd_ids)
+            found, match_scores, similarities = [], [], []
+            for batch_ids, match_score, similarity in self._batches(resume_ids, jd_ids):
+                found.extend(batch_ids)
+                match_scores.append(match_score)
+                similarities.append(similarity)
+        empty = np.zeros((0, len(jd_ids)), dtype=np.float32)
+        return {
+            "resume_ids": found,
+            "jd_ids": jd_ids,
+            "match_score": np.concatenate(match_scores) if match_scores else empty,
+            "similarity": np.concatenate(similarities) if similarities else empty
+        }
+
+    def pairs(self, resume_ids: Optional[List[int]] = None, jd_ids: Optional[List[str]] = None) -> List[dict]:
+        """Every resume x JD pair with scores and missing terms (for small selections)"""
+        result = self.matrix(resume_ids, jd_ids)
+        with self._lock:
+            idf = self.idf()
+            return [
+                self._pair(resume_id, jd_id, result["match_score"][i, j], result["similarity"][i, j], idf)
+                for i, resume_id in enumerate(result["resume_ids"])
+                for j, jd_id in enumerate(result["jd_ids"])
+                if resume_id in self.resumes.vectors and jd_id in self.jds.vectors
+            ]
+
+    def top_matches(self, jd_ids: Optional[List[str]] = None, limit: int = 20) -> Dict[str, List[dict]]:
+        """
+        Best `limit` resumes per JD by match score (then similarity)
+        Streams batches through a running top-k, so memory stays at batch x M
+        """
+        with self._lock:
+            jd_ids = self._jd_ids(jd_ids)
+            heaps: List[list] = [[] for _ in jd_ids]
+            for batch_ids, match_score, similarity in self._batches(None, jd_ids):
+                # This batch's best rows per JD column, merged into the running heaps
+                if limit < len(batch_ids):
+                    best = np.argpartition(-match_score, limit - 1, axis=0)[:limit]
+                else:
+                    best = np.broadcast_to(np.arange(len(batch_ids))[:, None], match_score.shape)
+                for j, heap in enumerate(heaps):
+                    for i in best[:, j]:
+                        entry = (float(match_score[i, j]), float(similarity[i, j]), -batch_ids[i])
+                        if len(heap) < limit:
+                            heapq.heappush(heap, entry)
+                        elif entry > heap[0]:
+                            heapq.heapreplace(heap, entry)
+
+            idf = self.idf()
+            return {
+                jd_id: [
+                    self._pair(-negative_id, jd_id, match_score, similarity, idf)
+                    for match_score, similarity, negative_id in sorted(heap, reverse=True)
+                ]
+                for jd_id, heap in zip(jd_ids, heaps)
+            }
+
+    def refresh(self, store: ResumeStore) -> int:
+        """
+        Catch up with the store: index resumes saved past the watermark (by any
+        worker) and match exactly the open JDs. Returns the number of resumes added
+        The watermark only moves on store reads, never on add_resume, so a
+        lower id committed by another worker after a local upload isn't skipped.
+        """
+        with self._lock:
+            open_jds = dict(store.list_open_jds())
+            for jd_id in [jd_id for jd_id in self.jds.vectors if jd_id not in open_jds]:
+                self.remove_jd(jd_id)
+            for jd_id, jd_text in open_jds.items():
+                if jd_id not in self.jds.vectors:
+                    self.add_jd(jd_text)
+
+            count = 0
+            for resume_id, resume in store.iter_resumes(self.watermark):
+                if resume_id not in self.resumes.vectors:
+                    self.add_resume(resume_id, tokenize(resume.get("raw_text", ""), SEARCH_TOKEN_PATTERN))
+                    count += 1
+                self.watermark = resume_id
+            return count
+
+    def snapshot(self) -> dict:
+        return {"resumes": len(self.resumes), "open_jds": len(self.jds), "terms": len(self.terms)}
+
+
+_matcher: Optional[TfidfMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_jd_matcher() -> TfidfMatcher:
+    """Return the process-wide matcher, built from the store on first use (refresh() before matching)"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            matcher = TfidfMatcher(settings.MATCH_BATCH_SIZE, settings.MATCH_MISSING_TERMS)
+            matcher.refresh(get_store())
+            _matcher = matcher
+    return _matcher
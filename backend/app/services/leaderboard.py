@@ -0,0 +1,132 @@
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from .store import ResumeStore, get_store
+
+
+def combined_score(ats_score: int, match_percentage: int, jd_weight: float = 0.5) -> float:
+    """Ranking score of a candidate for a JD: weighted ATS score + JD match"""
+    return round((1 - jd_weight) * ats_score + jd_weight * match_percentage, 2)
+
+
+class JDLeaderboard:
+    """
+    Top-k candidates for one job description
+
+    A bounded min-heap of (combined score, -resume_id) keeps the k best
+    resumes; each new match is one O(log k) push or replace. If a member's
+    score drops, a better resume may already have been evicted, so the board
+    asks for a rebuild instead of guessing.
+    """
+
+    def __init__(self, capacity: int, jd_weight: float = 0.5):
+        self.capacity = capacity
+        self.jd_weight = jd_weight
+        self.watermark = 0  # last scores.id applied
+        self.stale = False
+        self._heap: List[Tuple[float, int]] = []
+        self._members: Dict[int, dict] = {}
+
+    def update(self, resume_id: int, ats_score: int, match_percentage: int):
+        score = combined_score(ats_score, match_percentage, self.jd_weight)
+        entry = {
+            "resume_id": resume_id,
+            "score": score,
+            "ats_score": ats_score,
+            "match_percentage": match_percentage
+        }
+
+        current = self._members.get(resume_id)
+        if current is not None:
+            if score < current["score"] and len(self._members) == self.capacity:
+                self.stale = True
+            self._members[resume_id] = entry
+            self._heap = [(m["score"], -rid) for rid, m in self._members.items()]
+            heapq.heapify(self._heap)
+            return
+
+        key = (score, -resume_id)
+        if len(self._heap) < self.capacity:
+            heapq.heappush(self._heap, key)
+        elif key > self._heap[0]:
+            _, evicted = heapq.heapreplace(self._heap, key)
+            del self._members[-evicted]
+        else:
+            return
+        self._members[resume_id] = entry
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def page(self, offset: int = 0, limit: int = 50) -> List[dict]:
+        """Ranked entries, best first (ties go to the older resume)"""
+        ranked = sorted(self._members.values(), key=lambda m: (-m["score"], m["resume_id"]))
+        return [
+            {"rank": offset + i + 1, **entry}
+            for i, entry in enumerate(ranked[offset:offset + limit])
+        ]
+
+
+class LeaderboardRegistry:
+    """
+    Per-JD leaderboards rebuilt from and kept in sync with the score store
+
+    The store's jd_matches table is the source of truth. A board is built
+    from it on first use, then only the matches saved since its watermark
+    (scores.id) are applied before each query, which also picks up resumes
+    scored by other workers. At most max_boards boards are kept (LRU).
+    """
+
+    def __init__(self, store: ResumeStore, capacity: int = 100, jd_weight: float = 0.5, max_boards: int = 256):
+        self.store = store
+        self.capacity = capacity
+        self.jd_weight = jd_weight
+        self.max_boards = max_boards
+        self._boards: "OrderedDict[str, JDLeaderboard]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rebuild(self, jd_id: str) -> JDLeaderboard:
+        board = JDLeaderboard(self.capacity, self.jd_weight)
+        # Watermark first: matches saved meanwhile are re-applied, which is idempotent
+        board.watermark = self.store.last_jd_score_id(jd_id)
+        for resume_id, ats_score, match_percentage in self.store.top_jd_matches(jd_id, self.jd_weight, self.capacity):
+            board.update(resume_id, ats_score, match_percentage)
+        return board
+
+    def get(self, jd_id: str) -> JDLeaderboard:
+        """Up-to-date leaderboard of a JD"""
+        with self._lock:
+            board = self._boards.get(jd_id)
+            if board is None:
+                board = self.rebuild(jd_id)
+            else:
+                for score_id, resume_id, ats_score, match_percentage in self.store.jd_matches_since(jd_id, board.watermark):
+                    board.update(resume_id, ats_score, match_percentage)
+                    board.watermark = score_id
+                if board.stale:
+                    board = self.rebuild(jd_id)
+
+            self._boards[jd_id] = board
+            self._boards.move_to_end(jd_id)
+            if len(self._boards) > self.max_boards:
+                self._boards.popitem(last=False)
+            return board
+
+
+_registry: Optional[LeaderboardRegistry] = None
+
+
+def get_leaderboards() -> LeaderboardRegistry:
+    """Return the process-wide leaderboard registry"""
+    global _registry
+    if _registry is None:
+        _registry = LeaderboardRegistry(
+            get_store(),
+            capacity=settings.LEADERBOARD_SIZE,
+            jd_weight=settings.LEADERBOARD_JD_WEIGHT,
+            max_boards=settings.LEADERBOARD_MAX_JDS
+        )
+    return _registry
@@ -0,0 +1,390 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from groq import APITimeoutError
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_groq import ChatGroq
+
+from app.config import settings
+from .admission import LatencyWindow
+from .circuit_breaker import CircuitBreaker
+from .token_usage import get_token_ledger, usage_counts
+
+logger = logging.getLogger(__name__)
+
+# An attempt that ran out of time (wait_for, or the Groq client's own timeout in sync calls)
+TIMEOUT_ERRORS = (asyncio.TimeoutError, APITimeoutError)
+
+# Task -> tier defaults; overridable with LLM_TASK_TIERS
+TASK_TIERS = {
+    "relevance": "small",          # yes/no classification
+    "keywords": "small",           # keyword suggestions
+    "chat": "large",
+    "feedback": "large",           # critique
+    "section_improvement": "large",
+    "combined": "large",
+}
+
+
+class ModelStats:
+    """
+    Recent latency and error rate of one model
+
+    A model that gets slower than its tier's SLO or errors too often is
+    demoted for a cooldown; once it expires its window is cleared and it is
+    tried again, so a recovered model wins its traffic back.
+    """
+
+    def __init__(self, window: int = 50, min_samples: int = 5):
+        self.min_samples = min_samples
+        self.latency = LatencyWindow(window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.failovers = 0
+        self.demoted_until: Optional[float] = None
+
+    def record(self, ok: bool, elapsed: float):
+        self.calls += 1
+        self.errors += not ok
+        self.outcomes.append(ok)
+        if ok:
+            self.latency.add(elapsed)
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    @property
+    def median_latency(self) -> float:
+        ordered = sorted(self.latency.samples)
+        return ordered[len(ordered) // 2] if ordered else 0.0
+
+    def healthy(self, slo: float, max_error_rate: float) -> bool:
+        if len(self.outcomes) < self.min_samples:
+            return True
+        return self.error_rate <= max_error_rate and self.median_latency <= slo
+
+    def available(self, now: float) -> bool:
+        if self.demoted_until is None:
+            return True
+        if now < self.demoted_until:
+            return False
+        # Cooldown over: judge the model on fresh samples only
+        self.demoted_until = None
+        self.outcomes.clear()
+        self.latency.samples.clear()
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "failovers": self.failovers,
+            "error_rate": round(self.error_rate, 3),
+            "latency": self.latency.percentiles(),
+            "demoted": self.demoted_until is not None and time.monotonic() < self.demoted_until
+        }
+
+
+class ModelRouter:
+    """
+    Maps LLM task types to model tiers and picks a model per call
+
+    Each tier is an ordered list of models, e.g. a small instant model for
+    classification and suggestions and the large model for critique. Calls
+    go to the first model of the tier that is not demoted; on an error, or
+    when a model takes longer than the tier's attempt_timeout, the next model
+    is tried. A whole call, failover included, gets at most `timeout` seconds.
+
+    All models share one provider, so every call also goes through a circuit
+    breaker: while the provider is failing or too slow, calls are refused
+    immediately (CircuitOpen) instead of waiting for it. A timed-out attempt
+    counts against the breaker at once, so a hung provider trips it within a
+    few attempts.
+    """
+
+    def __init__(
+        self,
+        tiers: Dict[str, List[str]],
+        task_tiers: Dict[str, str],
+        slo: Dict[str, float],
+        max_error_rate: float = 0.2,
+        cooldown: float = 30.0,
+        window: int = 50,
+        timeout: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        attempt_timeout: Optional[Dict[str, float]] = None
+    ):
+        self.tiers = tiers
+        self.task_tiers = {**TASK_TIERS, **task_tiers}
+        self.slo = slo
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.window = window
+        self.timeout = timeout
+        self.attempt_timeout = attempt_timeout or {}
+        self.breaker = breaker or CircuitBreaker("LLM provider")
+        self.callbacks: list = []  # extra callback handlers for every call (e.g. usage counters)
+        self._clients: Dict[Tuple[str, float], ChatGroq] = {}
+        self._stats: Dict[str, ModelStats] = {}
+
+    def model(self, task: str, temperature: float = 0.3) -> "RoutedChatModel":
+        """Chat model for a task, usable like ChatGroq in chains"""
+        tier = self.task_tiers.get(task)
+        if tier not in self.tiers:
+            raise ValueError(f"No model tier configured for task {task!r}")
+        return RoutedChatModel(self, task, tier, temperature)
+
+    def client(self, model: str, temperature: float) -> ChatGroq:
+        key = (model, temperature)
+        if key not in self._clients:
+            self._clients[key] = ChatGroq(
+                model=model,
+                api_key=settings.GROQ_API_KEY,
+                base_url=settings.GROQ_BASE_URL,
+                temperature=temperature,
+                # Failover is the retry: client retries would multiply each attempt's timeout
+                max_retries=0
+            )
+        return self._clients[key]
+
+    def stats(self, model: str) -> ModelStats:
+        if model not in self._stats:
+            self._stats[model] = ModelStats(self.window)
+        return self._stats[model]
+
+    def candidates(self, tier: str) -> List[str]:
+        """Models of a tier in call order: available ones first, in configured order"""
+        now = time.monotonic()
+        models = self.tiers[tier]
+        available = [m for m in models if self.stats(m).available(now)]
+        return available + [m for m in models if m not in available]
+
+    def record(self, tier: str, model: str, ok: bool, elapsed: float):
+        stats = self.stats(model)
+        stats.record(ok, elapsed)
+        if stats.demoted_until is None and not stats.healthy(self.slo.get(tier, float("inf")), self.max_error_rate):
+            stats.demoted_until = time.monotonic() + self.cooldown
+            logger.warning(
+                "Demoting model %s for %ss (median %.2fs, error rate %.0f%%)",
+                model, self.cooldown, stats.median_latency, stats.error_rate * 100
+            )
+
+    def snapshot(self) -> dict:
+        return {
+            "tiers": self.tiers,
+            "tasks": self.task_tiers,
+            "slo_seconds": self.slo,
+            "breaker": self.breaker.snapshot(),
+            "models": {model: stats.snapshot() for model, stats in self._stats.items()}
+        }
+
+
+class RoutedChatModel(Runnable):
+    """Runnable chat model that delegates each call to the router's pick for its tier"""
+
+    def __init__(self, router: ModelRouter, task: str, tier: str, temperature: float):
+        self.router = router
+        self.task = task
+        self.tier = tier
+        self.temperature = temperature
+
+    def _client(self, model: str) -> Runnable:
+        client = self.router.client(model, self.temperature)
+        if self.router.callbacks:
+            return client.with_config(callbacks=self.router.callbacks)
+        return client
+
+    def _deadline(self) -> Optional[float]:
+        return time.monotonic() + self.router.timeout if self.router.timeout is not None else None
+
+    def _timeout(self, deadline: Optional[float]) -> Optional[float]:
+        """This attempt's timeout: the tier's attempt timeout, within what is left of the call's"""
+        attempt = self.router.attempt_timeout.get(self.tier)
+        if deadline is None:
+            return attempt
+        remaining = max(0.0, deadline - time.monotonic())
+        return remaining if attempt is None else min(attempt, remaining)
+
+    def _failed(self, models: List[str], i: int, error: Exception, elapsed: float) -> bool:
+        """Record a failed attempt, returns whether to fail over to the next model"""
+        model = models[i]
+        self.router.record(self.tier, model, False, elapsed)
+        if i == len(models) - 1:
+            return False
+        if isinstance(error, TIMEOUT_ERRORS):
+            # The call's own outcome only reaches the breaker once failover is over
+            self.router.breaker.record_failure()
+        self.router.stats(model).failovers += 1
+        logger.warning("Model %s failed for %s (%s), failing over to %s", model, self.task, type(error).__name__, models[i + 1])
+        return True
+
+    def _record_usage(self, model: str, input: Any, message: Any, elapsed: float):
+        prompt = input.to_string() if hasattr(input, "to_string") else str(input)
+        output = getattr(message, "content", "") if message is not None else ""
+        input_tokens, output_tokens = usage_counts(message, prompt, output if isinstance(output, str) else str(output))
+        get_token_ledger().record(self.task, model, input_tokens, output_tokens, elapsed)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        """Blocking ainvoke: same routing, failover and breaker, attempt timeouts enforced by the client"""
+        breaker = self.router.breaker
+        probe = breaker.acquire()
+        started = time.monotonic()
+        try:
+            result = self._invoke(input, config, **kwargs)
+        except Exception:
+            breaker.release(probe, False, time.monotonic() - started)
+            raise
+        breaker.release(probe, True, time.monotonic() - started)
+        return result
+
+    def _invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        models = self.router.candidates(self.tier)
+        deadline = self._deadline()
+        for i, model in enumerate(models):
+            started = time.monotonic()
+            try:
+                # No wait_for in sync code: the Groq client enforces the timeout
+                result = self._client(model).invoke(input, config, **{"timeout": self._timeout(deadline), **kwargs})
+            except Exception as e:
+                if not self._failed(models, i, e, time.monotonic() - started):
+                    raise
+                continue
+            elapsed = time.monotonic() - started
+            self.router.record(self.tier, model, True, elapsed)
+            self._record_usage(model, input, result, elapsed)
+            return result
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        breaker = self.router.breaker
+        probe = breaker.acquire()
+        started = time.monotonic()
+        try:
+            result = await self._ainvoke(input, config, **kwargs)
+        except asyncio.CancelledError:
+            breaker.release(probe, None)
+            raise
+        except Exception:
+            breaker.release(probe, False, time.monotonic() - started)
+            raise
+        breaker.release(probe, True, time.monotonic() - started)
+        return result
+
+    async def _ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        models = self.router.candidates(self.tier)
+        deadline = self._deadline()
+        for i, model in enumerate(models):
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    self._client(model).ainvoke(input, config, **kwargs),
+                    self._timeout(deadline)
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self._failed(models, i, e, time.monotonic() - started):
+                    raise
+                continue
+            elapsed = time.monotonic() - started
+            self.router.record(self.tier, model, True, elapsed)
+            self._record_usage(model, input, result, elapsed)
+            return result
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        Streams from the first model that produces a first chunk within the tier's SLO
+        The breaker judges the call by its first chunk: once tokens flow the provider is up
+        """
+        breaker = self.router.breaker
+        probe = breaker.acquire()
+        started = time.monotonic()
+        released = False
+        try:
+            async for chunk in self._astream(input, config, **kwargs):
+                if not released:
+                    released = True
+                    breaker.release(probe, True, time.monotonic() - started)
+                yield chunk
+        except (GeneratorExit, asyncio.CancelledError):
+            if not released:
+                breaker.release(probe, None)
+            raise
+        except Exception:
+            if not released:
+                breaker.release(probe, False, time.monotonic() - started)
+            raise
+        if not released:
+            breaker.release(probe, True, time.monotonic() - started)
+
+    async def _astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        models = self.router.candidates(self.tier)
+        deadline = self._deadline()
+        for i, model in enumerate(models):
+            started = time.monotonic()
+            stream = self._client(model).astream(input, config, **kwargs)
+            try:
+                first = await asyncio.wait_for(anext(stream), self._timeout(deadline))
+            except StopAsyncIteration:
+                self.router.record(self.tier, model, True, time.monotonic() - started)
+                return
+            except asyncio.CancelledError:
+                await stream.aclose()
+                raise
+            except Exception as e:
+                await stream.aclose()
+                if not self._failed(models, i, e, time.monotonic() - started):
+                    raise
+                continue
+
+            # Committed to this model once tokens have been sent; latency is time to first chunk
+            first_chunk = time.monotonic() - started
+            # Chunks add up to the whole message (content and usage metadata)
+            message = first
+            try:
+                yield first
+                async for chunk in stream:
+                    message = message + chunk
+                    yield chunk
+            except (GeneratorExit, asyncio.CancelledError):
+                # The consumer went away, not the model's fault
+                await stream.aclose()
+                raise
+            except Exception:
+                self.router.record(self.tier, model, False, first_chunk)
+                raise
+            self.router.record(self.tier, model, True, first_chunk)
+            self._record_usage(model, input, message, time.monotonic() - started)
+            return
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Return the process-wide model router"""
+    global _router
+    if _router is None:
+        _router = ModelRouter(
+            tiers=settings.LLM_MODEL_TIERS,
+            task_tiers=settings.LLM_TASK_TIERS,
+            slo=settings.LLM_TIER_SLO_SECONDS,
+            max_error_rate=settings.LLM_MAX_ERROR_RATE,
+            cooldown=settings.LLM_DEMOTION_SECONDS,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            attempt_timeout=settings.LLM_ATTEMPT_TIMEOUT_SECONDS,
+            breaker=CircuitBreaker(
+                "LLM provider",
+                window=settings.LLM_BREAKER_WINDOW,
+                min_calls=settings.LLM_BREAKER_MIN_CALLS,
+                failure_rate=settings.LLM_BREAKER_FAILURE_RATE,
+                slow_seconds=settings.LLM_BREAKER_SLOW_SECONDS,
+                open_seconds=settings.LLM_BREAKER_OPEN_SECONDS,
+                probes=settings.LLM_BREAKER_PROBES
+            )
+        )
+    return _router
@@ -1,6 +1,9 @@
 from PyPDF2 import PdfReader
 from docx import Document
 from ..models.resume import ResumeData, Experience, Education
+from ..models.document import ResumeDocument
+from .skill_taxonomy import get_skill_taxonomy
+from typing import BinaryIO, Union
 import io
 import re
 
@@ -9,41 +12,57 @@ class ResumeParser:
     Parse PDF/DOCX resumes and extract structured data
     """
     
-    def parse(self, file_content: bytes, filename: str) -> dict:
+    def parse(self, file_content: Union[bytes, BinaryIO], filename: str) -> dict:
         """
         Main parsing method
+        Accepts raw bytes or a seekable binary file (read in place, not copied)
         """
+        return self.parse_document(file_content, filename).data
+    
+    def parse_document(self, file_content: Union[bytes, BinaryIO], filename: str) -> ResumeDocument:
+        """
+        Parse into a ResumeDocument: the structured fields (.data) plus the
+        cached text views later stages reuse
+        """
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            stream = io.BytesIO(file_content)
+        else:
+            stream = file_content
+            stream.seek(0)
+        
         if filename.endswith(".pdf"):
-            text = self._parse_pdf(file_content)
+            text = self._parse_pdf(stream)
         elif filename.endswith(".docx"):
-            text = self._parse_docx(file_content)
+            text = self._parse_docx(stream)
         else:
             raise ValueError("Unsupported file format. Only PDF and DOCX allowed")
         
         # Normalize and structure the text
-        resume_data = self._normalize_resume(text)
+        document = ResumeDocument(text)
+        document.data = self._normalize_resume(document).model_dump()
         
-        return resume_data.model_dump()
+        return document
     
-    def _parse_pdf(self, content: bytes) -> str:
+    def _parse_pdf(self, stream: BinaryIO) -> str:
         """Extract text from PDF"""
-        pdf = PdfReader(io.BytesIO(content))
+        pdf = PdfReader(stream)
         text = ""
         for page in pdf.pages:
             text += page.extract_text()
         return text
     
-    def _parse_docx(self, content: bytes) -> str:
+    def _parse_docx(self, stream: BinaryIO) -> str:
         """Extract text from DOCX"""
-        doc = Document(io.BytesIO(content))
+        doc = Document(stream)
         text = "\n".join([para.text for para in doc.paragraphs])
         return text
     
-    def _normalize_resume(self, text: str) -> ResumeData:
+    def _normalize_resume(self, document: ResumeDocument) -> ResumeData:
         """
         Normalize resume text into structured JSON
         """
-        lines = text.split("\n")
+        text = document.text
+        lines = document.lines
         
         # Extract email
         email_pattern = r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"
@@ -66,8 +85,8 @@ class ResumeParser:
         # Extract name (usually first line)
         name = lines[0].strip() if lines else None
         
-        # Extract skills, summary, experience, education
-        skills = self._extract_skills(text)
+        # Extract skills (as canonical taxonomy skills where recognised), summary, experience, education
+        skills, skill_ids = get_skill_taxonomy().normalize(self._extract_skills(text))
         summary = self._extract_summary(text)
         
         resume_data = ResumeData(
@@ -76,6 +95,7 @@ class ResumeParser:
             phone=phone,
             summary=summary,
             skills=skills,
+            skill_ids=skill_ids,
             raw_text=text
         )
         
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+from .ai_analyser import AIAnalyser
+from .ats_scorer import ATSScorer
+from .admission import BULK, begin, get_admission
+from .scoring_profiles import CompiledProfile, get_profile_registry
+from .store import ResumeStore, get_store, scores_hash
+from .token_usage import begin_session
+from .resume_versions import lineage as resume_lineage, previous_analysis
+from ..models.document import ResumeDocument
+
+logger = logging.getLogger(__name__)
+
+
+class PrecomputeScheduler:
+    """
+    Speculative scoring + AI analysis of freshly uploaded resumes
+
+    Uploads schedule a background job that scores the resume with the default
+    profile and runs the LLM analysis, so the follow-up requests find their
+    results ready. Results are keyed by resume version:
+
+    - scores by (resume_id, compiled profile), in a bounded in-memory cache
+    - analyses by (resume_id, hash of the scores), in the store, so any worker
+      can reuse them
+
+    A request arriving while the same analysis is in flight awaits that job
+    instead of starting another one. Re-uploading a resume (same email, or
+    same filename without one) cancels the jobs of the version it replaces.
+    """
+
+    def __init__(self, store: ResumeStore, scorer: ATSScorer, analyser: AIAnalyser, concurrency: int = 4, cache_size: int = 256):
+        self.store = store
+        self.scorer = scorer
+        self.analyser = analyser
+        self.cache_size = cache_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._scores: "OrderedDict[int, Tuple[CompiledProfile, dict]]" = OrderedDict()
+        self._inflight: Dict[Tuple[int, str], asyncio.Task] = {}
+        self._jobs: Dict[int, asyncio.Task] = {}
+        self._latest: Dict[str, int] = {}
+
+    def schedule(self, resume_id: int, resume_data: dict, filename: Optional[str] = None, document: Optional[ResumeDocument] = None):
+        """Start precomputing a new upload, cancelling the version it replaces"""
+        lineage = resume_lineage(resume_data, filename)
+        if lineage:
+            previous = self._latest.get(lineage)
+            if previous is not None and previous != resume_id:
+                self.cancel(previous)
+            self._latest[lineage] = resume_id
+
+        job = asyncio.create_task(self._run(resume_id, resume_data, document))
+        self._jobs[resume_id] = job
+        job.add_done_callback(lambda _: self._finished(resume_id, lineage))
+
+    def _finished(self, resume_id: int, lineage: Optional[str]):
+        self._jobs.pop(resume_id, None)
+        # Only versions with a running job can be superseded
+        if lineage and self._latest.get(lineage) == resume_id:
+            del self._latest[lineage]
+
+    def cancel(self, resume_id: int):
+        """Cancel the background job and in-flight analyses of a resume"""
+        job = self._jobs.pop(resume_id, None)
+        if job is not None:
+            job.cancel()
+        for key, task in list(self._inflight.items()):
+            if key[0] == resume_id:
+                task.cancel()
+
+    async def _run(self, resume_id: int, resume_data: dict, document: Optional[ResumeDocument]):
+        # Background work yields to interactive requests and is never shed
+        begin(BULK, None)
+        begin_session(f"resume:{resume_id}")
+        try:
+            async with self._semaphore:
+                profile = get_profile_registry().get()
+                scores = self.cached_scores(resume_id, profile)
+                if scores is None:
+                    scores = await get_admission().run_cpu(
+                        self.scorer.score_resume, resume_data, profile=profile, document=document
+                    )
+                    self._remember_scores(resume_id, profile, scores)
+                self.store.save_scores(resume_id, scores)
+                await self.analysis(resume_id, resume_data, scores, document)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The on-demand request recomputes (and reports) whatever failed here
+            logger.warning("Precompute for resume %s failed: %s", resume_id, e)
+
+    def cached_scores(self, resume_id: Optional[int], profile: CompiledProfile) -> Optional[dict]:
+        """Precomputed scores of a resume, if computed with this exact profile"""
+        entry = self._scores.get(resume_id)
+        if entry is None or entry[0] is not profile:
+            return None
+        self._scores.move_to_end(resume_id)
+        return entry[1]
+
+    def scores(self, resume_id: int, resume_data: dict, profile: Optional[CompiledProfile] = None, document: Optional[ResumeDocument] = None) -> dict:
+        """Score a resume, reusing the cached result for the same profile version"""
+        profile = profile or get_profile_registry().get()
+        scores = self.cached_scores(resume_id, profile)
+        if scores is None:
+            scores = self.scorer.score_resume(resume_data, profile=profile, document=document)
+            self._remember_scores(resume_id, profile, scores)
+        return scores
+
+    def _remember_scores(self, resume_id: int, profile: CompiledProfile, scores: dict):
+        self._scores[resume_id] = (profile, scores)
+        if len(self._scores) > self.cache_size:
+            self._scores.popitem(last=False)
+
+    async def analysis(self, resume_id: Optional[int], resume_data: dict, ats_scores: dict, document: Optional[ResumeDocument] = None) -> dict:
+        """
+        AI analysis for a resume and score snapshot
+        Served from the store, joined to an in-flight job, or computed
+        """
+        if resume_id is None:
+            return await self.analyser.analyze_resume(resume_data, ats_scores, document)
+
+        key = (resume_id, scores_hash(ats_scores))
+        stored = self.store.get_analysis(*key)
+        if stored is not None:
+            return stored
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._analyse(key, resume_data, ats_scores, document))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        try:
+            # Shielded: a client disconnecting must not cancel work others await
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling() or not task.cancelled():
+                raise
+            # The job was cancelled by a re-upload, but this request still wants its answer
+            return await self.analyser.analyze_resume(
+                resume_data, ats_scores, document, previous_analysis(self.store, resume_id)
+            )
+
+    async def _analyse(self, key: Tuple[int, str], resume_data: dict, ats_scores: dict, document: Optional[ResumeDocument]) -> dict:
+        # An edited version only re-asks for the parts its previous version's analysis doesn't cover
+        analysis = await self.analyser.analyze_resume(
+            resume_data, ats_scores, document, previous_analysis(self.store, key[0])
+        )
+        # A degraded (template) analysis is not kept, the next request retries the LLM
+        if not analysis.get("degraded"):
+            self.store.save_analysis(key[0], key[1], analysis)
+        return analysis
+
+
+_scheduler: Optional[PrecomputeScheduler] = None
+
+
+def get_precompute_scheduler() -> PrecomputeScheduler:
+    """Return the process-wide precompute scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = PrecomputeScheduler(
+            get_store(),
+            ATSScorer(),
+            AIAnalyser(),
+            concurrency=settings.PRECOMPUTE_CONCURRENCY,
+            cache_size=settings.PRECOMPUTE_CACHE_SIZE
+        )
+    return _scheduler
@@ -0,0 +1,164 @@
+import logging
+import re
+import threading
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+from langchain_core.prompts import ChatPromptTemplate
+from tokenizers import Tokenizer
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Where a cut may end: after a sentence, a line or a list item
+SENTENCE_END_PATTERN = re.compile(r"[.!?;](?=\s)|\n")
+CHARS_PER_TOKEN = 4
+# A list item cut shorter than this is dropped instead
+MIN_PARTIAL_TOKENS = 8
+
+
+class TokenCounter:
+    """
+    Local LLM token counts
+
+    Uses the served models' Hugging Face tokenizer (tokenizer.json) when one
+    can be loaded (exact), otherwise estimates ~4 characters per token, as
+    before this existed.
+    """
+
+    def __init__(self, tokenizer: Optional[Tokenizer] = None):
+        self.tokenizer = tokenizer
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            return len(text) // CHARS_PER_TOKEN + 1
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def _cut_position(self, text: str, max_tokens: int) -> int:
+        """Character offset where the first max_tokens tokens end"""
+        if self.tokenizer is None:
+            return max(0, (max_tokens - 1) * CHARS_PER_TOKEN)
+        offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+        return offsets[max_tokens - 1][1] if max_tokens > 0 else 0
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Longest prefix within max_tokens that ends at a sentence or line end
+        (at a word boundary if the first sentence alone is too long)
+        """
+        if self.count(text) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        prefix = text[:self._cut_position(text, max_tokens)]
+        ends = [match.end() for match in SENTENCE_END_PATTERN.finditer(prefix)]
+        if ends and ends[-1] >= len(prefix) // 3:
+            return prefix[:ends[-1]].rstrip()
+        space = prefix.rfind(" ")
+        return (prefix[:space] if space > 0 else prefix).rstrip()
+
+
+class PromptPart(NamedTuple):
+    """
+    A variable component of a prompt
+
+    value is a string, or a list of items that are kept whole (joined by
+    separator) with `keep` deciding which end survives ("first" for ranked
+    lists such as skills, "last" for chronological ones such as history).
+    Lower priority numbers are filled first; max_tokens caps the part.
+    """
+    name: str
+    value: Union[str, Sequence[str], None]
+    priority: int = 0
+    max_tokens: Optional[int] = None
+    default: str = "N/A"
+    separator: str = ", "
+    keep: str = "first"
+    item_max_tokens: Optional[int] = None
+
+
+class PromptBuilder:
+    """
+    Fits a prompt's inputs into its task's token budget
+
+    The template and the fixed inputs (scores, names of sections, ...) are
+    always sent; the remaining budget goes to the parts in priority order,
+    each cut at a sentence or item boundary rather than mid-word.
+    """
+
+    def __init__(self, prompt: ChatPromptTemplate, task: str, counter: Optional[TokenCounter] = None, budget: Optional[int] = None):
+        self.prompt = prompt
+        self.task = task
+        self.counter = counter or get_token_counter()
+        self.budget = budget if budget is not None else settings.LLM_PROMPT_BUDGETS.get(task, settings.LLM_DEFAULT_PROMPT_BUDGET)
+
+    def _fit_items(self, part: PromptPart, items: List[str], budget: int) -> str:
+        ordered = items if part.keep == "first" else list(reversed(items))
+        separator_cost = self.counter.count(part.separator)
+        kept, used = [], 0
+        for item in ordered:
+            if part.item_max_tokens is not None:
+                item = self.counter.truncate(item, part.item_max_tokens)
+            cost = self.counter.count(item) + (separator_cost if kept else 0)
+            if used + cost > budget:
+                # A long item may still fit in part
+                item = self.counter.truncate(item, budget - used - separator_cost)
+                if self.counter.count(item) >= MIN_PARTIAL_TOKENS:
+                    kept.append(item)
+                break
+            kept.append(item)
+            used += cost
+        if part.keep != "first":
+            kept.reverse()
+        return part.separator.join(kept)
+
+    def fit(self, fixed: Optional[Dict[str, object]] = None, parts: Sequence[PromptPart] = ()) -> Dict[str, object]:
+        """Prompt inputs: fixed values as given, parts cut to the budget left over"""
+        inputs: Dict[str, object] = dict(fixed or {})
+        base = self.prompt.format_prompt(**{**inputs, **{part.name: "" for part in parts}}).to_string()
+        remaining = self.budget - self.counter.count(base)
+
+        for part in sorted(parts, key=lambda p: p.priority):
+            allowance = max(0, remaining if part.max_tokens is None else min(remaining, part.max_tokens))
+            if isinstance(part.value, str) or part.value is None:
+                text = self.counter.truncate((part.value or "").strip(), allowance)
+            else:
+                text = self._fit_items(part, [str(item).strip() for item in part.value if str(item).strip()], allowance)
+            inputs[part.name] = text or part.default
+            remaining -= self.counter.count(text)
+        return inputs
+
+
+def load_token_counter() -> TokenCounter:
+    source = settings.LLM_TOKENIZER_PATH or settings.LLM_TOKENIZER
+    if not source:
+        return TokenCounter()
+    try:
+        if settings.LLM_TOKENIZER_PATH:
+            tokenizer = Tokenizer.from_file(source)
+        else:
+            tokenizer = Tokenizer.from_pretrained(source)
+    except Exception as e:
+        # Budgets then rest on a rough estimate: prompts may overflow or be cut needlessly
+        logger.error("Tokenizer %s unavailable, estimating token counts: %s", source, e)
+        tokenizer = None
+    return TokenCounter(tokenizer)
+
+
+_counter: Optional[TokenCounter] = None
+_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Return the process-wide token counter"""
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = load_token_counter()
+    return _counter
@@ -0,0 +1,113 @@
+import difflib
+import re
+from typing import Dict, List, Optional
+
+from ..models.document import ResumeDocument
+from .store import ResumeStore
+
+# Headings whose content the parsed fields (contact, summary, skills) already stand for
+FIELD_HEADING_PATTERN = re.compile(r"^(?:header|.*summary|about.*|objective|profile|.*skills)$")
+# Scored sections read from the text under their heading (see ATSScorer / AIAnalyser)
+TEXT_SECTIONS = ("experience", "education")
+
+
+def lineage(resume_data: dict, filename: Optional[str] = None) -> Optional[str]:
+    """Whose resume this is, to tell an edited version from another resume: email, else filename"""
+    return (resume_data.get("email") or "").lower() or filename
+
+
+def _normalize(text: str) -> List[str]:
+    """Non-empty lines with whitespace collapsed (re-extracted PDFs differ in spacing)"""
+    return [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+
+
+def section_texts(resume_data: dict, document: ResumeDocument) -> Dict[str, str]:
+    """
+    Text of each section of a resume version, by section name
+    contact, summary and skills are the parsed fields; experience, education
+    and any other headed section (projects, certifications, ...) the text
+    under their headings
+    """
+    texts = {
+        "contact": "\n".join(resume_data.get(field) or "" for field in ("name", "email", "phone")),
+        "summary": resume_data.get("summary") or "",
+        "skills": ", ".join(resume_data.get("skills", [])),
+    }
+    for heading, start, end in document.sections:
+        name = next((section for section in TEXT_SECTIONS if section in heading), heading)
+        if name == heading and FIELD_HEADING_PATTERN.match(heading):
+            continue
+        texts[name] = "\n".join(filter(None, (texts.get(name), document.text[start:end].strip())))
+    return {name: text for name, text in texts.items() if text.strip()}
+
+
+def diff_sections(previous: Dict[str, str], current: Dict[str, str]) -> dict:
+    """
+    Section-level diff of two versions' section_texts
+    Changed sections come with their added / removed line counts
+    """
+    changed, unchanged = {}, []
+    for name, text in current.items():
+        if name not in previous:
+            continue
+        old_lines, new_lines = _normalize(previous[name]), _normalize(text)
+        if old_lines == new_lines:
+            unchanged.append(name)
+            continue
+        added = removed = 0
+        for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes():
+            if op != "equal":
+                removed += i2 - i1
+                added += j2 - j1
+        changed[name] = {"lines_added": added, "lines_removed": removed}
+
+    return {
+        "changed": changed,
+        "added": [name for name in current if name not in previous],
+        "removed": [name for name in previous if name not in current],
+        "unchanged": unchanged
+    }
+
+
+def diff_versions(previous_data: dict, data: dict, document: Optional[ResumeDocument] = None) -> dict:
+    """diff_sections of two parsed resumes (pass the current upload's document to reuse its spans)"""
+    return diff_sections(
+        section_texts(previous_data, ResumeDocument.from_resume(previous_data)),
+        section_texts(data, document or ResumeDocument.from_resume(data))
+    )
+
+
+def score_delta(previous: Optional[dict], current: dict) -> Optional[dict]:
+    """
+    Change in scores since the previous version (None without comparable
+    previous scores, e.g. taken with another scoring profile)
+    """
+    if not previous or previous.get("profile") != current.get("profile"):
+        return None
+
+    previous_sections = previous.get("section_scores", {})
+    delta = {
+        "previous_ats_score": previous.get("ats_score", 0),
+        "ats_score": current.get("ats_score", 0) - previous.get("ats_score", 0),
+        "section_scores": {
+            section: score - previous_sections.get(section, 0)
+            for section, score in current.get("section_scores", {}).items()
+        },
+        "keyword_score": current.get("keyword_score", 0) - previous.get("keyword_score", 0),
+        "formatting_score": current.get("formatting_score", 0) - previous.get("formatting_score", 0)
+    }
+    if current.get("jd_match") and previous.get("jd_match"):
+        delta["match_percentage"] = current["jd_match"].get("match_percentage", 0) - previous["jd_match"].get("match_percentage", 0)
+    return delta
+
+
+def previous_scores(store: ResumeStore, resume_id: Optional[int]) -> Optional[dict]:
+    """Latest scores of the version a resume was edited from"""
+    parent_id = store.get_parent_id(resume_id) if resume_id is not None else None
+    return store.get_latest_scores(parent_id) if parent_id is not None else None
+
+
+def previous_analysis(store: ResumeStore, resume_id: Optional[int]) -> Optional[dict]:
+    """Latest AI analysis of the version a resume was edited from"""
+    parent_id = store.get_parent_id(resume_id) if resume_id is not None else None
+    return store.get_latest_analysis(parent_id) if parent_id is not None else None
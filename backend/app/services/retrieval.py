@@ -0,0 +1,157 @@
+import logging
+import math
+import threading
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+from fastembed import TextEmbedding
+
+from app.config import settings
+from .prompt_budget import get_token_counter
+from .store import ResumeStore, get_store
+from ..utils.text import section_spans, tokenize, SEARCH_TOKEN_PATTERN
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_resume(text: str, max_chars: int = 800, spans: Optional[List[Tuple[str, int, int]]] = None) -> List[dict]:
+    """
+    Split resume text into section chunks of at most max_chars
+    Long sections are packed line by line so a chunk never splits a line
+    """
+    chunks = []
+    for section, start, end in spans if spans is not None else section_spans(text):
+        lines, size = [], 0
+        for line in text[start:end].splitlines():
+            line = line.strip()[:max_chars]
+            if not line:
+                continue
+            if lines and size + len(line) > max_chars:
+                chunks.append({"section": section, "text": "\n".join(lines)})
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line) + 1
+        if lines:
+            chunks.append({"section": section, "text": "\n".join(lines)})
+
+    for seq, chunk in enumerate(chunks):
+        chunk["seq"] = seq
+    return chunks
+
+
+class ResumeRetriever:
+    """
+    Top-k retrieval of resume section chunks for chat prompts
+
+    Chunks are embedded once at upload with a local fastembed model and stored
+    next to the resume; a question costs one query embedding and a dot product.
+    If the model can't be loaded (e.g. no network to download it), chunks are
+    stored without embeddings and ranked by keyword overlap instead.
+    """
+
+    def __init__(self, store: ResumeStore, model_name: str, top_k: int = 4, max_tokens: int = 600, chunk_chars: int = 800):
+        self.store = store
+        self.model_name = model_name
+        self.top_k = top_k
+        self.max_tokens = max_tokens
+        self.chunk_chars = chunk_chars
+        self._model: Optional[TextEmbedding] = None
+        self._model_failed = False
+        self._model_lock = threading.Lock()
+
+    def _embedder(self) -> Optional[TextEmbedding]:
+        if self._model is None and not self._model_failed:
+            with self._model_lock:
+                if self._model is None and not self._model_failed:
+                    try:
+                        self._model = TextEmbedding(self.model_name)
+                    except Exception as e:
+                        logger.warning("Embedding model %s unavailable, using keyword retrieval: %s", self.model_name, e)
+                        self._model_failed = True
+        return self._model
+
+    def index(self, resume_id: int, text: str, spans: Optional[List[Tuple[str, int, int]]] = None, previous_id: Optional[int] = None) -> List[dict]:
+        """
+        Chunk, embed and store a resume, returns its chunks
+        Chunks unchanged since previous_id (the version it was edited from) keep their embeddings
+        """
+        chunks = chunk_resume(text, self.chunk_chars, spans)
+        model = self._embedder() if chunks else None
+        if model is not None:
+            known = {
+                (c["section"], c["text"]): c["embedding"]
+                for c in (self.store.get_chunks(previous_id) if previous_id is not None else [])
+                if c.get("embedding")
+            }
+            for chunk in chunks:
+                if (chunk["section"], chunk["text"]) in known:
+                    chunk["embedding"] = known[chunk["section"], chunk["text"]]
+            new_chunks = [c for c in chunks if "embedding" not in c]
+            vectors = model.embed([f"{c['section']}: {c['text']}" for c in new_chunks]) if new_chunks else []
+            for chunk, vector in zip(new_chunks, vectors):
+                chunk["embedding"] = np.asarray(vector, dtype=np.float32).tobytes()
+        self.store.save_chunks(resume_id, chunks)
+        return chunks
+
+    def retrieve(self, resume_id: Optional[int], question: str, text: Optional[str] = None) -> List[dict]:
+        """
+        Most relevant chunks for a question, in document order
+        At most top_k chunks and max_tokens in total; resumes stored
+        before retrieval existed are indexed on first use from `text`
+        """
+        chunks = self.store.get_chunks(resume_id) if resume_id is not None else []
+        if not chunks and text:
+            chunks = self.index(resume_id, text) if resume_id is not None else chunk_resume(text, self.chunk_chars)
+        if not chunks:
+            return []
+
+        scores = self._rank(question, chunks)
+        counter = get_token_counter()
+        selected, used = [], 0
+        for i in np.argsort(-scores, kind="stable"):
+            cost = counter.count(chunks[i]["text"])
+            if used + cost > self.max_tokens:
+                continue
+            selected.append(chunks[i])
+            used += cost
+            if len(selected) == self.top_k:
+                break
+        return sorted(selected, key=lambda c: c["seq"])
+
+    def _rank(self, question: str, chunks: List[dict]) -> np.ndarray:
+        model = self._embedder() if all(c.get("embedding") for c in chunks) else None
+        if model is not None:
+            query = np.asarray(next(iter(model.query_embed(question))), dtype=np.float32)
+            matrix = np.frombuffer(b"".join(c["embedding"] for c in chunks), dtype=np.float32)
+            # fastembed vectors are L2-normalised, so the dot product is the cosine
+            return matrix.reshape(len(chunks), -1) @ query
+
+        terms = set(tokenize(question, SEARCH_TOKEN_PATTERN))
+        scores = np.zeros(len(chunks), dtype=np.float32)
+        for i, chunk in enumerate(chunks):
+            counts = Counter(tokenize(f"{chunk['section']} {chunk['text']}", SEARCH_TOKEN_PATTERN))
+            hits = sum(counts[term] for term in terms)
+            scores[i] = hits / math.sqrt(sum(counts.values()) + 1)
+        return scores
+
+    @staticmethod
+    def format_chunks(chunks: List[dict]) -> str:
+        return "\n\n".join(f"[{chunk['section'].title()}]\n{chunk['text']}" for chunk in chunks)
+
+
+_retriever: Optional[ResumeRetriever] = None
+
+
+def get_retriever() -> ResumeRetriever:
+    """Return the process-wide resume retriever"""
+    global _retriever
+    if _retriever is None:
+        _retriever = ResumeRetriever(
+            get_store(),
+            settings.EMBEDDING_MODEL,
+            top_k=settings.CHAT_CONTEXT_CHUNKS,
+            max_tokens=settings.CHAT_CONTEXT_TOKENS,
+            chunk_chars=settings.CHUNK_MAX_CHARS
+        )
+    return _retriever
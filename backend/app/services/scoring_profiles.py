@@ -0,0 +1,228 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from app.config import settings
+from .skill_taxonomy import get_skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "scoring_profiles")
+
+
+class ScoringWeights(BaseModel):
+    """Weights of the total ATS score"""
+    sections: float = 0.30
+    keywords: float = 0.35
+    experience: float = 0.25
+    formatting: float = 0.10
+
+    @model_validator(mode="after")
+    def check_total(self):
+        total = self.sections + self.keywords + self.experience + self.formatting
+        if abs(total - 1.0) > 1e-6:
+            raise ValueError(f"weights must sum to 1.0, got {total}")
+        return self
+
+
+class ProfileKeywords(BaseModel):
+    technical: Dict[str, List[str]] = {}
+    technical_terms: List[str] = []
+    industry: List[str] = []
+
+
+class SummaryRules(BaseModel):
+    action_verbs: List[str] = []
+
+
+class ExperienceRules(BaseModel):
+    keywords: List[str] = []
+    job_titles: List[str] = []
+
+
+class EducationRules(BaseModel):
+    keywords: List[str] = []
+    fields: List[str] = []
+
+
+class WeaknessThresholds(BaseModel):
+    critical: int = 30
+    high: int = 50
+    medium: int = 70
+
+
+class ProfileThresholds(BaseModel):
+    keyword_density: List[Tuple[int, int]] = [(15, 40), (10, 30), (5, 20), (2, 10)]
+    keyword_stuffing: int = 50
+    weakness: WeaknessThresholds = WeaknessThresholds()
+
+
+class ScoringProfile(BaseModel):
+    """Rule profile as written in YAML"""
+    name: str
+    description: str = ""
+    weights: ScoringWeights = ScoringWeights()
+    keywords: ProfileKeywords = ProfileKeywords()
+    summary: SummaryRules = SummaryRules()
+    experience: ExperienceRules = ExperienceRules()
+    education: EducationRules = EducationRules()
+    thresholds: ProfileThresholds = Field(default_factory=ProfileThresholds)
+
+
+class KeywordMatcher:
+    """
+    Substring matcher over a fixed keyword list
+    Same semantics as `any(kw in text for kw in keywords)`, but one regex pass
+    """
+
+    def __init__(self, keywords: List[str]):
+        # Duplicates are kept for count(), a keyword listed in two categories counts twice
+        self.keywords = tuple(keyword.lower() for keyword in keywords)
+        unique = sorted(set(self.keywords), key=len, reverse=True)
+        self._pattern = re.compile("|".join(re.escape(k) for k in unique)) if unique else None
+
+    def search(self, text_lower: str) -> bool:
+        """Whether any keyword occurs in already-lowercased text"""
+        return self._pattern is not None and self._pattern.search(text_lower) is not None
+
+    def count(self, text_lower: str) -> int:
+        """Number of listed keywords that occur in already-lowercased text"""
+        return sum(1 for keyword in self.keywords if keyword in text_lower)
+
+
+class CompiledProfile:
+    """
+    A scoring profile ready for use by ATSScorer: matchers are compiled
+    and weights flattened, so nothing is parsed at scoring time
+    """
+
+    def __init__(self, profile: ScoringProfile):
+        self.name = profile.name
+        self.description = profile.description
+        # Changes with any rule, so cached scores of an edited profile are never reused
+        self.version = hashlib.blake2b(profile.model_dump_json().encode("utf-8"), digest_size=8).hexdigest()
+        self.weights = (
+            profile.weights.sections,
+            profile.weights.keywords,
+            profile.weights.experience,
+            profile.weights.formatting
+        )
+
+        technical = [kw for keywords in profile.keywords.technical.values() for kw in keywords]
+        self.technical_keywords = KeywordMatcher(technical)
+        self.technical_skill_ids = get_skill_taxonomy().ids(technical)
+        self.technical_terms = KeywordMatcher(profile.keywords.technical_terms)
+        self.industry_keywords = KeywordMatcher(profile.keywords.industry)
+        self.action_verbs = KeywordMatcher(profile.summary.action_verbs)
+        self.experience_keywords = KeywordMatcher(profile.experience.keywords)
+        self.job_titles = KeywordMatcher(profile.experience.job_titles)
+        self.education_keywords = KeywordMatcher(profile.education.keywords)
+        self.education_fields = KeywordMatcher(profile.education.fields)
+
+        thresholds = profile.thresholds
+        self.keyword_density = tuple(sorted(thresholds.keyword_density, reverse=True))
+        self.keyword_stuffing = thresholds.keyword_stuffing
+        self.weakness_critical = thresholds.weakness.critical
+        self.weakness_high = thresholds.weakness.high
+        self.weakness_medium = thresholds.weakness.medium
+
+
+def load_profile(path: str) -> CompiledProfile:
+    """Parse, validate and compile a YAML profile"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    data.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return CompiledProfile(ScoringProfile(**data))
+
+
+class ProfileRegistry:
+    """
+    Compiled profiles keyed by name, one YAML file per role family
+
+    Files are re-checked at most every `reload_interval` seconds and recompiled
+    only when their mtime changes, so profiles hot-reload without a restart while
+    a lookup stays a dict access.
+    """
+
+    def __init__(self, directory: str, reload_interval: float = 2.0):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self._profiles: Dict[str, CompiledProfile] = {}
+        self._paths: Dict[str, str] = {}
+        self._mtimes: Dict[str, int] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload(strict=True)
+
+    def reload(self, strict: bool = False):
+        """
+        Compile new or modified profile files and drop removed ones
+        A broken edit keeps the previous version of that profile unless strict
+        """
+        with self._lock:
+            profiles = dict(self._profiles)
+            seen = set()
+            for filename in sorted(os.listdir(self.directory)):
+                if not filename.endswith((".yaml", ".yml")):
+                    continue
+                path = os.path.join(self.directory, filename)
+                seen.add(path)
+                mtime = os.stat(path).st_mtime_ns
+                if self._mtimes.get(path) == mtime:
+                    continue
+                self._mtimes[path] = mtime
+
+                try:
+                    profile = load_profile(path)
+                except (OSError, yaml.YAMLError, ValidationError) as e:
+                    if strict:
+                        raise
+                    logger.warning("Keeping previous scoring profile for %s: %s", path, e)
+                    continue
+
+                # The file may have been renamed to a different profile name
+                for name in [name for name, p in self._paths.items() if p == path]:
+                    profiles.pop(name, None)
+                    del self._paths[name]
+                profiles[profile.name] = profile
+                self._paths[profile.name] = path
+
+            for path in set(self._mtimes) - seen:
+                del self._mtimes[path]
+                for name in [name for name, p in self._paths.items() if p == path]:
+                    profiles.pop(name, None)
+                    del self._paths[name]
+
+            # Swap in one assignment so lookups never see a half-built dict
+            self._profiles = profiles
+            self._checked_at = time.monotonic()
+
+    def get(self, name: Optional[str] = None) -> CompiledProfile:
+        """
+        Look up a compiled profile (the default one if name is None)
+        Raises KeyError for unknown profiles
+        """
+        if time.monotonic() - self._checked_at > self.reload_interval:
+            self.reload()
+        return self._profiles[name or settings.DEFAULT_SCORING_PROFILE]
+
+    def names(self) -> List[str]:
+        return sorted(self._profiles)
+
+
+_registry: Optional[ProfileRegistry] = None
+
+
+def get_profile_registry() -> ProfileRegistry:
+    """Return the process-wide profile registry"""
+    global _registry
+    if _registry is None:
+        _registry = ProfileRegistry(settings.SCORING_PROFILES_DIR or PROFILES_DIR)
+    return _registry
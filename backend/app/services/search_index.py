@@ -0,0 +1,476 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from array import array
+from collections import defaultdict
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from filelock import FileLock
+
+from app.config import settings
+from ..utils.text import tokenize, SEARCH_TOKEN_PATTERN
+
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+
+# Bare connectives in a query; all terms are ANDed anyway
+QUERY_STOPWORDS = {"and"}
+
+
+def parse_query(query: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Split a query into bare terms and quoted phrases
+    e.g. 'terraform and "5 years"' -> (["terraform"], [["5", "years"]])
+    """
+    phrases = []
+    terms = []
+    for phrase in PHRASE_PATTERN.findall(query):
+        tokens = tokenize(phrase, SEARCH_TOKEN_PATTERN)
+        if len(tokens) > 1:
+            phrases.append(tokens)
+        else:
+            terms.extend(tokens)
+
+    rest = PHRASE_PATTERN.sub(" ", query)
+    terms.extend(t for t in tokenize(rest, SEARCH_TOKEN_PATTERN) if t not in QUERY_STOPWORDS)
+
+    return list(dict.fromkeys(terms)), phrases
+
+
+class _Segment:
+    """
+    Immutable on-disk segment
+
+    terms.json   term -> [offset, doc_freq] (offset in uint32 units)
+    docs.json    doc id -> document length
+    postings.bin per term: doc ids[df], term freqs[df], positions[sum(tf)]
+
+    The term dictionary is loaded into memory, postings stay memory-mapped
+    """
+
+    def __init__(self, path: str):
+        self.name = os.path.basename(path)
+
+        with open(os.path.join(path, "terms.json"), "r", encoding="utf-8") as f:
+            self.terms: Dict[str, List[int]] = json.load(f)
+        with open(os.path.join(path, "docs.json"), "r", encoding="utf-8") as f:
+            self.doc_lengths: Dict[int, int] = {int(doc): length for doc, length in json.load(f).items()}
+
+        self._mmap = None
+        self._ints = memoryview(b"").cast("I")
+        with open(os.path.join(path, "postings.bin"), "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._ints = memoryview(self._mmap).cast("I")
+
+    def postings(self, term: str, with_positions: bool = False) -> Dict[int, object]:
+        """
+        doc id -> term frequency, or doc id -> positions when with_positions is set
+        """
+        entry = self.terms.get(term)
+        if entry is None:
+            return {}
+
+        offset, df = entry
+        docs = self._ints[offset:offset + df].tolist()
+        tfs = self._ints[offset + df:offset + 2 * df].tolist()
+        if not with_positions:
+            return dict(zip(docs, tfs))
+
+        result = {}
+        cursor = offset + 2 * df
+        for doc, tf in zip(docs, tfs):
+            result[doc] = self._ints[cursor:cursor + tf].tolist()
+            cursor += tf
+        return result
+
+    def close(self):
+        try:
+            self._ints.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            # A query still holds a view; the mapping is freed once it is dropped
+            pass
+
+
+def _write_segment(directory: str, postings: Iterable[Tuple[str, List[Tuple[int, List[int]]]]], doc_lengths: Dict[int, int]) -> str:
+    """
+    Write a segment from (term, [(doc, positions), ...]) pairs sorted by doc id
+    Returns the segment name
+    """
+    name = f"seg_{uuid.uuid4().hex}"
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    os.makedirs(tmp_path)
+
+    terms = {}
+    offset = 0
+    with open(os.path.join(tmp_path, "postings.bin"), "wb") as f:
+        for term, entries in postings:
+            if not entries:
+                continue
+            block = array("I", [doc for doc, _ in entries])
+            block.extend(array("I", [len(positions) for _, positions in entries]))
+            block.extend(array("I", chain.from_iterable(positions for _, positions in entries)))
+            block.tofile(f)
+            terms[term] = [offset, len(entries)]
+            offset += len(block)
+
+    with open(os.path.join(tmp_path, "terms.json"), "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    with open(os.path.join(tmp_path, "docs.json"), "w", encoding="utf-8") as f:
+        json.dump({str(doc): length for doc, length in doc_lengths.items()}, f)
+
+    os.replace(tmp_path, os.path.join(directory, name))
+    return name
+
+
+class SearchIndex:
+    """
+    Inverted index over raw resume text with BM25 ranking and phrase queries
+
+    New documents go to an in-memory buffer that is flushed into an immutable
+    segment every `flush_docs` documents, or once the oldest has waited
+    `flush_seconds` (flush_due), since other workers only see flushed segments;
+    segments are merged once there are more than `max_segments`. A document id
+    always belongs to the newest segment (or the buffer) that contains it, so
+    re-indexing a resume just shadows the old copy. The manifest is guarded by
+    a file lock so several workers can share the directory.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, path: str, flush_docs: int = 256, max_segments: int = 8, flush_seconds: float = 1.0):
+        self.path = path
+        self.flush_docs = flush_docs
+        self.flush_seconds = flush_seconds
+        self.max_segments = max_segments
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(os.path.join(path, ".lock"))
+        self._manifest_path = os.path.join(path, "manifest.json")
+        self._manifest_mtime = None
+
+        self.segments: List[_Segment] = []
+        self.deleted = set()
+        self._owner: Dict[int, str] = {}
+        self._lengths: Dict[int, int] = {}
+        self._total_length = 0
+
+        self._buffer: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        self._buffer_lengths: Dict[int, int] = {}
+        self._buffered_since: Optional[float] = None
+
+        self._refresh()
+
+    # ---- manifest ----
+
+    def _read_manifest(self) -> dict:
+        if not os.path.exists(self._manifest_path):
+            return {"segments": [], "deleted": []}
+        with open(self._manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: dict):
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _manifest_version(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self._manifest_path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self):
+        """Reopen segments if the manifest changed on disk"""
+        mtime = self._manifest_version()
+        if mtime is not None and mtime == self._manifest_mtime:
+            return
+
+        # Under the file lock: another worker's merge() can't swap the manifest
+        # and remove its segments between reading it and opening them
+        with self._file_lock:
+            mtime = self._manifest_version()
+            manifest = self._read_manifest()
+            opened = {segment.name: segment for segment in self.segments}
+            segments = []
+            for name in manifest["segments"]:
+                segments.append(opened.pop(name, None) or _Segment(os.path.join(self.path, name)))
+        for segment in opened.values():
+            segment.close()
+
+        self.segments = segments
+        self.deleted = set(manifest["deleted"]) - set(self._buffer_lengths)
+        self._manifest_mtime = mtime
+        self._rebuild_stats()
+
+    def _rebuild_stats(self):
+        self._owner = {}
+        self._lengths = {}
+        for segment in self.segments:
+            for doc, length in segment.doc_lengths.items():
+                self._owner[doc] = segment.name
+                self._lengths[doc] = length
+        for doc, length in self._buffer_lengths.items():
+            self._owner[doc] = None
+            self._lengths[doc] = length
+        for doc in self.deleted:
+            self._owner.pop(doc, None)
+            self._lengths.pop(doc, None)
+        self._total_length = sum(self._lengths.values())
+
+    # ---- writes ----
+
+    def add_document(self, doc_id: int, text: str, tokens: Optional[List[str]] = None):
+        """
+        Index (or re-index) a document; it is searchable immediately
+        Pass tokens if the text is already tokenized (e.g. ResumeDocument.tokens)
+        """
+        if tokens is None:
+            tokens = tokenize(text, SEARCH_TOKEN_PATTERN)
+        positions = defaultdict(list)
+        for position, token in enumerate(tokens):
+            positions[token].append(position)
+
+        with self._lock:
+            if doc_id in self._buffer_lengths:
+                self._remove_from_buffer(doc_id)
+
+            for token, token_positions in positions.items():
+                self._buffer[token][doc_id] = token_positions
+
+            self._total_length += len(tokens) - self._lengths.get(doc_id, 0)
+            self._buffer_lengths[doc_id] = len(tokens)
+            self._lengths[doc_id] = len(tokens)
+            self._owner[doc_id] = None
+            self.deleted.discard(doc_id)
+            if self._buffered_since is None:
+                self._buffered_since = time.monotonic()
+
+            if len(self._buffer_lengths) >= self.flush_docs:
+                self.flush()
+            else:
+                self.flush_due()
+
+    def delete_document(self, doc_id: int):
+        """Remove a document from search results"""
+        with self._lock:
+            self._remove_from_buffer(doc_id)
+            self.deleted.add(doc_id)
+            self._owner.pop(doc_id, None)
+            self._total_length -= self._lengths.pop(doc_id, 0)
+
+            with self._file_lock:
+                manifest = self._read_manifest()
+                manifest["deleted"] = sorted(set(manifest["deleted"]) | {doc_id})
+                self._write_manifest(manifest)
+
+    def _remove_from_buffer(self, doc_id: int):
+        if self._buffer_lengths.pop(doc_id, None) is None:
+            return
+        for term in [term for term, docs in self._buffer.items() if doc_id in docs]:
+            del self._buffer[term][doc_id]
+            if not self._buffer[term]:
+                del self._buffer[term]
+
+    def flush(self):
+        """Write buffered documents to a new segment"""
+        with self._lock:
+            if not self._buffer_lengths:
+                return
+
+            postings = (
+                (term, sorted(self._buffer[term].items()))
+                for term in sorted(self._buffer)
+            )
+            name = _write_segment(self.path, postings, self._buffer_lengths)
+
+            with self._file_lock:
+                manifest = self._read_manifest()
+                manifest["segments"].append(name)
+                manifest["deleted"] = sorted((set(manifest["deleted"]) | self.deleted) - set(self._buffer_lengths))
+                self._write_manifest(manifest)
+
+            self._buffer = defaultdict(dict)
+            self._buffer_lengths = {}
+            self._buffered_since = None
+            self._refresh()
+
+            if len(self.segments) > self.max_segments:
+                self.merge()
+
+    def flush_due(self) -> bool:
+        """Flush if the oldest buffered document has waited flush_seconds"""
+        with self._lock:
+            if self._buffered_since is None or time.monotonic() - self._buffered_since < self.flush_seconds:
+                return False
+            self.flush()
+            return True
+
+    def merge(self):
+        """Compact all segments into one, dropping shadowed and deleted documents"""
+        with self._lock, self._file_lock:
+            self._refresh()
+            if len(self.segments) < 2:
+                return
+
+            segments = list(self.segments)
+            owner = {}
+            for segment in segments:
+                for doc in segment.doc_lengths:
+                    owner[doc] = segment.name
+            for doc in self.deleted:
+                owner.pop(doc, None)
+
+            def merged_postings():
+                for term in sorted(set().union(*(segment.terms for segment in segments))):
+                    entries = []
+                    for segment in segments:
+                        for doc, positions in segment.postings(term, with_positions=True).items():
+                            if owner.get(doc) == segment.name:
+                                entries.append((doc, positions))
+                    entries.sort()
+                    yield term, entries
+
+            doc_lengths = {
+                doc: segment.doc_lengths[doc]
+                for segment in segments
+                for doc in segment.doc_lengths
+                if owner.get(doc) == segment.name
+            }
+            name = _write_segment(self.path, merged_postings(), doc_lengths)
+
+            self._write_manifest({"segments": [name], "deleted": []})
+            self._refresh()
+
+            for segment in segments:
+                shutil.rmtree(os.path.join(self.path, segment.name), ignore_errors=True)
+
+    def catch_up(self, store) -> int:
+        """
+        Index every stored resume missing from the index (and not deleted),
+        e.g. buffered by a worker that died before flushing, whatever its id
+        Returns the number of documents indexed
+        """
+        with self._lock, self._file_lock:
+            self._refresh()
+
+            count = 0
+            for resume_id in store.resume_ids():
+                if resume_id in self._lengths or resume_id in self.deleted:
+                    continue
+                resume = store.get_resume(resume_id)
+                if resume is not None:
+                    self.add_document(resume_id, resume.get("raw_text", ""))
+                    count += 1
+            self.flush()
+
+        return count
+
+    # ---- reads ----
+
+    def _postings(self, term: str, with_positions: bool = False) -> Dict[int, object]:
+        """Live postings for a term across segments and the buffer"""
+        result = {}
+        for segment in self.segments:
+            for doc, value in segment.postings(term, with_positions).items():
+                if self._owner.get(doc) == segment.name:
+                    result[doc] = value
+        for doc, positions in self._buffer.get(term, {}).items():
+            if doc in self._owner:
+                result[doc] = positions if with_positions else len(positions)
+        return result
+
+    @staticmethod
+    def _contains_phrase(positions: List[List[int]]) -> bool:
+        following = [set(p) for p in positions[1:]]
+        return any(
+            all(start + i + 1 in p for i, p in enumerate(following))
+            for start in positions[0]
+        )
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Tuple[int, float]]]:
+        """
+        AND-search for terms and quoted phrases, ranked by BM25
+        Returns (total hits, [(doc id, score), ...])
+        """
+        terms, phrases = parse_query(query)
+        phrase_terms = {token for phrase in phrases for token in phrase}
+        all_terms = list(dict.fromkeys(terms + [t for phrase in phrases for t in phrase]))
+        if not all_terms:
+            return 0, []
+
+        with self._lock:
+            self._refresh()
+            postings = {term: self._postings(term, term in phrase_terms) for term in all_terms}
+
+            # Intersect from the rarest term
+            ordered = sorted(all_terms, key=lambda t: len(postings[t]))
+            candidates = set(postings[ordered[0]])
+            for term in ordered[1:]:
+                candidates &= postings[term].keys()
+                if not candidates:
+                    return 0, []
+
+            for phrase in phrases:
+                candidates = {
+                    doc for doc in candidates
+                    if self._contains_phrase([postings[token][doc] for token in phrase])
+                }
+
+            n_docs = len(self._lengths)
+            avg_length = self._total_length / max(n_docs, 1)
+            idf = {
+                term: math.log(1 + (n_docs - len(postings[term]) + 0.5) / (len(postings[term]) + 0.5))
+                for term in all_terms
+            }
+
+            scores = []
+            for doc in candidates:
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[doc] / max(avg_length, 1))
+                score = 0.0
+                for term in all_terms:
+                    value = postings[term][doc]
+                    tf = len(value) if isinstance(value, list) else value
+                    score += idf[term] * tf * (self.K1 + 1) / (tf + norm)
+                scores.append((doc, score))
+
+        top = heapq.nlargest(offset + limit, scores, key=lambda hit: hit[1])
+        return len(scores), top[offset:]
+
+    def close(self):
+        """Flush pending documents and release memory maps"""
+        with self._lock:
+            self.flush()
+            for segment in self.segments:
+                segment.close()
+            self.segments = []
+            self._manifest_mtime = None
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> SearchIndex:
+    """Return the process-wide search index"""
+    global _index
+    if _index is None:
+        _index = SearchIndex(
+            settings.SEARCH_INDEX_PATH,
+            flush_docs=settings.SEARCH_FLUSH_DOCS,
+            max_segments=settings.SEARCH_MAX_SEGMENTS,
+            flush_seconds=settings.SEARCH_FLUSH_SECONDS
+        )
+    return _index
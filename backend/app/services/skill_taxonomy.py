@@ -0,0 +1,288 @@
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import yaml
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "taxonomy", "skills.yaml")
+COMMON_WORDS_PATH = os.path.join(os.path.dirname(TAXONOMY_PATH), "common_words.txt")
+
+# Tokens of a skill phrase: "node.js", "c++", "ci/cd", "a/b", ".net"
+TERM_TOKEN_PATTERN = re.compile(r"\.?[a-z0-9+#]+(?:[./&'][a-z0-9+#]+)*")
+SQUASH_PATTERN = re.compile(r"[^a-z0-9+#]+")
+VERSION_SUFFIX_PATTERN = re.compile(r"(?<=[a-z+#])[0-9.]+$")
+
+
+class Skill(NamedTuple):
+    id: str
+    name: str
+    category: str
+    technical: bool
+
+
+def squash(term: str) -> str:
+    """Lowercase without spacing or punctuation ("Node.js" -> "nodejs")"""
+    return SQUASH_PATTERN.sub("", term.lower())
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (edits + adjacent swaps)
+    Only the diagonal band that can stay within limit is computed; returns
+    limit + 1 once the distance is known to exceed it
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    before, previous = None, [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [i if i <= limit else over] + [over] * len(b)
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = min(value, over)
+        # Later rows can't get back under the limit (swaps reach back one row)
+        if min(current) > limit and min(previous) >= limit:
+            return over
+        before, previous = previous, current
+    return previous[-1]
+
+
+class AliasTrie:
+    """
+    Token trie over skill names and aliases
+
+    lookup() is an exact match of a whole phrase; scan() finds every
+    known skill phrase in a longer text (longest match first).
+    """
+
+    END = ""  # key of the skill id in a terminal node (tokens are never empty)
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def add(self, tokens: List[str], skill_id: str) -> bool:
+        """Insert a phrase, False if it already belongs to another skill"""
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        if node.get(self.END, skill_id) != skill_id:
+            return False
+        node[self.END] = skill_id
+        return True
+
+    def lookup(self, tokens: List[str]) -> Optional[str]:
+        node = self.root
+        for token in tokens:
+            node = node.get(token)
+            if node is None:
+                return None
+        return node.get(self.END)
+
+    def scan(self, tokens: List[str], min_length: int = 2) -> List[str]:
+        """Skill ids of the longest phrases found in a token sequence, in order"""
+        found, i = [], 0
+        while i < len(tokens):
+            node, match, end = self.root, None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if self.END in node and (j > i or len(tokens[i]) >= min_length):
+                    match, end = node[self.END], j + 1
+            if match is None:
+                i += 1
+            else:
+                found.append(match)
+                i = end
+        return found
+
+
+class DeletionIndex:
+    """
+    Symmetric-delete index for bounded edit distance lookups
+
+    Every key is stored under each string obtained by deleting up to
+    max_edits characters; a query only generates its own deletions and
+    looks them up, so a fuzzy match costs a few dozen dict lookups and a
+    handful of distance checks instead of a scan of every key.
+    """
+
+    def __init__(self, max_edits: int = 2):
+        self.max_edits = max_edits
+        self.max_length = 0
+        self._index: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def deletions(term: str, edits: int) -> Set[str]:
+        variants, frontier = {term}, {term}
+        for _ in range(edits):
+            frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+            variants |= frontier
+        return variants
+
+    def add(self, key: str):
+        self.max_length = max(self.max_length, len(key))
+        for variant in self.deletions(key, self.max_edits):
+            self._index.setdefault(variant, set()).add(key)
+
+    def search(self, query: str, edits: int) -> List[Tuple[int, str]]:
+        """(distance, key) of the closest keys within `edits` of query"""
+        edits = min(edits, self.max_edits)
+        if len(query) > self.max_length + edits:
+            return []
+        # One edit first: typos usually are, and it needs far fewer deletions
+        for limit in range(1, edits + 1):
+            candidates = set()
+            for variant in self.deletions(query, limit):
+                candidates |= self._index.get(variant, set())
+            matches = sorted(
+                (distance, key) for distance, key in ((edit_distance(query, key, limit), key) for key in candidates)
+                if distance <= limit
+            )
+            if matches:
+                return matches
+        return []
+
+
+class SkillTaxonomy:
+    """
+    Canonical skills and aliases compiled for fast normalization
+
+    Resolution order for a skill string:
+    1. exact name/alias (token trie, case and spacing insensitive)
+    2. same letters without punctuation ("ReactJS", "Node JS")
+    3. without a "js" or version suffix ("Vue3", "Angular 14")
+    4. bounded edit distance ("Kubernets", "Postgress"), only for terms of at
+       least fuzzy_min_length characters that aren't common words, and only
+       when asked for: a scoring hint, never a parsed skill (normalize)
+
+    Results are memoised, so repeated skills cost a dict lookup.
+    """
+
+    def __init__(self, data: dict, fuzzy_max_edits: int = 2, fuzzy_min_length: int = 8, common_words: Iterable[str] = (), cache_size: int = 65536):
+        self.fuzzy_max_edits = fuzzy_max_edits
+        self.fuzzy_min_length = fuzzy_min_length
+        self.common_words = frozenset(squash(word) for word in common_words)
+        self.skills: Dict[str, Skill] = {}
+        self.trie = AliasTrie()
+        self._squashed: Dict[str, str] = {}
+        self._fuzzy = DeletionIndex(fuzzy_max_edits)
+        self._compile(data)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _compile(self, data: dict):
+        non_technical = set(data.get("non_technical", []))
+        for category, entries in data.items():
+            if category == "non_technical":
+                continue
+            for skill_id, names in entries.items():
+                skill_id = str(skill_id)
+                names = [str(name) for name in names]
+                if skill_id in self.skills:
+                    raise ValueError(f"Duplicate skill id: {skill_id}")
+                self.skills[skill_id] = Skill(skill_id, names[0], category, category not in non_technical)
+
+                aliases = names + [skill_id.replace("-", " ")] if "-" in skill_id else names
+                for name in aliases:
+                    tokens = TERM_TOKEN_PATTERN.findall(name.lower())
+                    if tokens and not self.trie.add(tokens, skill_id):
+                        logger.debug("Skill alias %r of %s already taken", name, skill_id)
+                    key = squash(name)
+                    if key and self._squashed.setdefault(key, skill_id) == skill_id and len(key) >= self.fuzzy_min_length:
+                        self._fuzzy.add(key)
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def _resolve(self, term: str, fuzzy: bool = True) -> Optional[Skill]:
+        lowered = term.strip().lower()
+        skill_id = self.trie.lookup(TERM_TOKEN_PATTERN.findall(lowered))
+
+        key = squash(lowered)
+        if skill_id is None:
+            skill_id = self._squashed.get(key)
+        if skill_id is None and len(key) > 3:
+            stem = key[:-2] if key.endswith("js") else VERSION_SUFFIX_PATTERN.sub("", key)
+            skill_id = self._squashed.get(stem) if stem != key else None
+        # Real words one edit from a skill ("testing" / TestNG) are not typos of it
+        if skill_id is None and fuzzy and len(key) >= self.fuzzy_min_length and key not in self.common_words:
+            edits = 1 if len(key) <= 8 else self.fuzzy_max_edits
+            matches = self._fuzzy.search(key, edits)
+            if matches:
+                skill_id = self._squashed[matches[0][1]]
+
+        return self.skills[skill_id] if skill_id is not None else None
+
+    def scan(self, text: str) -> List[Skill]:
+        """Skills named anywhere in a phrase, e.g. "Cloud: AWS (EC2, S3)" """
+        return [self.skills[skill_id] for skill_id in self.trie.scan(TERM_TOKEN_PATTERN.findall(text.lower()))]
+
+    def normalize(self, raw_skills: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Canonical display names and ids of parsed skill strings
+        Pieces naming no single skill (exactly, by alias or without
+        punctuation / suffix; never fuzzily) are scanned for known skills;
+        pieces with none are kept as written (without an id). Duplicates are dropped.
+        """
+        names, ids, seen = [], [], set()
+        for raw in raw_skills:
+            raw = raw.strip()
+            if not raw:
+                continue
+            skill = self.resolve(raw, False)
+            found = [skill] if skill is not None else self.scan(raw)
+            if not found:
+                if raw.lower() not in seen:
+                    seen.add(raw.lower())
+                    names.append(raw)
+                continue
+            for skill in found:
+                if skill.id not in seen:
+                    seen.add(skill.id)
+                    names.append(skill.name)
+                    ids.append(skill.id)
+        return names, ids
+
+    def ids(self, terms: Iterable[str]) -> frozenset:
+        """Ids of the terms that name a skill exactly (no fuzzy matching)"""
+        return frozenset(skill.id for skill in (self.resolve(term, False) for term in terms) if skill is not None)
+
+
+def load_common_words(path: str) -> List[str]:
+    """Words of a one-per-line list ("#" starts a comment)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def load_taxonomy(path: str, common_words_path: Optional[str] = None) -> SkillTaxonomy:
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    return SkillTaxonomy(
+        data,
+        fuzzy_max_edits=settings.SKILL_FUZZY_MAX_EDITS,
+        fuzzy_min_length=settings.SKILL_FUZZY_MIN_LENGTH,
+        common_words=load_common_words(common_words_path) if common_words_path else ()
+    )
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Return the process-wide skill taxonomy"""
+    global _taxonomy
+    if _taxonomy is None:
+        _taxonomy = load_taxonomy(
+            settings.SKILL_TAXONOMY_PATH or TAXONOMY_PATH,
+            settings.SKILL_COMMON_WORDS_PATH or COMMON_WORDS_PATH
+        )
+    return _taxonomy
@@ -0,0 +1,625 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+import ormsgpack
+import zstandard
+
+from app.config import settings
+
+
+class ResumeStore(ABC):
+    """
+    Persistence interface for parsed resumes, score snapshots and JD matches
+    Backends register themselves in STORE_BACKENDS and are picked by settings.STORE_BACKEND
+    """
+
+    @abstractmethod
+    def save_resume(self, resume_data: dict, filename: Optional[str] = None, parent_id: Optional[int] = None) -> int:
+        """Persist a parsed resume (an edited version of parent_id, if given), returns its id"""
+
+    @abstractmethod
+    def get_parent_id(self, resume_id: int) -> Optional[int]:
+        """Id of the version a resume was edited from (None for a first version)"""
+
+    @abstractmethod
+    def get_resume(self, resume_id: int, include_raw_text: bool = True) -> Optional[dict]:
+        """Load a parsed resume by id"""
+
+    @abstractmethod
+    def save_scores(self, resume_id: int, scores: dict, jd_text: Optional[str] = None) -> None:
+        """Persist a score snapshot (and JD match, if any) for a resume"""
+
+    @abstractmethod
+    def get_latest_scores(self, resume_id: int) -> Optional[dict]:
+        """Load the most recent score snapshot for a resume"""
+
+    @abstractmethod
+    def list_resumes(
+        self,
+        min_ats_score: Optional[int] = None,
+        max_ats_score: Optional[int] = None,
+        skills: Optional[List[str]] = None,
+        email: Optional[str] = None,
+        before_id: Optional[int] = None,
+        limit: int = 50
+    ) -> List[dict]:
+        """
+        List resume summaries, newest first
+        Pagination is keyset-based: pass the last id of a page as before_id
+        """
+
+    @abstractmethod
+    def iter_resumes(self, after_id: int = 0, batch_size: int = 500) -> Iterator[Tuple[int, dict]]:
+        """Yield (id, resume) pairs in id order, starting after after_id"""
+
+    @abstractmethod
+    def resume_ids(self) -> List[int]:
+        """Ids of all stored resumes, ascending"""
+
+    @abstractmethod
+    def export_resumes(
+        self,
+        after_id: int = 0,
+        limit: int = 500,
+        min_ats_score: Optional[int] = None,
+        max_ats_score: Optional[int] = None,
+        skills: Optional[List[str]] = None,
+        email: Optional[str] = None,
+        include_analysis: bool = False
+    ) -> List[dict]:
+        """
+        A page of resumes (without raw_text) with their latest scores and,
+        if asked for, latest analysis, in id order after after_id
+        Filters as in list_resumes
+        """
+
+    @abstractmethod
+    def save_signature(self, resume_id: int, signature: bytes, band_keys: List[int]) -> None:
+        """Persist a MinHash signature and its LSH band keys"""
+
+    @abstractmethod
+    def get_signatures(self, resume_ids: Iterable[int]) -> Dict[int, bytes]:
+        """Load MinHash signatures by resume id"""
+
+    @abstractmethod
+    def find_band_matches(self, band_keys: List[int]) -> List[int]:
+        """Resume ids sharing at least one LSH band key"""
+
+    @abstractmethod
+    def iter_band_collisions(self) -> Iterator[List[int]]:
+        """Yield groups of resume ids that share an LSH band key"""
+
+    @abstractmethod
+    def unsigned_resume_ids(self) -> List[int]:
+        """Resume ids without a MinHash signature"""
+
+    @abstractmethod
+    def save_chunks(self, resume_id: int, chunks: List[dict]) -> None:
+        """Replace the section chunks (and their embeddings) of a resume"""
+
+    @abstractmethod
+    def get_chunks(self, resume_id: int) -> List[dict]:
+        """Load the section chunks of a resume in document order"""
+
+    @abstractmethod
+    def save_analysis(self, resume_id: int, scores_key: str, analysis: dict) -> None:
+        """Persist an AI analysis for a resume and score snapshot"""
+
+    @abstractmethod
+    def last_jd_score_id(self, jd_id: str) -> int:
+        """Id of the latest score snapshot taken against a JD (0 if none)"""
+
+    @abstractmethod
+    def top_jd_matches(self, jd_id: str, jd_weight: float, limit: int) -> List[Tuple[int, int, int]]:
+        """Best (resume_id, ats_score, match_percentage) rows for a JD by combined score"""
+
+    @abstractmethod
+    def jd_matches_since(self, jd_id: str, after_score_id: int) -> List[Tuple[int, int, int, int]]:
+        """(score_id, resume_id, ats_score, match_percentage) of JD matches saved after a score id"""
+
+    @abstractmethod
+    def get_analysis(self, resume_id: int, scores_key: str) -> Optional[dict]:
+        """Load the AI analysis for a resume and score snapshot"""
+
+    @abstractmethod
+    def get_latest_analysis(self, resume_id: int) -> Optional[dict]:
+        """Load the most recent AI analysis for a resume, whatever its score snapshot"""
+
+    @abstractmethod
+    def save_open_jd(self, jd_text: str) -> str:
+        """Keep a job description open for batch matching, returns its jd_id"""
+
+    @abstractmethod
+    def close_jd(self, jd_id: str) -> bool:
+        """Stop batch matching a job description"""
+
+    @abstractmethod
+    def list_open_jds(self) -> List[Tuple[str, str]]:
+        """(jd_id, jd_text) of open job descriptions, oldest first"""
+
+
+def jd_hash(jd_text: str) -> str:
+    """Stable identifier for a job description"""
+    return hashlib.sha1(jd_text.strip().encode("utf-8")).hexdigest()
+
+
+def content_hash(value: Any) -> str:
+    """Stable identifier for a JSON-like value's content"""
+    return hashlib.sha1(orjson.dumps(value, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def scores_hash(scores: dict) -> str:
+    """Stable identifier for a score snapshot's content"""
+    return content_hash(scores)
+
+
+class SQLiteResumeStore(ResumeStore):
+    """
+    SQLite-backed store (WAL mode)
+
+    - resumes: one row per upload, ResumeData without raw_text (MessagePack) + zstd-compressed raw_text
+    - resume_skills: (skill, resume_id) junction table for skill filters
+    - scores: append-only score snapshots
+    - jd_matches: latest match per (jd, resume)
+    - minhash_signatures / lsh_bands: near-duplicate detection
+    - resume_chunks: section chunks with float32 embeddings for chat retrieval
+    - analyses: AI analysis per (resume, score snapshot)
+    - open_jds: job descriptions matched against the whole pool
+    - resume_versions: the version an edited resume was uploaded as a new version of
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS resumes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        email TEXT,
+        filename TEXT,
+        ats_score INTEGER,
+        created_at REAL NOT NULL,
+        data BLOB NOT NULL,
+        raw_text BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_resumes_email ON resumes(email);
+    CREATE INDEX IF NOT EXISTS idx_resumes_ats_score ON resumes(ats_score, id);
+
+    CREATE TABLE IF NOT EXISTS resume_skills (
+        skill TEXT NOT NULL,
+        resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+        PRIMARY KEY (skill, resume_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_resume_skills_resume ON resume_skills(resume_id);
+
+    CREATE TABLE IF NOT EXISTS scores (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+        ats_score INTEGER NOT NULL,
+        jd_hash TEXT,
+        created_at REAL NOT NULL,
+        data BLOB NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_scores_resume ON scores(resume_id, id);
+    CREATE INDEX IF NOT EXISTS idx_scores_jd ON scores(jd_hash, id) WHERE jd_hash IS NOT NULL;
+
+    CREATE TABLE IF NOT EXISTS jd_matches (
+        jd_hash TEXT NOT NULL,
+        resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+        match_percentage INTEGER NOT NULL,
+        ats_score INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (jd_hash, resume_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_jd_matches_resume ON jd_matches(resume_id);
+
+    CREATE TABLE IF NOT EXISTS minhash_signatures (
+        resume_id INTEGER PRIMARY KEY REFERENCES resumes(id) ON DELETE CASCADE,
+        signature BLOB NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS lsh_bands (
+        band_key INTEGER NOT NULL,
+        resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+        PRIMARY KEY (band_key, resume_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_lsh_bands_resume ON lsh_bands(resume_id);
+
+    CREATE TABLE IF NOT EXISTS resume_chunks (
+        resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+        seq INTEGER NOT NULL,
+        section TEXT NOT NULL,
+        text TEXT NOT NULL,
+        embedding BLOB,
+        PRIMARY KEY (resume_id, seq)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS analyses (
+        resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+        scores_hash TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (resume_id, scores_hash)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS open_jds (
+        jd_hash TEXT PRIMARY KEY,
+        jd_text TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS resume_versions (
+        resume_id INTEGER PRIMARY KEY REFERENCES resumes(id) ON DELETE CASCADE,
+        parent_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE
+    );
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._conn.executescript(self.SCHEMA)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _encode(self, record: dict) -> bytes:
+        return ormsgpack.packb(record, option=ormsgpack.OPT_NON_STR_KEYS)
+
+    def _decode(self, blob: bytes) -> dict:
+        # Rows written before the switch to MessagePack hold JSON objects
+        if blob[:1] == b"{":
+            return json.loads(blob)
+        return ormsgpack.unpackb(blob)
+
+    def save_resume(self, resume_data: dict, filename: Optional[str] = None, parent_id: Optional[int] = None) -> int:
+        record = {k: v for k, v in resume_data.items() if k != "raw_text"}
+        raw_text = zstandard.ZstdCompressor(level=3).compress(
+            resume_data.get("raw_text", "").encode("utf-8")
+        )
+        skills = {s.strip().lower() for s in resume_data.get("skills", []) if s.strip()}
+
+        with self._write_lock, self._conn as conn:
+            cursor = conn.execute(
+                "INSERT INTO resumes (name, email, filename, created_at, data, raw_text) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    resume_data.get("name"),
+                    (resume_data.get("email") or "").lower() or None,
+                    filename,
+                    time.time(),
+                    self._encode(record),
+                    raw_text
+                )
+            )
+            resume_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT OR IGNORE INTO resume_skills (skill, resume_id) VALUES (?, ?)",
+                [(skill, resume_id) for skill in skills]
+            )
+            if parent_id is not None:
+                conn.execute(
+                    "INSERT INTO resume_versions (resume_id, parent_id) VALUES (?, ?)",
+                    (resume_id, parent_id)
+                )
+
+        return resume_id
+
+    def get_parent_id(self, resume_id: int) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT parent_id FROM resume_versions WHERE resume_id = ?", (resume_id,)
+        ).fetchone()
+        return row["parent_id"] if row else None
+
+    def get_resume(self, resume_id: int, include_raw_text: bool = True) -> Optional[dict]:
+        columns = "data, raw_text" if include_raw_text else "data"
+        row = self._conn.execute(f"SELECT {columns} FROM resumes WHERE id = ?", (resume_id,)).fetchone()
+        if row is None:
+            return None
+
+        resume = self._decode(row["data"])
+        if include_raw_text:
+            resume["raw_text"] = zstandard.ZstdDecompressor().decompress(row["raw_text"]).decode("utf-8")
+        return resume
+
+    def save_scores(self, resume_id: int, scores: dict, jd_text: Optional[str] = None) -> None:
+        now = time.time()
+        ats_score = scores.get("ats_score", 0)
+        jd_id = jd_hash(jd_text) if jd_text else None
+
+        with self._write_lock, self._conn as conn:
+            conn.execute(
+                "INSERT INTO scores (resume_id, ats_score, jd_hash, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                (resume_id, ats_score, jd_id, now, self._encode(scores))
+            )
+            conn.execute("UPDATE resumes SET ats_score = ? WHERE id = ?", (ats_score, resume_id))
+
+            jd_match = scores.get("jd_match")
+            if jd_id and jd_match:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jd_matches (jd_hash, resume_id, match_percentage, ats_score, created_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (jd_id, resume_id, jd_match.get("match_percentage", 0), ats_score, now, self._encode(jd_match))
+                )
+
+    def get_latest_scores(self, resume_id: int) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT data FROM scores WHERE resume_id = ? ORDER BY id DESC LIMIT 1",
+            (resume_id,)
+        ).fetchone()
+        return self._decode(row["data"]) if row else None
+
+    def list_resumes(
+        self,
+        min_ats_score: Optional[int] = None,
+        max_ats_score: Optional[int] = None,
+        skills: Optional[List[str]] = None,
+        email: Optional[str] = None,
+        before_id: Optional[int] = None,
+        limit: int = 50
+    ) -> List[dict]:
+        joins, clauses, params, order_by = self._resume_filters(min_ats_score, max_ats_score, skills, email)
+        if before_id is not None:
+            clauses.append("r.id < ?")
+            params.append(before_id)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        rows = self._conn.execute(
+            f"SELECT r.id, r.name, r.email, r.filename, r.ats_score, r.created_at FROM resumes r "
+            f"{joins} {where} ORDER BY {order_by} DESC LIMIT ?",
+            params
+        ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def _resume_filters(
+        self,
+        min_ats_score: Optional[int],
+        max_ats_score: Optional[int],
+        skills: Optional[List[str]],
+        email: Optional[str]
+    ) -> Tuple[str, List[str], list, str]:
+        """(joins, where clauses, params, id column to order by) of resume list filters"""
+        clauses = []
+        params: list = []
+
+        if min_ats_score is not None:
+            clauses.append("r.ats_score >= ?")
+            params.append(min_ats_score)
+        if max_ats_score is not None:
+            clauses.append("r.ats_score <= ?")
+            params.append(max_ats_score)
+        if email:
+            clauses.append("r.email = ?")
+            params.append(email.lower())
+
+        # The first skill drives the scan through the (skill, resume_id) primary key,
+        # any further skills are indexed probes against it
+        joins = ""
+        order_by = "r.id"
+        skills = [skill.strip().lower() for skill in skills or [] if skill.strip()]
+        if skills:
+            joins = "JOIN resume_skills s0 ON s0.resume_id = r.id AND s0.skill = ?"
+            params.insert(0, skills[0])
+            order_by = "s0.resume_id"
+        for skill in skills[1:]:
+            clauses.append("EXISTS (SELECT 1 FROM resume_skills s WHERE s.skill = ? AND s.resume_id = r.id)")
+            params.append(skill)
+
+        return joins, clauses, params, order_by
+
+    def iter_resumes(self, after_id: int = 0, batch_size: int = 500) -> Iterator[Tuple[int, dict]]:
+        decompressor = zstandard.ZstdDecompressor()
+        while True:
+            rows = self._conn.execute(
+                "SELECT id, data, raw_text FROM resumes WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, batch_size)
+            ).fetchall()
+            if not rows:
+                return
+
+            for row in rows:
+                resume = self._decode(row["data"])
+                resume["raw_text"] = decompressor.decompress(row["raw_text"]).decode("utf-8")
+                yield row["id"], resume
+
+            after_id = rows[-1]["id"]
+
+    def resume_ids(self) -> List[int]:
+        rows = self._conn.execute("SELECT id FROM resumes ORDER BY id").fetchall()
+        return [row["id"] for row in rows]
+
+    def export_resumes(
+        self,
+        after_id: int = 0,
+        limit: int = 500,
+        min_ats_score: Optional[int] = None,
+        max_ats_score: Optional[int] = None,
+        skills: Optional[List[str]] = None,
+        email: Optional[str] = None,
+        include_analysis: bool = False
+    ) -> List[dict]:
+        joins, clauses, params, order_by = self._resume_filters(min_ats_score, max_ats_score, skills, email)
+        clauses.append(f"{order_by} > ?")
+        params.append(after_id)
+        params.append(limit)
+
+        # Latest score snapshot / analysis per resume, each an indexed probe by resume_id
+        analysis = (
+            "(SELECT a.data FROM analyses a WHERE a.resume_id = r.id ORDER BY a.created_at DESC LIMIT 1)"
+            if include_analysis else "NULL"
+        )
+        rows = self._conn.execute(
+            f"SELECT r.id, r.filename, r.created_at, r.data, "
+            f"(SELECT sc.data FROM scores sc WHERE sc.resume_id = r.id ORDER BY sc.id DESC LIMIT 1) AS scores, "
+            f"{analysis} AS analysis FROM resumes r "
+            f"{joins} WHERE {' AND '.join(clauses)} ORDER BY {order_by} LIMIT ?",
+            params
+        ).fetchall()
+
+        return [
+            {
+                "id": row["id"],
+                "filename": row["filename"],
+                "created_at": row["created_at"],
+                "resume": self._decode(row["data"]),
+                "scores": self._decode(row["scores"]) if row["scores"] else None,
+                "analysis": self._decode(row["analysis"]) if row["analysis"] else None
+            }
+            for row in rows
+        ]
+
+    def save_signature(self, resume_id: int, signature: bytes, band_keys: List[int]) -> None:
+        with self._write_lock, self._conn as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO minhash_signatures (resume_id, signature) VALUES (?, ?)",
+                (resume_id, signature)
+            )
+            conn.execute("DELETE FROM lsh_bands WHERE resume_id = ?", (resume_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO lsh_bands (band_key, resume_id) VALUES (?, ?)",
+                [(key, resume_id) for key in band_keys]
+            )
+
+    def get_signatures(self, resume_ids: Iterable[int]) -> Dict[int, bytes]:
+        resume_ids = list(resume_ids)
+        signatures = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(resume_ids), 500):
+            chunk = resume_ids[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT resume_id, signature FROM minhash_signatures WHERE resume_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            signatures.update((row["resume_id"], row["signature"]) for row in rows)
+        return signatures
+
+    def find_band_matches(self, band_keys: List[int]) -> List[int]:
+        rows = self._conn.execute(
+            f"SELECT DISTINCT resume_id FROM lsh_bands WHERE band_key IN ({','.join('?' * len(band_keys))})",
+            band_keys
+        ).fetchall()
+        return [row["resume_id"] for row in rows]
+
+    def iter_band_collisions(self) -> Iterator[List[int]]:
+        rows = self._conn.execute(
+            "SELECT group_concat(resume_id) AS ids FROM lsh_bands GROUP BY band_key HAVING count(*) > 1"
+        )
+        for row in rows:
+            yield [int(resume_id) for resume_id in row["ids"].split(",")]
+
+    def unsigned_resume_ids(self) -> List[int]:
+        rows = self._conn.execute(
+            "SELECT r.id FROM resumes r LEFT JOIN minhash_signatures m ON m.resume_id = r.id "
+            "WHERE m.resume_id IS NULL ORDER BY r.id"
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+    def save_chunks(self, resume_id: int, chunks: List[dict]) -> None:
+        with self._write_lock, self._conn as conn:
+            conn.execute("DELETE FROM resume_chunks WHERE resume_id = ?", (resume_id,))
+            conn.executemany(
+                "INSERT INTO resume_chunks (resume_id, seq, section, text, embedding) VALUES (?, ?, ?, ?, ?)",
+                [(resume_id, c["seq"], c["section"], c["text"], c.get("embedding")) for c in chunks]
+            )
+
+    def get_chunks(self, resume_id: int) -> List[dict]:
+        rows = self._conn.execute(
+            "SELECT seq, section, text, embedding FROM resume_chunks WHERE resume_id = ? ORDER BY seq",
+            (resume_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_analysis(self, resume_id: int, scores_key: str, analysis: dict) -> None:
+        with self._write_lock, self._conn as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analyses (resume_id, scores_hash, created_at, data) VALUES (?, ?, ?, ?)",
+                (resume_id, scores_key, time.time(), self._encode(analysis))
+            )
+
+    def get_analysis(self, resume_id: int, scores_key: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT data FROM analyses WHERE resume_id = ? AND scores_hash = ?",
+            (resume_id, scores_key)
+        ).fetchone()
+        return self._decode(row["data"]) if row else None
+
+    def get_latest_analysis(self, resume_id: int) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT data FROM analyses WHERE resume_id = ? ORDER BY created_at DESC LIMIT 1",
+            (resume_id,)
+        ).fetchone()
+        return self._decode(row["data"]) if row else None
+
+    def save_open_jd(self, jd_text: str) -> str:
+        jd_id = jd_hash(jd_text)
+        with self._write_lock, self._conn as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO open_jds (jd_hash, jd_text, created_at) VALUES (?, ?, ?)",
+                (jd_id, jd_text, time.time())
+            )
+        return jd_id
+
+    def close_jd(self, jd_id: str) -> bool:
+        with self._write_lock, self._conn as conn:
+            return conn.execute("DELETE FROM open_jds WHERE jd_hash = ?", (jd_id,)).rowcount > 0
+
+    def list_open_jds(self) -> List[Tuple[str, str]]:
+        rows = self._conn.execute("SELECT jd_hash, jd_text FROM open_jds ORDER BY created_at, jd_hash").fetchall()
+        return [tuple(row) for row in rows]
+
+    def last_jd_score_id(self, jd_id: str) -> int:
+        row = self._conn.execute(
+            "SELECT max(id) AS id FROM scores WHERE jd_hash = ?", (jd_id,)
+        ).fetchone()
+        return row["id"] or 0
+
+    def top_jd_matches(self, jd_id: str, jd_weight: float, limit: int) -> List[Tuple[int, int, int]]:
+        rows = self._conn.execute(
+            "SELECT resume_id, ats_score, match_percentage FROM jd_matches WHERE jd_hash = ? "
+            "ORDER BY round(? * ats_score + ? * match_percentage, 2) DESC, resume_id LIMIT ?",
+            (jd_id, 1 - jd_weight, jd_weight, limit)
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def jd_matches_since(self, jd_id: str, after_score_id: int) -> List[Tuple[int, int, int, int]]:
+        # Score ids follow commit order (SQLite has a single writer), so no match is skipped
+        rows = self._conn.execute(
+            "SELECT s.id, m.resume_id, m.ats_score, m.match_percentage FROM scores s "
+            "JOIN jd_matches m ON m.jd_hash = s.jd_hash AND m.resume_id = s.resume_id "
+            "WHERE s.jd_hash = ? AND s.id > ? ORDER BY s.id",
+            (jd_id, after_score_id)
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+
+STORE_BACKENDS = {
+    "sqlite": lambda: SQLiteResumeStore(settings.STORE_PATH),
+}
+
+_store: Optional[ResumeStore] = None
+
+
+def get_store() -> ResumeStore:
+    """Return the process-wide store for the configured backend"""
+    global _store
+    if _store is None:
+        if settings.STORE_BACKEND not in STORE_BACKENDS:
+            raise ValueError(f"Unknown store backend: {settings.STORE_BACKEND}")
+        _store = STORE_BACKENDS[settings.STORE_BACKEND]()
+    return _store
@@ -0,0 +1,123 @@
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from .admission import LatencyWindow
+from .prompt_budget import get_token_counter
+
+# Set per unit of work (a chat session, an analysis of a resume), see begin_session
+_session: ContextVar[Optional[str]] = ContextVar("usage_session", default=None)
+
+
+def begin_session(session: Optional[str]):
+    """Attribute the LLM calls of the current request or task to a session"""
+    _session.set(session)
+
+
+def current_session() -> Optional[str]:
+    return _session.get()
+
+
+class UsageTotals:
+    """Calls, tokens, cost and latency of a group of LLM calls"""
+
+    def __init__(self, latency_window: int = 0):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.latency = LatencyWindow(latency_window) if latency_window else None
+
+    def add(self, input_tokens: int, output_tokens: int, cost: float, elapsed: float):
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.cost += cost
+        if self.latency is not None:
+            self.latency.add(elapsed)
+
+    def snapshot(self) -> dict:
+        snapshot = {
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 6)
+        }
+        if self.latency is not None:
+            snapshot["latency"] = self.latency.percentiles()
+        return snapshot
+
+
+class TokenLedger:
+    """
+    Token usage of every LLM call, by task, by model and by session
+
+    Counts come from the API's usage metadata when the response has it,
+    else from the local tokenizer. Cost uses per-model prices (USD per
+    million input / output tokens); sessions are kept LRU up to max_sessions.
+    """
+
+    def __init__(self, prices: Dict[str, List[float]], max_sessions: int = 1024):
+        self.prices = prices
+        self.max_sessions = max_sessions
+        self.total = UsageTotals()
+        self.by_task: Dict[str, UsageTotals] = {}
+        self.by_model: Dict[str, UsageTotals] = {}
+        self._sessions: "OrderedDict[str, UsageTotals]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        input_price, output_price = self.prices.get(model, (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def record(self, task: str, model: str, input_tokens: int, output_tokens: int, elapsed: float, session: Optional[str] = None):
+        cost = self.cost(model, input_tokens, output_tokens)
+        session = session if session is not None else current_session()
+        with self._lock:
+            self.total.add(input_tokens, output_tokens, cost, elapsed)
+            self.by_task.setdefault(task, UsageTotals(256)).add(input_tokens, output_tokens, cost, elapsed)
+            self.by_model.setdefault(model, UsageTotals(256)).add(input_tokens, output_tokens, cost, elapsed)
+            if session is not None:
+                totals = self._sessions.get(session)
+                if totals is None:
+                    totals = self._sessions[session] = UsageTotals()
+                    if len(self._sessions) > self.max_sessions:
+                        self._sessions.popitem(last=False)
+                self._sessions.move_to_end(session)
+                totals.add(input_tokens, output_tokens, cost, elapsed)
+
+    def session(self, session: str) -> Optional[dict]:
+        with self._lock:
+            totals = self._sessions.get(session)
+            return totals.snapshot() if totals is not None else None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "total": self.total.snapshot(),
+                "tasks": {task: totals.snapshot() for task, totals in self.by_task.items()},
+                "models": {model: totals.snapshot() for model, totals in self.by_model.items()},
+                "sessions": len(self._sessions)
+            }
+
+
+def usage_counts(message, input_text: str, output_text: str) -> Tuple[int, int]:
+    """(input, output) tokens of a call: the API's usage metadata, else counted locally"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        return usage["input_tokens"], usage.get("output_tokens", 0)
+    counter = get_token_counter()
+    return counter.count(input_text), counter.count(output_text)
+
+
+_ledger: Optional[TokenLedger] = None
+
+
+def get_token_ledger() -> TokenLedger:
+    """Return the process-wide token ledger"""
+    global _ledger
+    if _ledger is None:
+        _ledger = TokenLedger(settings.LLM_TOKEN_PRICES)
+    return _ledger
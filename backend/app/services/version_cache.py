@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.config import settings
+
+
+class VersionCache:
+    """
+    Results of versioned resources, keyed by (kind, version...)
+
+    A version is a content hash of everything the result depends on (resume,
+    scoring profile, score snapshot), so an entry never goes stale, it just
+    stops being asked for. Polling an unchanged resource is a dict lookup
+    instead of a rescore or a new LLM call, and returns the same bytes its
+    ETag was issued for.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[VersionCache] = None
+
+
+def get_version_cache() -> VersionCache:
+    """Return the process-wide version cache"""
+    global _cache
+    if _cache is None:
+        _cache = VersionCache(settings.VERSION_CACHE_SIZE)
+    return _cache
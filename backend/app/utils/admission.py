@@ -0,0 +1,70 @@
+from typing import Iterable, Union
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from ..config import settings
+from ..services.admission import AdmissionRejected, BULK, INTERACTIVE, begin, get_admission
+from ..services.circuit_breaker import CircuitOpen
+
+# Never rate limited (health checks, docs, metrics)
+EXEMPT_PATHS = {
+    "/", "/health", "/docs", "/redoc", "/openapi.json",
+    "/metrics/admission", "/metrics/models", "/metrics/tokens"
+}
+
+def queue_budget(lane: str) -> float:
+    """Seconds work in a lane may wait for a slot before it is shed"""
+    if lane == BULK:
+        return settings.ADMISSION_BULK_QUEUE_SECONDS
+    return settings.ADMISSION_INTERACTIVE_QUEUE_SECONDS
+
+def rejection_response(error: Union[AdmissionRejected, CircuitOpen]) -> ORJSONResponse:
+    return ORJSONResponse(
+        {"detail": error.detail},
+        status_code=error.status_code,
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+async def admission_rejected_handler(request: Request, error: AdmissionRejected) -> ORJSONResponse:
+    return rejection_response(error)
+
+async def circuit_open_handler(request: Request, error: CircuitOpen) -> ORJSONResponse:
+    return rejection_response(error)
+
+class AdmissionMiddleware:
+    """
+    Assign each request a lane and apply per-client rate limits
+
+    The lane comes from the path alone (bulk_paths are bulk) and clients are
+    identified by their address (behind a proxy, the one uvicorn takes from
+    X-Forwarded-For for --forwarded-allow-ips): nothing a caller sends can
+    move it to another lane or a fresh rate-limit bucket. Over-limit
+    requests get 429 with Retry-After; pools shed queued work with 503 (see
+    services.admission).
+    """
+
+    def __init__(self, app: ASGIApp, bulk_paths: Iterable[str] = ()):
+        self.app = app
+        self.bulk_paths = tuple(bulk_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        controller = get_admission()
+        if scope["type"] not in ("http", "websocket") or not controller.enabled or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        lane = BULK if scope["path"].startswith(self.bulk_paths) else INTERACTIVE
+        client = scope["client"][0] if scope.get("client") else "anonymous"
+
+        try:
+            controller.check_rate(client, lane)
+        except AdmissionRejected as e:
+            if scope["type"] == "websocket":
+                # 1013: try again later
+                await send({"type": "websocket.close", "code": 1013, "reason": e.detail})
+            else:
+                await rejection_response(e)(scope, receive, send)
+            return
+
+        begin(lane, queue_budget(lane))
+        await self.app(scope, receive, send)
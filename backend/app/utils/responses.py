@@ -0,0 +1,84 @@
+from typing import Any, Optional, Set, Tuple
+import hashlib
+import ormsgpack
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Versioned resources may be stored, but must be revalidated (If-None-Match) before reuse
+REVALIDATE = "private, no-cache"
+
+class MsgPackResponse(Response):
+    """MessagePack response for API clients that ask for it"""
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return ormsgpack.packb(content, option=ormsgpack.OPT_NON_STR_KEYS | ormsgpack.OPT_SERIALIZE_PYDANTIC)
+
+def wants_msgpack(request: Request) -> bool:
+    """Check the Accept header for a MessagePack media type"""
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+def negotiate(request: Request, content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """
+    Serialize content as MessagePack or JSON depending on the Accept header
+    Returning a Response directly also skips FastAPI's jsonable_encoder pass
+    """
+    response_class = MsgPackResponse if wants_msgpack(request) else ORJSONResponse
+    response = response_class(content, status_code=status_code, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
+
+def make_etag(request: Request, *parts: Any) -> str:
+    """
+    Strong ETag for a resource version, e.g. make_etag(request, "scores", resume_version, profile_version)
+    Each representation (JSON or MessagePack) gets its own tag
+    """
+    key = "|".join(str(part) for part in parts) + ("|msgpack" if wants_msgpack(request) else "|json")
+    return '"' + hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + '"'
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response if the client's If-None-Match already names this version"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    # If-None-Match uses weak comparison, W/"x" matches "x"
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag not in tags and "*" not in tags:
+        return None
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE, "Vary": "Accept"})
+
+def versioned(request: Request, etag: str, content: Any) -> Response:
+    """negotiate() for a versioned resource: ETag and revalidation headers set"""
+    return negotiate(request, content, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
+def parse_fields(fields: Optional[str]) -> Tuple[Optional[Set[str]], Set[str]]:
+    """
+    Parse a field-selection parameter into (include, exclude) sets
+    e.g. "name,email,skills" or "-raw_text"
+    """
+    if not fields:
+        return None, set()
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    include = {name for name in names if not name.startswith("-")}
+    exclude = {name[1:] for name in names if name.startswith("-")}
+    return include or None, exclude
+
+def select_fields(record: dict, fields: Optional[str]) -> dict:
+    """Apply a field-selection parameter to a record"""
+    include, exclude = parse_fields(fields)
+    if include is None and not exclude:
+        return record
+
+    return {
+        key: value for key, value in record.items()
+        if (include is None or key in include) and key not in exclude
+    }
+
+def needs_field(fields: Optional[str], name: str) -> bool:
+    """Whether a field-selection parameter keeps the given field"""
+    include, exclude = parse_fields(fields)
+    return name not in exclude and (include is None or name in include)
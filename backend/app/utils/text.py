@@ -0,0 +1,37 @@
+import re
+from typing import List, Tuple
+
+# Keyword tokens as used by ATS keyword extraction (letters, "+" and "#", e.g. c++, c#)
+KEYWORD_PATTERN = re.compile(r'\b[a-z+#]+\b')
+
+# Search tokens additionally keep digits so queries like "5 years" work
+SEARCH_TOKEN_PATTERN = re.compile(r'\b[a-z0-9+#]+\b')
+
+def tokenize(text: str, pattern: re.Pattern = KEYWORD_PATTERN) -> List[str]:
+    """
+    Lowercase text and split it into tokens, preserving order
+    """
+    return pattern.findall(text.lower())
+
+# A line holding only a known section heading (optionally followed by a colon)
+SECTION_HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?P<heading>(?:professional |career )?summary|about(?: me)?|objective|profile'
+    r'|(?:technical |core )?skills|(?:work |professional )?experience|employment history'
+    r'|education|projects|certifications?|awards|publications|languages|interests|volunteering)'
+    r'[ \t]*:?[ \t]*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+def section_spans(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Split resume text at section heading lines
+    Returns (section, start, end) spans of the body under each heading;
+    text before the first heading is the "header" section
+    """
+    spans = []
+    section, start = "header", 0
+    for match in SECTION_HEADING_PATTERN.finditer(text):
+        spans.append((section, start, match.start()))
+        section, start = match.group("heading").lower(), match.end()
+    spans.append((section, start, len(text)))
+    return [(name, s, e) for name, s, e in spans if text[s:e].strip()]
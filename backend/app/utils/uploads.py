@@ -0,0 +1,123 @@
+import re
+from typing import Iterable, Optional, Tuple
+from fastapi import HTTPException, Request
+from fastapi.datastructures import FormData
+from fastapi.responses import JSONResponse
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .validators import ALLOWED_CONTENT_TYPES, SNIFF_BYTES, sniff_file_type
+
+# Body bytes searched for the first file part's headers before giving up on early sniffing
+SNIFF_WINDOW = 64 * 1024
+
+BOUNDARY_PATTERN = re.compile(rb'boundary="?([^";]+)"?')
+PART_CONTENT_TYPE_PATTERN = re.compile(rb"^content-type:\s*([^\r\n;]+)", re.IGNORECASE | re.MULTILINE)
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds the maximum size of {max_bytes} bytes")
+
+def _first_file_part(head: bytes, boundary: bytes) -> Optional[Tuple[str, bytes, bool]]:
+    """
+    (declared content type, leading content, complete) of the first file part
+    in the start of a multipart body, or None while its headers haven't arrived
+    """
+    parts = head.split(b"--" + boundary)
+    for index, part in enumerate(parts[1:], start=1):
+        headers_end = part.find(b"\r\n\r\n")
+        if headers_end < 0:
+            return None
+        headers = part[:headers_end]
+        if b"filename=" not in headers:
+            continue
+        match = PART_CONTENT_TYPE_PATTERN.search(headers)
+        declared = match.group(1).decode("latin-1").strip().lower() if match else ""
+        # Another delimiter after this part means all of its content is here
+        complete = index < len(parts) - 1
+        return declared, part[headers_end + 4:], complete
+    return None
+
+class UploadLimitMiddleware:
+    """
+    Reject oversized or mislabeled upload bodies before they are spooled
+
+    Requests with a Content-Length above max_bytes are answered with 413 before
+    any body is read; chunked bodies are counted as they stream in and cut off
+    as soon as they cross the limit. The first file part's magic bytes are
+    checked against its declared type as soon as they arrive (400 on a
+    mismatch), so a mislabeled file is refused after its first chunk rather
+    than after the whole body was received.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        boundary = None
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_bytes:
+                error = _too_large(self.max_bytes)
+                response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+                await response(scope, receive, send)
+                return
+            if name == b"content-type" and value.startswith(b"multipart/form-data"):
+                match = BOUNDARY_PATTERN.search(value)
+                boundary = match.group(1) if match else None
+
+        received = 0
+        # Body start kept until the file part is sniffed (None once decided)
+        head: Optional[bytes] = b"" if boundary else None
+
+        async def limited_receive() -> Message:
+            nonlocal received, head
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise _too_large(self.max_bytes)
+                if head is not None:
+                    head += body
+                    part = _first_file_part(head, boundary)
+                    if part is not None:
+                        declared, content, complete = part
+                        if len(content) >= SNIFF_BYTES or complete or not message.get("more_body", False):
+                            head = None
+                            if declared not in ALLOWED_CONTENT_TYPES:
+                                raise HTTPException(status_code=400, detail="Only PDF and DOCX files allowed")
+                            if sniff_file_type(content) != ALLOWED_CONTENT_TYPES[declared]:
+                                raise HTTPException(status_code=400, detail="File content does not match a PDF or DOCX file")
+                    elif len(head) > SNIFF_WINDOW:
+                        # No file part early in the body: the route checks what it receives
+                        head = None
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+class SpooledMultiPartParser(MultiPartParser):
+    """MultiPartParser whose file parts roll over to disk past spool_max_size (per parser, not per process)"""
+
+    def __init__(self, *args, spool_max_size: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.spool_max_size = spool_max_size
+
+async def read_upload_form(request: Request, spool_max_size: int, max_files: int = 1) -> FormData:
+    """
+    Parse a multipart upload, holding at most spool_max_size of each file in memory
+    Starlette spools file parts into a SpooledTemporaryFile that rolls over to
+    disk past this size; the parser reads straight from that file. Close the
+    form when done with it.
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+    parser = SpooledMultiPartParser(request.headers, request.stream(), spool_max_size=spool_max_size, max_files=max_files)
+    try:
+        return await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
@@ -0,0 +1,31 @@
+from typing import BinaryIO, Optional
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+# The PDF header may be preceded by up to 1KB of junk
+SNIFF_BYTES = 1024
+
+ALLOWED_CONTENT_TYPES = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+}
+
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """
+    Detect PDF/DOCX from the leading bytes of a file
+    Returns "pdf", "docx" or None
+    """
+    if PDF_MAGIC in head[:SNIFF_BYTES]:
+        return "pdf"
+    # DOCX is a ZIP container
+    if head.startswith(ZIP_MAGIC):
+        return "docx"
+    return None
+
+def sniff_stream(stream: BinaryIO) -> Optional[str]:
+    """Sniff a seekable stream without moving its position"""
+    position = stream.tell()
+    head = stream.read(SNIFF_BYTES)
+    stream.seek(position)
+    return sniff_file_type(head)
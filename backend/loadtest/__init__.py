@@ -0,0 +1 @@
+"""Load-testing harness: LLM stub server and traffic driver"""
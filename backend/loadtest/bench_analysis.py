@@ -0,0 +1,136 @@
+"""
+Benchmark the AI analysis modes against each other
+
+Runs AIAnalyser in "sections" mode (one LLM call per part) and "combined"
+mode (one structured call, per-part fallback) on the same synthetic resumes
+and reports latency, LLM calls and token usage per analysis.
+
+Usage:
+    # Against a local stub (started here), 20 resumes, 200 ms per LLM call
+    python -m loadtest.bench_analysis --spawn --resumes 20 --stub-args="--latency fixed:0.2"
+
+    # Against the configured Groq endpoint (GROQ_API_KEY / GROQ_BASE_URL)
+    python -m loadtest.bench_analysis --resumes 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .runner import make_resume_docx, percentile, wait_until_ready
+
+
+class UsageCounter(BaseCallbackHandler):
+    """Counts LLM calls and tokens reported by the API"""
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_llm_end(self, response, **kwargs):
+        self.calls += 1
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.input_tokens += usage.get("input_tokens", 0)
+                self.output_tokens += usage.get("output_tokens", 0)
+
+
+def build_cases(count: int, jd_text: str) -> List[tuple]:
+    """(resume, scores) pairs from synthetic DOCX resumes"""
+    from app.services.ats_scorer import ATSScorer
+    from app.services.parser import ResumeParser
+
+    parser, scorer = ResumeParser(), ATSScorer()
+    cases = []
+    for index in range(count):
+        resume = parser.parse(make_resume_docx(index), f"resume_{index}.docx")
+        cases.append((resume, scorer.score_resume(resume, jd_text or None)))
+    return cases
+
+
+async def bench_mode(mode: str, cases: List[tuple]) -> Dict:
+    from app.services.ai_analyser import AIAnalyser
+
+    analyser = AIAnalyser(mode=mode)
+    counter = UsageCounter()
+    analyser.router.callbacks = [counter]
+
+    latencies, failures = [], 0
+    for resume, scores in cases:
+        started = time.perf_counter()
+        try:
+            await analyser.analyze_resume(resume, scores)
+        except Exception:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    count = len(cases)
+    return {
+        "analyses": count,
+        "failures": failures,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "llm_calls_per_analysis": round(counter.calls / count, 2),
+        "input_tokens_per_analysis": round(counter.input_tokens / count, 1),
+        "output_tokens_per_analysis": round(counter.output_tokens / count, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spawn", action="store_true", help="Start loadtest.stub_llm and point the analyser at it")
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--stub-args", default="--latency fixed:0.2")
+    parser.add_argument("--resumes", type=int, default=10)
+    parser.add_argument("--jd", default="", help="Optional job description text to score against")
+    parser.add_argument("--modes", default="sections,combined")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    stub = None
+    if args.spawn:
+        stub_url = f"http://127.0.0.1:{args.stub_port}"
+        stub = subprocess.Popen(
+            [sys.executable, "-m", "loadtest.stub_llm", "--port", str(args.stub_port), *shlex.split(args.stub_args)],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        wait_until_ready(f"{stub_url}/stats")
+        os.environ["GROQ_BASE_URL"] = stub_url
+        for name in ("GROQ_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+            os.environ.setdefault(name, "stub")
+
+    try:
+        cases = build_cases(args.resumes, args.jd)
+        report = {mode: asyncio.run(bench_mode(mode, cases)) for mode in args.modes.split(",")}
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait(timeout=10)
+
+    header = f"{'mode':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'calls':>7} {'in tok':>9} {'out tok':>9} {'fail':>5}"
+    print(header)
+    print("-" * len(header))
+    for mode, row in report.items():
+        print(
+            f"{mode:<10} {row['mean_ms']:>9} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['llm_calls_per_analysis']:>7} "
+            f"{row['input_tokens_per_analysis']:>9} {row['output_tokens_per_analysis']:>9} {row['failures']:>5}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
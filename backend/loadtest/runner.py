@@ -0,0 +1,307 @@
+"""
+End-to-end load driver for the ResuMetrix API
+
+Runs virtual users against a running backend (or spawns one under several
+uvicorn workers together with the LLM stub), each doing a realistic mix of
+upload / score / analyze / chat traffic, and reports throughput, latency
+percentiles and error rates per endpoint.
+
+Usage:
+    # Spawn the stub and 4 app workers, run 50 users for 60s
+    python -m loadtest.runner --spawn --workers 4 --users 50 --duration 60
+
+    # Against an already running deployment
+    python -m loadtest.runner --target http://127.0.0.1:8000 --users 20 --duration 30
+
+    # Replay recorded LLM responses instead of canned ones
+    python -m loadtest.runner --spawn --stub-args="--mode replay --cassette groq.jsonl"
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+DEFAULT_MIX = "upload=1,score=3,score_jd=1,analyze=1,chat=4"
+
+SKILL_POOL = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Node.js", "SQL", "PostgreSQL",
+    "AWS", "Docker", "Kubernetes", "Terraform", "Git", "Redis", "Kafka", "FastAPI", "Django"
+]
+
+QUESTIONS = [
+    "How can I improve my summary?",
+    "Which skills should I add for a backend role?",
+    "Why is my experience score low?",
+    "Is my resume ATS friendly?",
+    "What should I highlight for a senior engineer position?",
+]
+
+JOB_DESCRIPTIONS = [
+    "Senior backend engineer with Python, Kubernetes, Terraform and AWS. 5 years experience building microservices.",
+    "Frontend developer skilled in React, TypeScript and CSS, with agile and CI/CD experience.",
+    "Data engineer with SQL, Kafka, Spark and Airflow experience; cloud data pipelines on GCP.",
+]
+
+
+def make_resume_docx(index: int) -> bytes:
+    """Build a synthetic DOCX resume"""
+    from docx import Document
+
+    rng = random.Random(index)
+    skills = rng.sample(SKILL_POOL, rng.randint(5, 12))
+    document = Document()
+    for paragraph in [
+        f"Candidate {index}",
+        f"candidate{index}@example.com  555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        "",
+        "Summary",
+        f"Engineer with {rng.randint(1, 12)} years of experience. Led and developed services used by millions.",
+        "",
+        "Skills",
+        ", ".join(skills),
+        "",
+        "Experience",
+        f"Software Engineer at Company {rng.randint(1, 50)}, {rng.randint(1, 6)} years. "
+        f"Improved latency by {rng.randint(10, 60)}%. Worked on microservices with agile scrum.",
+        "",
+        "Education",
+        f"Bachelor of Science in Computer Science, University {rng.randint(1, 20)}, {rng.randint(2005, 2022)}",
+    ]:
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Metrics:
+    """Per-endpoint latency samples and status counts"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint: str, elapsed: float, status: int):
+        self.latencies[endpoint].append(elapsed)
+        self.statuses[endpoint][status] += 1
+        if status == 0 or status >= 400:
+            self.errors[endpoint] += 1
+
+    def report(self, duration: float) -> dict:
+        report = {}
+        for endpoint in sorted(self.latencies):
+            samples = sorted(self.latencies[endpoint])
+            count = len(samples)
+            report[endpoint] = {
+                "requests": count,
+                "throughput_rps": round(count / duration, 2),
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1),
+                "error_rate": round(self.errors[endpoint] / count, 4),
+                "statuses": dict(self.statuses[endpoint]),
+            }
+        return report
+
+
+class VirtualUser:
+    """One simulated user: uploads a resume, then mixes the other calls"""
+
+    def __init__(self, index: int, client: httpx.AsyncClient, metrics: Metrics, mix: Dict[str, float], think_time: float):
+        self.index = index
+        self.client = client
+        self.metrics = metrics
+        self.mix = mix
+        self.think_time = think_time
+        self.resume_id: Optional[int] = None
+        self.scored = False
+        # Own address (uvicorn trusts X-Forwarded-For from localhost), so each user gets its own rate limit
+        self.address = f"10.0.{index // 256}.{index % 256}"
+
+    async def _call(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers={"X-Forwarded-For": self.address}, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        self.metrics.record(endpoint, time.perf_counter() - started, status)
+        return response
+
+    async def upload(self):
+        files = {"file": (f"resume_{self.index}.docx", make_resume_docx(self.index), DOCX_MEDIA_TYPE)}
+        response = await self._call("upload", "POST", "/documents/upload-resume", files=files, params={"fields": "-raw_text"})
+        if response is not None and response.status_code == 200:
+            self.resume_id = response.json()["resume_id"]
+            self.scored = False
+
+    async def score(self):
+        response = await self._call("score", "GET", "/scoring/score-resume", params={"resume_id": self.resume_id})
+        self.scored = self.scored or (response is not None and response.status_code == 200)
+
+    async def score_jd(self):
+        jd_text = random.choice(JOB_DESCRIPTIONS)
+        response = await self._call("score_jd", "POST", "/scoring/score-with-jd", params={"resume_id": self.resume_id}, json={"jd_text": jd_text})
+        self.scored = self.scored or (response is not None and response.status_code == 200)
+
+    async def analyze(self):
+        if not self.scored:
+            await self.score()
+        await self._call("analyze", "GET", "/analysis/analyze-resume", params={"resume_id": self.resume_id})
+
+    async def chat(self):
+        await self._call("chat", "POST", "/chatbot/ask", json={"message": random.choice(QUESTIONS), "resume_id": self.resume_id})
+
+    async def run(self, deadline: float):
+        actions = list(self.mix)
+        weights = [self.mix[action] for action in actions]
+        while time.monotonic() < deadline:
+            action = "upload" if self.resume_id is None else random.choices(actions, weights)[0]
+            await getattr(self, action)()
+            if self.think_time:
+                await asyncio.sleep(random.expovariate(1 / self.think_time))
+
+
+async def run_load(target: str, users: int, duration: float, mix: Dict[str, float], think_time: float, ramp_up: float, timeout: float) -> dict:
+    """Drive `users` concurrent virtual users for `duration` seconds"""
+    metrics = Metrics()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        started = time.monotonic()
+        deadline = started + duration
+
+        async def start_user(index: int):
+            await asyncio.sleep(ramp_up * index / max(users, 1))
+            await VirtualUser(index, client, metrics, mix, think_time).run(deadline)
+
+        await asyncio.gather(*(start_user(i) for i in range(users)))
+        elapsed = time.monotonic() - started
+
+    return metrics.report(elapsed)
+
+
+def wait_until_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+def spawn(args) -> List[subprocess.Popen]:
+    """Start the LLM stub and the app under uvicorn with several workers"""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp(prefix="resumetrix-load-")
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "loadtest.stub_llm", "--port", str(args.stub_port), *shlex.split(args.stub_args)],
+        cwd=backend_dir
+    )
+    wait_until_ready(f"{stub_url}/stats")
+
+    env = {
+        **os.environ,
+        "GROQ_BASE_URL": stub_url,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "stub"),
+        "PINECONE_API_KEY": os.environ.get("PINECONE_API_KEY", "stub"),
+        "PINECONE_ENVIRONMENT": os.environ.get("PINECONE_ENVIRONMENT", "stub"),
+        "PINECONE_INDEX_NAME": os.environ.get("PINECONE_INDEX_NAME", "stub"),
+        "STORE_PATH": os.path.join(workdir, "resumetrix.db"),
+        "SEARCH_INDEX_PATH": os.path.join(workdir, "search_index"),
+        "PYTHONPATH": backend_dir,
+    }
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=backend_dir,
+        env=env
+    )
+    wait_until_ready(f"http://127.0.0.1:{args.port}/health")
+    return [app, stub]
+
+
+def print_report(report: dict):
+    header = f"{'endpoint':<10} {'reqs':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, row in report.items():
+        print(
+            f"{endpoint:<10} {row['requests']:>7} {row['throughput_rps']:>8} {row['p50_ms']:>9} "
+            f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['error_rate']:>8.2%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Base URL of a running backend (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="Start the LLM stub and the app locally")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn workers when spawning")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--stub-args", default="--latency lognormal:0.6,0.5", help="Extra arguments for loadtest.stub_llm")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=0.5, help="Mean pause between a user's requests")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Relative weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    if not args.spawn and not args.target:
+        parser.error("either --target or --spawn is required")
+
+    processes = spawn(args) if args.spawn else []
+    target = f"http://127.0.0.1:{args.port}" if args.spawn else args.target
+    try:
+        report = asyncio.run(run_load(
+            target, args.users, args.duration, parse_mix(args.mix),
+            args.think_time, args.ramp_up, args.timeout
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Local OpenAI/Groq-compatible chat completions server for load tests
+
+Modes:
+- stub:   canned responses shaped like what the app's prompts expect
+- record: forward to the real API and append every exchange to a cassette
+- replay: answer from a cassette, deterministically
+
+Usage:
+    python -m loadtest.stub_llm --port 9100 --latency lognormal:0.8,0.5 --error-rate 0.02
+    python -m loadtest.stub_llm --mode record --cassette groq.jsonl
+    python -m loadtest.stub_llm --mode replay --cassette groq.jsonl --latency fixed:0.2
+    python -m loadtest.stub_llm --latency fixed:1.5 --model-latency llama-3.1-8b-instant=fixed:0.2
+
+Point the backend at it with GROQ_BASE_URL=http://127.0.0.1:9100
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_UPSTREAM = "https://api.groq.com"
+
+
+class LatencyModel:
+    """
+    Latency distribution parsed from a spec string (seconds)
+
+    fixed:0.5 | uniform:0.2,1.5 | lognormal:<median>,<sigma> | exp:<mean>
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        if kind == "fixed":
+            self._sample = lambda: values[0] if values else 0.0
+        elif kind == "uniform":
+            self._sample = lambda: random.uniform(values[0], values[1])
+        elif kind == "lognormal":
+            median, sigma = values
+            self._sample = lambda: random.lognormvariate(0, sigma) * median
+        elif kind == "exp":
+            self._sample = lambda: random.expovariate(1 / values[0])
+        else:
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self) -> float:
+        return max(self._sample(), 0.0)
+
+
+def request_key(body: dict) -> str:
+    """Cassette key: everything that influences the completion"""
+    relevant = {k: body.get(k) for k in ("model", "messages", "temperature", "response_format", "tools", "stream")}
+    return hashlib.sha256(orjson.dumps(relevant, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+CANNED_FEEDBACK = {
+    "overall_critique": "Solid technical profile; quantify impact more consistently.",
+    "strengths": ["Relevant technical skills", "Clear structure", "Recent experience"],
+    "weaknesses": ["Few metrics", "Generic summary", "Missing keywords"],
+    "score_reasoning": "The score reflects good section coverage but limited keyword density."
+}
+
+CANNED_KEYWORDS = {
+    "missing_keywords": [],
+    "suggested_additions": ["CI/CD", "Kubernetes", "Terraform", "Observability", "REST APIs"],
+    "reasoning": "These terms are common in ATS filters for this kind of role."
+}
+
+
+def canned_improvement(section: str) -> dict:
+    return {
+        "section": section,
+        "current_quality": "Present but thin.",
+        "suggestions": ["Add measurable outcomes", "Use role-specific keywords", "Tighten wording"]
+    }
+
+
+def canned_content(messages: List[dict]) -> str:
+    """
+    Produce a reply shaped like what the app's prompt asks for
+    (JSON schemas for AIAnalyser in both modes, yes/no for relevance checks,
+    prose otherwise)
+    """
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+
+    if 'Answer with ONLY "yes" or "no"' in prompt:
+        return "yes"
+    if '"section_improvements"' in prompt:
+        # Combined analysis: one improvement per listed weak section
+        sections = re.findall(r"^- (\w+) \(score", prompt, re.MULTILINE)
+        return json.dumps({
+            "feedback": CANNED_FEEDBACK,
+            "section_improvements": [canned_improvement(section) for section in sections],
+            "keyword_suggestions": CANNED_KEYWORDS
+        })
+    if '"overall_critique"' in prompt:
+        return json.dumps(CANNED_FEEDBACK)
+    if '"current_quality"' in prompt:
+        section = re.search(r"For the (\w+) section", prompt)
+        return json.dumps(canned_improvement(section.group(1) if section else "summary"))
+    if '"suggested_additions"' in prompt:
+        return json.dumps(CANNED_KEYWORDS)
+    if "JSON" in prompt:
+        return "{}"
+    return "Your resume highlights relevant experience; add quantified results to your most recent role."
+
+
+def completion_body(model: str, content: str, prompt_tokens: int) -> dict:
+    completion_tokens = max(len(content) // 4, 1)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+
+def stream_chunks(model: str, content: str) -> List[str]:
+    """Split a completion into SSE chunk payloads"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    tokens = re.findall(r"\S+\s*|\s+", content) or [""]
+
+    def chunk(delta: dict, finish_reason: Optional[str] = None) -> str:
+        return orjson.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }).decode()
+
+    chunks = [chunk({"role": "assistant", "content": ""})]
+    chunks.extend(chunk({"content": token}) for token in tokens)
+    chunks.append(chunk({}, "stop"))
+    return chunks
+
+
+class Cassette:
+    """Append-only JSONL store of recorded exchanges"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def add(self, entry: dict):
+        self.entries[entry["key"]] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def create_app(
+    mode: str = "stub",
+    latency: str = "fixed:0",
+    token_delay: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    cassette: Optional[str] = None,
+    upstream: str = DEFAULT_UPSTREAM,
+    seed: Optional[int] = None,
+    model_latency: Optional[Dict[str, str]] = None
+) -> FastAPI:
+    """Build the stub server app"""
+    if seed is not None:
+        random.seed(seed)
+    if mode in ("record", "replay") and not cassette:
+        raise ValueError(f"--cassette is required in {mode} mode")
+
+    default_latency = LatencyModel(latency)
+    latency_by_model = {model: LatencyModel(spec) for model, spec in (model_latency or {}).items()}
+    tape = Cassette(cassette) if cassette else None
+    app = FastAPI(title="LLM stub")
+    app.state.stats = {"requests": 0, "errors": 0, "replay_misses": 0}
+
+    async def replay_stream(chunks: List[str]) -> AsyncIterator[bytes]:
+        for payload in chunks:
+            if token_delay:
+                await asyncio.sleep(token_delay)
+            yield f"data: {payload}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    async def forward(request: Request, body: dict) -> dict:
+        headers = {"Authorization": request.headers.get("authorization", ""), "Content-Type": "application/json"}
+        started = time.perf_counter()
+        async with httpx.AsyncClient(base_url=upstream, timeout=120) as client:
+            if not body.get("stream"):
+                response = await client.post("/openai/v1/chat/completions", json=body, headers=headers)
+                return {"status": response.status_code, "body": response.json(), "elapsed": time.perf_counter() - started}
+
+            chunks = []
+            async with client.stream("POST", "/openai/v1/chat/completions", json=body, headers=headers) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: ") and line != "data: [DONE]":
+                        chunks.append(line[len("data: "):])
+            return {"status": response.status_code, "chunks": chunks, "elapsed": time.perf_counter() - started}
+
+    @app.post("/openai/v1/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.stats["requests"] += 1
+        model = body.get("model", "stub")
+        latency_model = latency_by_model.get(model, default_latency)
+        messages = body.get("messages", [])
+        key = request_key(body)
+
+        if mode == "record":
+            entry = await forward(request, body)
+            entry["key"] = key
+            if entry["status"] == 200:
+                tape.add(entry)
+        else:
+            if random.random() < error_rate:
+                app.state.stats["errors"] += 1
+                await asyncio.sleep(latency_model.sample())
+                return JSONResponse(
+                    {"error": {"message": "Injected failure", "type": "stub_error"}},
+                    status_code=error_status
+                )
+
+            entry = tape.get(key) if mode == "replay" else None
+            if mode == "replay" and entry is None:
+                app.state.stats["replay_misses"] += 1
+                return JSONResponse(
+                    {"error": {"message": f"No recording for request {key}", "type": "replay_miss"}},
+                    status_code=404
+                )
+            if entry is None:
+                content = canned_content(messages)
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+                if body.get("stream"):
+                    entry = {"status": 200, "chunks": stream_chunks(model, content)}
+                else:
+                    entry = {"status": 200, "body": completion_body(model, content, prompt_tokens)}
+
+            await asyncio.sleep(latency_model.sample())
+
+        if "chunks" in entry:
+            return StreamingResponse(replay_stream(entry["chunks"]), media_type="text/event-stream")
+        return JSONResponse(entry["body"], status_code=entry["status"])
+
+    @app.get("/stats")
+    async def stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--mode", choices=["stub", "record", "replay"], default="stub")
+    parser.add_argument("--latency", default="fixed:0", help="fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA | exp:MEAN")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC", help="Latency for one model (repeatable)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--cassette", help="JSONL file for record/replay")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    app = create_app(
+        mode=args.mode,
+        latency=args.latency,
+        token_delay=args.token_delay,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        cassette=args.cassette,
+        upstream=args.upstream,
+        seed=args.seed,
+        model_latency=dict(spec.split("=", 1) for spec in args.model_latency)
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
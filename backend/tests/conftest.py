@@ -0,0 +1,5 @@
+import os
+
+# Settings require these; the tests never reach the services behind them
+for name in ("GROQ_API_KEY", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME"):
+    os.environ.setdefault(name, "test")
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import admission
+from app.services.admission import BULK, INTERACTIVE, AdmissionController, AdmissionRejected, LanePool, current_lane
+from app.utils.admission import AdmissionMiddleware, admission_rejected_handler
+
+RATES = {INTERACTIVE: (0.01, 3), BULK: (0.01, 2)}
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    controller = AdmissionController(rates=RATES)
+    monkeypatch.setattr(admission, "_controller", controller)
+    return controller
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware, bulk_paths=["/export"])
+    app.add_exception_handler(AdmissionRejected, admission_rejected_handler)
+
+    @app.get("/lane")
+    @app.get("/export/lane")
+    @app.get("/metrics/models")
+    async def lane():
+        return {"lane": current_lane()}
+
+    return app
+
+
+def test_lane_comes_from_the_path(app, controller):
+    client = TestClient(app)
+    assert client.get("/lane").json() == {"lane": INTERACTIVE}
+    assert client.get("/export/lane").json() == {"lane": BULK}
+    # Callers can't promote bulk work (or demote anything) with a header
+    assert client.get("/export/lane", headers={"X-Priority": "interactive"}).json() == {"lane": BULK}
+    assert client.get("/lane", headers={"X-Priority": "bulk"}).json() == {"lane": INTERACTIVE}
+
+
+def test_rate_limit_answers_429_with_retry_after(app, controller):
+    client = TestClient(app)
+    assert [client.get("/lane").status_code for _ in range(3)] == [200, 200, 200]
+
+    response = client.get("/lane")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert controller.rate_limited[INTERACTIVE] == 1
+
+
+def test_rate_limit_is_keyed_on_the_peer_address(app, controller):
+    client = TestClient(app, client=("10.0.0.1", 5000))
+    statuses = [client.get("/lane", headers={"X-Client-Id": f"client-{i}"}).status_code for i in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+    other = TestClient(app, client=("10.0.0.2", 5000))
+    assert other.get("/lane").status_code == 200
+
+
+def test_lanes_have_separate_buckets(app, controller):
+    client = TestClient(app)
+    assert [client.get("/export/lane").status_code for _ in range(3)] == [200, 200, 429]
+    assert client.get("/lane").status_code == 200
+
+
+def test_metrics_are_exempt(app, controller):
+    client = TestClient(app)
+    assert all(client.get("/metrics/models").status_code == 200 for _ in range(10))
+
+
+def test_bulk_is_capped_and_interactive_goes_first():
+    async def scenario():
+        pool = LanePool("cpu", capacity=2, bulk_share=0.5)
+        assert pool.bulk_limit == 1
+
+        await pool.acquire(BULK, None)
+        waiting_bulk = asyncio.ensure_future(pool.acquire(BULK, None))
+        await asyncio.sleep(0)
+        assert not waiting_bulk.done()
+
+        # The free slot goes to interactive work even though bulk work was queued first
+        await pool.acquire(INTERACTIVE, None)
+        waiting_interactive = asyncio.ensure_future(pool.acquire(INTERACTIVE, None))
+        await asyncio.sleep(0)
+
+        pool.release(INTERACTIVE, 0.01)
+        await asyncio.sleep(0)
+        assert waiting_interactive.done() and not waiting_bulk.done()
+
+        pool.release(BULK, 0.01)
+        await asyncio.sleep(0)
+        assert waiting_bulk.done()
+        assert pool.active == {INTERACTIVE: 1, BULK: 1}
+
+    asyncio.run(scenario())
+
+
+def test_work_past_its_deadline_is_shed():
+    async def scenario():
+        pool = LanePool("llm", capacity=1)
+        await pool.acquire(INTERACTIVE, None)
+        with pytest.raises(AdmissionRejected) as error:
+            await pool.acquire(INTERACTIVE, time.monotonic() + 0.05)
+        assert error.value.status_code == 503
+        assert pool.shed[INTERACTIVE] == 1
+
+    asyncio.run(scenario())
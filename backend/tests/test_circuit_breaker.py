@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+OPEN_SECONDS = 0.05
+
+
+@pytest.fixture
+def breaker():
+    return CircuitBreaker("llm", window=10, min_calls=4, failure_rate=0.5, slow_seconds=1.0, open_seconds=OPEN_SECONDS)
+
+
+def call(breaker, ok, elapsed=0.0):
+    probe = breaker.acquire()
+    breaker.release(probe, ok, elapsed)
+    return probe
+
+
+def trip(breaker):
+    for _ in range(4):
+        call(breaker, False)
+    assert breaker.state == OPEN
+
+
+def test_opens_once_enough_calls_fail(breaker):
+    for ok in (False, False, True):
+        call(breaker, ok)
+    # Too few calls to judge, however many failed
+    assert breaker.state == CLOSED
+    call(breaker, True)
+    assert breaker.state == OPEN
+    assert breaker.opened == 1
+
+
+def test_slow_calls_count_as_failures(breaker):
+    for _ in range(4):
+        call(breaker, True, elapsed=2.0)
+    assert breaker.state == OPEN
+
+
+def test_open_circuit_refuses_calls(breaker):
+    trip(breaker)
+    with pytest.raises(CircuitOpen) as error:
+        breaker.acquire()
+    assert error.value.status_code == 503
+    assert error.value.retry_after == 1
+    assert breaker.rejected == 1
+    assert breaker.is_open()
+
+
+def test_good_probe_closes(breaker):
+    trip(breaker)
+    time.sleep(OPEN_SECONDS)
+
+    assert not breaker.is_open()
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    probe = breaker.acquire()
+    assert probe is True
+    # Only one probe at a time
+    with pytest.raises(CircuitOpen):
+        breaker.acquire()
+
+    breaker.release(probe, True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.snapshot()["recent_calls"] == 0
+
+
+@pytest.mark.parametrize("ok, elapsed", [(False, 0.1), (True, 2.0)])
+def test_failed_or_slow_probe_reopens(breaker, ok, elapsed):
+    trip(breaker)
+    time.sleep(OPEN_SECONDS)
+
+    call(breaker, ok, elapsed)
+    assert breaker.state == OPEN
+    assert breaker.opened == 2
+
+
+def test_abandoned_probe_frees_its_slot(breaker):
+    trip(breaker)
+    time.sleep(OPEN_SECONDS)
+
+    breaker.release(breaker.acquire(), None)
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    assert call(breaker, True) is True
+    assert breaker.state == CLOSED
+
+
+def test_calls_from_before_opening_dont_decide_a_probe(breaker):
+    late = breaker.acquire()
+    trip(breaker)
+    time.sleep(OPEN_SECONDS)
+    assert not breaker.is_open()
+
+    breaker.release(late, False)
+    assert breaker.snapshot()["state"] == HALF_OPEN
+
+
+def test_record_failure_counts_timeouts_before_release(breaker):
+    probe = breaker.acquire()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    # The failing-over call's own outcome no longer counts once open
+    breaker.release(probe, False)
+    assert breaker.snapshot()["recent_calls"] == 0
+    assert breaker.opened == 1
+
+
+def test_record_failure_ignored_unless_closed(breaker):
+    trip(breaker)
+    breaker.record_failure()
+    time.sleep(OPEN_SECONDS)
+    assert not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == HALF_OPEN
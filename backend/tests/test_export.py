@@ -0,0 +1,76 @@
+import asyncio
+import csv
+import io
+
+import orjson
+import pytest
+import zstandard
+
+from app.services.export import CSV_COLUMNS, ResultExporter
+from app.services.store import SQLiteResumeStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteResumeStore(str(tmp_path / "resumes.db"))
+    for i in range(11):
+        resume_id = store.save_resume(
+            {"name": f"Candidate {i}", "email": f"c{i}@example.com", "skills": ["Python"] if i % 2 else ["Java"], "raw_text": "..."},
+            filename=f"cv{i}.pdf"
+        )
+        store.save_scores(resume_id, {"ats_score": 5 * i, "section_scores": {"skills": 50}})
+    return store
+
+
+def export(store, fmt="ndjson", compression=None, **kwargs) -> bytes:
+    exporter = ResultExporter(store, fmt, compression=compression, batch_size=3)
+
+    async def collect():
+        return b"".join([chunk async for chunk in exporter.stream(**kwargs)])
+
+    return asyncio.run(collect())
+
+
+def ndjson_ids(body: bytes):
+    return [orjson.loads(line)["resume_id"] for line in body.splitlines()]
+
+
+def test_rows_come_in_resume_id_order(store):
+    body = export(store)
+    assert ndjson_ids(body) == store.resume_ids()
+    first = orjson.loads(body.splitlines()[0])
+    assert first["resume"]["name"] == "Candidate 0"
+    assert first["scores"]["ats_score"] == 0
+
+
+def test_interrupted_export_resumes_from_the_cursor(store):
+    ids = store.resume_ids()
+    received = ndjson_ids(export(store, limit=4))
+    assert received == ids[:4]
+
+    # cursor = the last resume_id received
+    rest = ndjson_ids(export(store, after_id=received[-1]))
+    assert received + rest == ids
+    assert export(store, after_id=ids[-1]) == b""
+
+
+def test_resumed_export_keeps_filters(store):
+    python_ids = ndjson_ids(export(store, skills=["python"], min_ats_score=10))
+    assert python_ids == store.resume_ids()[3::2]
+
+    head = ndjson_ids(export(store, limit=2, skills=["python"], min_ats_score=10))
+    tail = ndjson_ids(export(store, after_id=head[-1], skills=["python"], min_ats_score=10))
+    assert head + tail == python_ids
+
+
+def test_resumed_csv_and_zstd_exports(store):
+    ids = store.resume_ids()
+    compressed = export(store, "csv", compression="zstd", limit=5)
+    rows = list(csv.reader(io.StringIO(zstandard.ZstdDecompressor().decompressobj().decompress(compressed).decode("utf-8"))))
+    assert rows[0] == CSV_COLUMNS
+    received = [int(row[0]) for row in rows[1:]]
+    assert received == ids[:5]
+
+    rest = list(csv.reader(io.StringIO(export(store, "csv", after_id=received[-1]).decode("utf-8"))))
+    assert rest[0] == CSV_COLUMNS
+    assert received + [int(row[0]) for row in rest[1:]] == ids
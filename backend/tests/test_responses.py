@@ -0,0 +1,75 @@
+from typing import Optional
+
+import orjson
+import ormsgpack
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.responses import make_etag, needs_field, negotiate, not_modified, parse_fields, select_fields, versioned
+
+RESUME = {"name": "Jane Doe", "email": "jane@example.com", "skills": ["Python", "AWS"], "raw_text": "Jane Doe ...", 1: "int key"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+
+    @app.get("/resume")
+    async def resume(request: Request, fields: Optional[str] = None):
+        return negotiate(request, {"status": "success", "resume": select_fields(RESUME, fields)})
+
+    @app.get("/versioned")
+    async def versioned_resume(request: Request):
+        etag = make_etag(request, "resume", 1)
+        return not_modified(request, etag) or versioned(request, etag, {"name": "Jane Doe"})
+
+    return TestClient(app)
+
+
+def test_json_by_default(client):
+    response = client.get("/resume")
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["vary"] == "Accept"
+    assert response.json()["resume"]["skills"] == ["Python", "AWS"]
+
+
+@pytest.mark.parametrize("accept", ["application/msgpack", "application/x-msgpack", "application/msgpack, application/json;q=0.5"])
+def test_msgpack_when_accepted(client, accept):
+    response = client.get("/resume", headers={"Accept": accept})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["vary"] == "Accept"
+    body = ormsgpack.unpackb(response.content, option=ormsgpack.OPT_NON_STR_KEYS)
+    assert body == {"status": "success", "resume": RESUME}
+
+
+def test_json_and_msgpack_carry_the_same_content(client):
+    as_json = orjson.loads(client.get("/resume?fields=name,skills").content)
+    as_msgpack = ormsgpack.unpackb(client.get("/resume?fields=name,skills", headers={"Accept": "application/msgpack"}).content)
+    assert as_json == as_msgpack == {"status": "success", "resume": {"name": "Jane Doe", "skills": ["Python", "AWS"]}}
+
+
+def test_fields_include_and_exclude(client):
+    assert client.get("/resume?fields=email").json()["resume"] == {"email": "jane@example.com"}
+    assert set(client.get("/resume?fields=-raw_text,-email").json()["resume"]) == {"name", "skills", "1"}
+    assert client.get("/resume?fields=name,-name").json()["resume"] == {}
+    assert client.get("/resume?fields=").json()["resume"]["raw_text"] == "Jane Doe ..."
+
+
+def test_parse_fields():
+    assert parse_fields(None) == (None, set())
+    assert parse_fields(" name, email ,,-raw_text") == ({"name", "email"}, {"raw_text"})
+    assert needs_field("-raw_text", "raw_text") is False
+    assert needs_field("name", "raw_text") is False
+    assert needs_field(None, "raw_text") is True
+
+
+def test_etag_per_representation_and_304(client):
+    as_json = client.get("/versioned")
+    as_msgpack = client.get("/versioned", headers={"Accept": "application/msgpack"})
+    assert as_json.headers["etag"] != as_msgpack.headers["etag"]
+
+    revalidated = client.get("/versioned", headers={"If-None-Match": f'W/{as_json.headers["etag"]}'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert client.get("/versioned", headers={"Accept": "application/msgpack", "If-None-Match": as_json.headers["etag"]}).status_code == 200
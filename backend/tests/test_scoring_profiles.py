@@ -0,0 +1,99 @@
+import pytest
+
+from app.services.ats_scorer import ATSScorer
+from app.services.scoring_profiles import get_profile_registry
+
+JD_TEXT = "Python AWS Docker engineer"
+
+RESUMES = {
+    "senior": {
+        "name": "Jane Doe",
+        "email": "jane@example.com",
+        "phone": "+1 555 010 2000",
+        "summary": "Senior software engineer with 8 years of experience building scalable backend systems and leading teams in agile environments.",
+        "skills": ["Python", "Django", "PostgreSQL", "AWS", "Docker", "Kubernetes", "React", "Leadership", "Communication"],
+        "raw_text": (
+            "Jane Doe\nSummary\nSenior software engineer\nExperience\nSenior Engineer, Acme 2018 - 2024\n"
+            "- Led a team of 6 engineers and improved API latency by 40%\n"
+            "- Developed microservices in Python and deployed them on AWS\n"
+            "- Managed migrations, reducing costs by $200k\n"
+            "Education\nB.Sc. Computer Science, State University 2014\nSkills\nPython, Django, AWS"
+        ),
+    },
+    "sparse": {
+        "name": "Sam Lee",
+        "email": "",
+        "phone": "",
+        "summary": "Hard worker.",
+        "skills": ["Python", "Teamwork"],
+        "raw_text": "Sam Lee\nWork\nCashier at a shop\nHigh school diploma",
+    },
+    "data": {
+        "name": "Ana Ruiz",
+        "email": "ana@example.org",
+        "phone": "555-123-4567",
+        "summary": "Data scientist focused on machine learning and statistics.",
+        "skills": ["Python", "TensorFlow", "SQL", "Tableau", "Leadership"],
+        "raw_text": (
+            "Ana Ruiz\nExperience\nData Scientist 2020 - Present\n"
+            "- Built ML models that increased retention by 12%\n- Analyzed data with SQL and Pandas\n"
+            "Education\nMaster of Science in Statistics\nCertifications\nAWS Certified"
+        ),
+    },
+    "frontend": {
+        "name": "Li Wei",
+        "email": "li@example.com",
+        "phone": "",
+        "summary": (
+            "Frontend developer with 3 years of experience who designed and developed responsive web applications "
+            "using modern JavaScript frameworks, collaborating closely with designers and product managers to "
+            "deliver accessible, fast and well tested interfaces."
+        ),
+        "skills": ["JavaScript", "React", "HTML", "CSS", "Git", "Agile", "Node.js", "TypeScript", "Problem Solving", "Figma", "Jest"],
+        "raw_text": (
+            "Li Wei\n| Experience | 2021 - 2024 |\nFrontend Developer\n"
+            "* Created a design system used by 4 teams\n* Improved page load time by 30%\n"
+            "Education\nBachelor of Engineering"
+        ),
+    },
+}
+
+# Scores the hardcoded rules gave these resumes before scoring profiles:
+# (ats_score, section_scores, keyword_score, formatting_score, weaknesses, jd match %)
+EXPECTED = {
+    "data": (
+        51, {"summary": 10, "skills": 75, "experience": 60, "education": 70, "contact": 100}, 30, 75,
+        [("summary", "critical"), ("keywords", "high"), ("experience", "medium")], 25,
+    ),
+    "frontend": (
+        48, {"summary": 25, "skills": 85, "experience": 80, "education": 100, "contact": 65}, 0, 75,
+        [("keywords", "critical"), ("summary", "critical"), ("contact", "medium")], 25,
+    ),
+    "senior": (
+        60, {"summary": 10, "skills": 90, "experience": 80, "education": 100, "contact": 100}, 30, 75,
+        [("summary", "critical"), ("keywords", "high")], 75,
+    ),
+    "sparse": (
+        14, {"summary": 10, "skills": 80, "experience": 0, "education": 0, "contact": 30}, 0, 75,
+        [("experience", "critical"), ("education", "critical"), ("keywords", "critical"), ("summary", "critical"), ("contact", "high")], 0,
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def scorer():
+    return ATSScorer()
+
+
+@pytest.mark.parametrize("key", sorted(RESUMES))
+def test_default_profile_matches_the_hardcoded_scorer(key, scorer):
+    result = scorer.score_resume(RESUMES[key], JD_TEXT)
+    assert result["profile"] == get_profile_registry().get().name
+    assert (
+        result["ats_score"],
+        result["section_scores"],
+        result["keyword_score"],
+        result["formatting_score"],
+        [(w["section"], w["severity"]) for w in result["weaknesses"]],
+        result["jd_match"]["match_percentage"],
+    ) == EXPECTED[key]
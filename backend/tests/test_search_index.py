@@ -0,0 +1,114 @@
+import pytest
+
+from app.services.search_index import SearchIndex, parse_query
+
+DOCS = {
+    1: "Terraform engineer with 5 years of AWS experience. Terraform modules, Terraform cloud.",
+    2: "Python developer, 2 years of Terraform and 5 AWS certifications over the years.",
+    3: "Data analyst with SQL and Python, 5 years of reporting experience.",
+    4: "Frontend developer: React, TypeScript and CSS.",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "index"), flush_docs=1000, max_segments=8, flush_seconds=3600)
+    yield index
+    index.close()
+
+
+def add(index, doc_ids):
+    for doc_id in doc_ids:
+        index.add_document(doc_id, DOCS[doc_id])
+
+
+def ids(hits):
+    return [doc_id for doc_id, _ in hits]
+
+
+def assert_same_hits(result, expected):
+    assert result[0] == expected[0]
+    assert ids(result[1]) == ids(expected[1])
+    assert [score for _, score in result[1]] == pytest.approx([score for _, score in expected[1]])
+
+
+def test_parse_query_splits_terms_and_phrases():
+    assert parse_query('terraform and "5 years" AWS') == (["terraform", "aws"], [["5", "years"]])
+
+
+def test_terms_are_anded_and_ranked_by_bm25(index):
+    add(index, DOCS)
+
+    total, hits = index.search("terraform aws")
+    assert total == 2
+    # Three mentions in doc 1 against one in doc 2
+    assert ids(hits) == [1, 2]
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.search("terraform react") == (0, [])
+
+
+def test_phrases_need_adjacent_terms(index):
+    add(index, DOCS)
+
+    total, hits = index.search('"5 years"')
+    assert total == 2
+    assert sorted(ids(hits)) == [1, 3]
+    assert ids(index.search('python "5 years"')[1]) == [3]
+
+
+QUERIES = ['terraform "5 years"', '"5 years"', "python", "developer", "aws experience"]
+
+
+def test_results_survive_flush_and_merge(index, tmp_path):
+    reference = SearchIndex(str(tmp_path / "reference"), flush_docs=1000, flush_seconds=3600)
+    add(reference, DOCS)
+    expected = [reference.search(query) for query in QUERIES]
+    reference.close()
+
+    add(index, [1, 2])
+    index.flush()
+    add(index, [3])
+    index.flush()
+    add(index, [4])
+    assert len(index.segments) == 2
+
+    # Documents split across segments and the buffer score as if indexed together
+    for query, result in zip(QUERIES, expected):
+        assert_same_hits(index.search(query), result)
+
+    index.flush()
+    index.merge()
+    assert len(index.segments) == 1
+    for query, result in zip(QUERIES, expected):
+        assert_same_hits(index.search(query), result)
+
+
+def test_reindex_shadows_and_delete_hides(index):
+    add(index, DOCS)
+    index.flush()
+
+    index.add_document(4, "Terraform and AWS for 5 years")
+    assert sorted(ids(index.search("terraform aws")[1])) == [1, 2, 4]
+    assert index.search("react") == (0, [])
+
+    index.delete_document(1)
+    assert sorted(ids(index.search("terraform")[1])) == [2, 4]
+    index.flush()
+    index.merge()
+    assert sorted(ids(index.search("terraform")[1])) == [2, 4]
+    assert sorted(ids(index.search('"5 years"')[1])) == [3, 4]
+
+
+def test_other_workers_see_flushed_segments(index, tmp_path):
+    add(index, DOCS)
+    index.flush()
+
+    other = SearchIndex(str(tmp_path / "index"), flush_docs=1000, flush_seconds=3600)
+    try:
+        assert_same_hits(other.search('terraform "5 years"'), index.search('terraform "5 years"'))
+        index.add_document(5, "Kubernetes operator written in Go")
+        index.flush()
+        index.merge()
+        assert ids(other.search("kubernetes")[1]) == [5]
+    finally:
+        other.close()
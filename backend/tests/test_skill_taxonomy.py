@@ -0,0 +1,36 @@
+import pytest
+
+from app.services.skill_taxonomy import get_skill_taxonomy
+
+# Ordinary words one edit from a skill: Testing/TestNG, Scale/Scala, Sprint/Spring, ...
+FALSE_POSITIVES = ["Testing", "Scale", "Sprint", "Shift", "Stack", "Space", "Charts", "Porch", "Mango"]
+
+
+@pytest.fixture(scope="module")
+def taxonomy():
+    return get_skill_taxonomy()
+
+
+def test_normalize_keeps_ordinary_words_as_written(taxonomy):
+    names, ids = taxonomy.normalize(FALSE_POSITIVES)
+    assert names == FALSE_POSITIVES
+    assert ids == []
+
+
+@pytest.mark.parametrize("word", FALSE_POSITIVES + ["Information", "Conference", "Presentation", "Programming"])
+def test_ordinary_words_never_resolve(word, taxonomy):
+    assert taxonomy.resolve(word) is None
+    assert taxonomy.resolve(word, False) is None
+
+
+def test_normalize_keeps_exact_and_alias_matches(taxonomy):
+    names, ids = taxonomy.normalize(["ReactJS", "Node JS", "Vue3", "python"])
+    assert len(ids) == 4
+    assert taxonomy.resolve("Pyhton", False) is None
+
+
+def test_long_typos_resolve_as_a_scoring_hint_only(taxonomy):
+    assert taxonomy.resolve("Kubernets") == taxonomy.resolve("Kubernetes")
+    assert taxonomy.resolve("Kubernets", False) is None
+    names, ids = taxonomy.normalize(["Kubernets"])
+    assert names == ["Kubernets"] and ids == []
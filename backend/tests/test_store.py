@@ -0,0 +1,82 @@
+import pytest
+
+from app.services.store import SQLiteResumeStore
+
+
+def make_resume(i: int, skills=("Python",)) -> dict:
+    return {
+        "name": f"Candidate {i}",
+        "email": f"Candidate{i}@Example.com",
+        "skills": list(skills),
+        "experience": [{"title": "Engineer", "years": i}],
+        "raw_text": f"Candidate {i}\nExperience\nEngineer for {i} years – café résumé",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteResumeStore(str(tmp_path / "resumes.db"))
+
+
+def test_resume_round_trip(store):
+    resume = make_resume(1, skills=["Python", "AWS"])
+    resume_id = store.save_resume(resume, filename="cv.pdf")
+
+    assert store.get_resume(resume_id) == resume
+    without_text = store.get_resume(resume_id, include_raw_text=False)
+    assert "raw_text" not in without_text
+    assert without_text["experience"] == resume["experience"]
+    assert store.get_resume(resume_id + 1) is None
+
+
+def test_scores_round_trip_keeps_the_latest(store):
+    resume_id = store.save_resume(make_resume(1))
+    store.save_scores(resume_id, {"ats_score": 40, "section_scores": {"skills": 50}})
+    store.save_scores(resume_id, {"ats_score": 70, "section_scores": {"skills": 80}})
+
+    assert store.get_latest_scores(resume_id) == {"ats_score": 70, "section_scores": {"skills": 80}}
+    assert store.list_resumes()[0]["ats_score"] == 70
+
+
+def test_version_parent_round_trip(store):
+    parent = store.save_resume(make_resume(1))
+    child = store.save_resume(make_resume(1), parent_id=parent)
+    assert store.get_parent_id(child) == parent
+    assert store.get_parent_id(parent) is None
+
+
+def test_list_resumes_keyset_paging(store):
+    ids = [store.save_resume(make_resume(i)) for i in range(7)]
+
+    pages, before_id = [], None
+    while True:
+        page = store.list_resumes(before_id=before_id, limit=3)
+        if not page:
+            break
+        pages.append([row["id"] for row in page])
+        before_id = page[-1]["id"]
+
+    assert pages == [ids[6:3:-1], ids[3:0:-1], ids[:1]]
+
+
+def test_list_resumes_paging_with_filters(store):
+    ids = []
+    for i in range(8):
+        resume_id = store.save_resume(make_resume(i, skills=["Python", "AWS"] if i % 2 else ["Java"]))
+        store.save_scores(resume_id, {"ats_score": 10 * i})
+        ids.append(resume_id)
+
+    first = store.list_resumes(skills=["python", "AWS"], min_ats_score=20, limit=2)
+    second = store.list_resumes(skills=["python", "AWS"], min_ats_score=20, before_id=first[-1]["id"], limit=2)
+    assert [row["id"] for row in first + second] == [ids[7], ids[5], ids[3]]
+    assert [row["id"] for row in store.list_resumes(email="candidate4@example.com")] == [ids[4]]
+
+
+def test_iter_resumes_resumes_after_id(store):
+    ids = [store.save_resume(make_resume(i)) for i in range(5)]
+
+    seen = [resume_id for resume_id, _ in store.iter_resumes(after_id=ids[1], batch_size=2)]
+    assert seen == ids[2:]
+    assert store.resume_ids() == ids
+    _, resume = next(store.iter_resumes())
+    assert resume["raw_text"] == make_resume(0)["raw_text"]
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+
+from app.utils.uploads import UploadLimitMiddleware, read_upload_form
+
+MAX_BYTES = 256 * 1024
+SPOOL_BYTES = 16 * 1024
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOCX_BYTES = b"PK\x03\x04" + b"\x00" * 40_000
+PDF_BYTES = b"\n" * 100 + b"%PDF-1.7\n" + b"x" * 2_000
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_bytes=MAX_BYTES, paths=["/upload"])
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        form = await read_upload_form(request, SPOOL_BYTES)
+        try:
+            file = form.get("file")
+            assert isinstance(file, UploadFile)
+            content = await file.read()
+            return {"size": len(content), "on_disk": file.file._rolled}
+        finally:
+            await form.close()
+
+    return TestClient(app)
+
+
+def multipart(content_type: str, content: bytes, boundary: bytes = b"B0UNDARY") -> bytes:
+    return (
+        b"--" + boundary + b'\r\nContent-Disposition: form-data; name="file"; filename="resume"\r\n'
+        + b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + content + b"\r\n--" + boundary + b"--\r\n"
+    )
+
+
+@pytest.mark.parametrize("content_type, content", [(DOCX, DOCX_BYTES), (PDF, PDF_BYTES)])
+def test_accepts_labeled_pdf_and_docx(client, content_type, content):
+    response = client.post("/upload", files={"file": ("resume", content, content_type)})
+    assert response.status_code == 200
+    assert response.json()["size"] == len(content)
+
+
+def test_large_files_spool_to_disk(client):
+    assert client.post("/upload", files={"file": ("resume", DOCX_BYTES, DOCX)}).json()["on_disk"] is True
+    assert client.post("/upload", files={"file": ("resume", PDF_BYTES, PDF)}).json()["on_disk"] is False
+
+
+def test_rejects_over_content_length(client):
+    response = client.post("/upload", files={"file": ("resume", DOCX_BYTES + b"\x00" * MAX_BYTES, DOCX)})
+    assert response.status_code == 413
+    assert str(MAX_BYTES) in response.json()["detail"]
+
+
+def test_rejects_oversized_chunked_body(client):
+    body = multipart(DOCX, DOCX_BYTES + b"\x00" * MAX_BYTES)
+    chunks = (body[i:i + 65536] for i in range(0, len(body), 65536))
+    response = client.post("/upload", content=chunks, headers={"Content-Type": "multipart/form-data; boundary=B0UNDARY"})
+    assert response.status_code == 413
+
+
+def test_rejects_mislabeled_file(client):
+    response = client.post("/upload", files={"file": ("resume.pdf", DOCX_BYTES, PDF)})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File content does not match a PDF or DOCX file"
+
+
+def test_rejects_other_content_types(client):
+    response = client.post("/upload", files={"file": ("resume.txt", b"plain text resume", "text/plain")})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Only PDF and DOCX files allowed"
+
+
+def test_rejects_non_multipart_body(client):
+    response = client.post("/upload", content=DOCX_BYTES, headers={"Content-Type": DOCX})
+    assert response.status_code == 400
+
+
+def test_mislabeled_stream_is_rejected_at_its_first_chunk():
+    body = multipart(PDF, b"PK\x03\x04" + b"x" * 1_000_000)
+    chunks = [body[i:i + 65536] for i in range(0, len(body), 65536)]
+    received = 0
+
+    async def receive():
+        nonlocal received
+        received += 1
+        return {"type": "http.request", "body": chunks[received - 1], "more_body": received < len(chunks)}
+
+    async def app(scope, receive, send):
+        while (await receive())["more_body"]:
+            pass
+
+    middleware = UploadLimitMiddleware(app, max_bytes=10 * 1024 * 1024, paths=["/upload"])
+    scope = {"type": "http", "path": "/upload", "headers": [(b"content-type", b"multipart/form-data; boundary=B0UNDARY")]}
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(middleware(scope, receive, None))
+
+    assert error.value.status_code == 400
+    assert received == 1
+
+
+def test_other_paths_pass_through():
+    called = []
+
+    async def app(scope, receive, send):
+        called.append(scope["path"])
+
+    middleware = UploadLimitMiddleware(app, max_bytes=10, paths=["/upload"])
+    asyncio.run(middleware({"type": "http", "path": "/other", "headers": [(b"content-length", b"1000")]}, None, None))
+    assert called == ["/other"]